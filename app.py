@@ -5,144 +5,454 @@ Production-ready web interface for detecting and removing duplicate PDF files.
 """
 
 import os
+import re
 import json
+import hashlib
+import uuid
+import time
+import queue
+import logging
 import threading
 from pathlib import Path
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Request, Response, render_template, request, jsonify, send_file, send_from_directory
 from flask_cors import CORS
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
-from duplicate_pdf_detector import DuplicatePDFDetector
+from duplicate_pdf_detector import DuplicatePDFDetector, HASH_MODES, hash_file
+from hash_index import HashIndex
+from digests import new_hasher, tag_digest
+from scanner import scan_pdfs
+from naming import NameAllocator
+from cas_store import CasStore
+from folder_summary import FolderSummary
+from upload_sessions import OffsetMismatch, UploadSessionStore
+from export import EXPORT_FORMATS, TarLayout, iter_zip
+from jobs import FINAL_STATES, JobCancelled, JobQueue, JobStore
+from metrics import REGISTRY, ERRORS, UPLOAD_BYTES_PER_SECOND
+from log_pipeline import configure_logging
 from config import config
 
+logger = logging.getLogger(__name__)
+
+
+class UploadSpool:
+    """
+    Temporary file in the upload folder that hashes an upload as it is written.
+    
+    The multipart parser writes each uploaded file straight into a spool,
+    so the body is hashed while it is saved and never copied a second time.
+    """
+    
+    def __init__(self, folder, algorithm: str):
+        """
+        Create the spool under a hidden name that folder scans do not pick up.
+        
+        Args:
+            folder: Upload folder, so finishing the upload is a rename
+            algorithm: Digest algorithm, one of DIGEST_ALGORITHMS
+        """
+        self.path = Path(folder) / f".upload-{uuid.uuid4().hex}.part"
+        self.algorithm = algorithm
+        self.hasher = new_hasher(algorithm)
+        self.size = 0
+        self.started = time.perf_counter()
+        self._file = open(self.path, 'w+b')
+    
+    def write(self, data: bytes) -> int:
+        """Hash and write a block of the upload."""
+        self.hasher.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+    
+    def digest(self) -> str:
+        """Return the tagged digest of everything written."""
+        return tag_digest(self.algorithm, self.hasher.hexdigest())
+    
+    def discard(self):
+        """Close the spool and delete it unless it was moved into place."""
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+    
+    def __getattr__(self, name):
+        """Delegate reading, seeking and closing to the underlying file."""
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """Request that spools the files of /api/upload into the upload folder."""
+    
+    def __init__(self, *args, **kwargs):
+        """Initialize the request with no spooled uploads."""
+        super().__init__(*args, **kwargs)
+        self.upload_spools = []
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        """Return a hashing spool for uploads, the default stream otherwise."""
+        if self.endpoint != 'upload_file':
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        spool = UploadSpool(app.config['UPLOAD_FOLDER'], app.config['HASH_ALGORITHM'])
+        self.upload_spools.append(spool)
+        return spool
+
+
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app)
 
-# Load configuration
+# Load configuration, then the optional settings file named by SANITIXPDF_SETTINGS
 env = os.environ.get('FLASK_ENV', 'development')
 app.config.from_object(config.get(env, config['default']))
+app.config.from_envvar('SANITIXPDF_SETTINGS', silent=True)
 
-# Global state for processing status
-processing_status = {
-    'is_processing': False,
-    'progress': 0,
-    'current_status': '',
-    'stats': None,
-    'error': None
-}
+# Content digests of every PDF in the workspace, built lazily on first upload
+workspace_digests = None
+workspace_lock = threading.Lock()
+
+# Only one thread builds the digest map; the generation changes when it is reset
+workspace_build_lock = threading.Lock()
+workspace_generation = 0
+
+# Held by the processing job that is working on the upload and final folders
+processing_lock = threading.Lock()
+
+# Name allocator of the upload folder, also built lazily and guarded by workspace_lock
+upload_names = None
 
 # Ensure directories exist
 Path(app.config['UPLOAD_FOLDER']).mkdir(exist_ok=True)
 Path(app.config['FINAL_FOLDER']).mkdir(exist_ok=True)
 Path(app.config['LOGS_FOLDER']).mkdir(exist_ok=True)
 
+# One queue-based logging pipeline for the app and every job it runs
+configure_logging(app.config['LOGS_FOLDER'], app.config['LOG_LEVEL'], app.config['LOG_FORMAT'],
+                  name='sanitixpdf')
+
+# Catalog of the final folder when it uses content-addressable storage
+final_store = None
+if app.config['FINAL_STORAGE'] == 'cas':
+    final_store = CasStore(app.config['FINAL_FOLDER'], app.config['HASH_ALGORITHM'], app.config['HASH_CHUNK_SIZE'])
+
 
 def allowed_file(filename):
     """Check if file has allowed extension."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
 
-def get_file_info(folder_path):
-    """Get information about files in a folder."""
-    folder = Path(folder_path)
-    files = []
-    total_size = 0
+# How jobs scan the source folder; listings and upload checks see the same files
+SOURCE_SCAN_OPTIONS = {
+    'recursive': app.config['SCAN_RECURSIVE'],
+    'include': app.config['SCAN_INCLUDE'],
+    'exclude': app.config['SCAN_EXCLUDE'],
+    'symlinks': app.config['SCAN_SYMLINKS'],
+    'skip_dirs': [app.config['FINAL_FOLDER'], app.config['LOGS_FOLDER']]
+}
+
+# Cached listings of the source and final folders, served by /api/stats
+folder_summaries = {
+    'source': FolderSummary(app.config['UPLOAD_FOLDER'], max_age=app.config['STATS_MAX_AGE'],
+                            **SOURCE_SCAN_OPTIONS),
+    'final': FolderSummary(app.config['FINAL_FOLDER'], max_age=app.config['STATS_MAX_AGE'],
+                           lister=final_store.manifest if final_store else None)
+}
+
+# Distinguishes ETags of this process from those of a previous one
+STATS_ETAG_SALT = uuid.uuid4().hex[:8]
+
+
+def invalidate_folder_summaries(*names):
+    """Mark the listings of the named folders (default: all) as stale."""
+    for name in names or folder_summaries:
+        folder_summaries[name].invalidate()
+
+
+def load_workspace_digests():
+    """
+    Build the digest map of PDFs already in the source and final folders.
     
-    for file_path in folder.glob("*.pdf"):
-        try:
-            stat = file_path.stat()
-            files.append({
-                'name': file_path.name,
-                'size': stat.st_size,
-                'size_mb': round(stat.st_size / (1024 * 1024), 2),
-                'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()
-            })
-            total_size += stat.st_size
-        except Exception as e:
-            print(f"Error getting info for {file_path}: {e}")
+    Digests of unchanged files come from the persistent hash index, so
+    rebuilding after a processing run only hashes files not seen before.
+    With content-addressable storage the final folder's digests are read
+    from its catalog instead.
     
-    for file_path in folder.glob("*.PDF"):
+    Returns:
+        Dictionary mapping content hash to (folder label, filename)
+    """
+    digests = {}
+    folders = [('final', app.config['FINAL_FOLDER'], {}),
+               ('source', app.config['UPLOAD_FOLDER'], SOURCE_SCAN_OPTIONS)]
+    if final_store:
+        for name, digest in final_store.entries():
+            digests.setdefault(digest, ('final', name))
+        folders = folders[1:]
+    for label, folder_path, scan_options in folders:
+        index = HashIndex(app.config['HASH_INDEX_PATH'], folder_path)
+        records = []
         try:
-            stat = file_path.stat()
-            files.append({
-                'name': file_path.name,
-                'size': stat.st_size,
-                'size_mb': round(stat.st_size / (1024 * 1024), 2),
-                'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()
-            })
-            total_size += stat.st_size
-        except Exception as e:
-            print(f"Error getting info for {file_path}: {e}")
+            for entry in scan_pdfs(folder_path, **scan_options):
+                try:
+                    digest = index.lookup(entry, 'content_hash', app.config['HASH_ALGORITHM'])
+                    if digest is None:
+                        digest = hash_file(entry.path, app.config['HASH_CHUNK_SIZE'], app.config['HASH_USE_MMAP'],
+                                           app.config['HASH_ALGORITHM'])
+                        records.append((entry, digest))
+                    digests.setdefault(digest, (label, entry.path.name))
+                except Exception as e:
+                    logger.error(f"Error hashing {entry.path}: {e}")
+            index.update(records, 'content_hash')
+        finally:
+            index.close()
+    return digests
+
+
+def get_workspace_digests():
+    """
+    Return the workspace digest map, building it on first use.
+    
+    The workspace is hashed without holding workspace_lock, so uploads that
+    do not need the map are not held up. A map whose build overlapped a
+    reset is returned to its caller but not kept.
+    
+    Returns:
+        Dictionary mapping content hash to (folder label, filename)
+    """
+    global workspace_digests
+    
+    with workspace_lock:
+        if workspace_digests is not None:
+            return workspace_digests
     
-    return sorted(files, key=lambda x: x['name']), total_size
+    with workspace_build_lock:
+        with workspace_lock:
+            if workspace_digests is not None:
+                return workspace_digests
+            generation = workspace_generation
+        
+        digests = load_workspace_digests()
+        with workspace_lock:
+            if generation == workspace_generation:
+                workspace_digests = digests
+        return digests
 
 
-def process_duplicates():
-    """Process duplicates in background thread."""
-    global processing_status
+def reset_workspace_digests():
+    """Forget the workspace digest map and upload names after files were moved or deleted."""
+    global workspace_digests, upload_names, workspace_generation
     
-    try:
-        processing_status['is_processing'] = True
-        processing_status['progress'] = 0
-        processing_status['error'] = None
-        processing_status['current_status'] = 'Initializing...'
+    with workspace_lock:
+        workspace_digests = None
+        upload_names = None
+        workspace_generation += 1
+    invalidate_folder_summaries()
+
+
+# Part of the overall progress bar (start, end) covered by each detector stage
+STAGE_PROGRESS = {
+    'scan': (0, 5),
+    'sample': (5, 25),
+    'hash': (25, 80),
+    'text': (5, 80),
+    'structure': (5, 80),
+    'signature': (5, 80),
+    'verify': (80, 85),
+    'move': (85, 99)
+}
+
+STAGE_LABELS = {
+    'scan': 'Scanning for PDFs',
+    'sample': 'Sampling size collisions',
+    'hash': 'Hashing candidates',
+    'text': 'Extracting text',
+    'structure': 'Hashing page structure',
+    'signature': 'Computing text signatures',
+    'verify': 'Verifying duplicates',
+    'move': 'Moving unique PDFs'
+}
+
+
+def progress_handler(job):
+    """
+    Build a detector progress callback that reports into a job.
+    
+    Throughput and ETA are measured per stage from the bytes processed
+    since the stage's first report. Cancellation is honoured during the
+    read-only stages; once files are being moved the run completes.
+    
+    Args:
+        job: Job to update
+    
+    Returns:
+        Callback for DuplicatePDFDetector's progress_callback
+    """
+    stage_start = {}
+    
+    def on_progress(progress):
+        if progress.stage != 'move':
+            job.check_cancelled()
         
-        detector = DuplicatePDFDetector(
-            source_folder=app.config['UPLOAD_FOLDER'],
-            final_folder=app.config['FINAL_FOLDER'],
-            log_folder=app.config['LOGS_FOLDER']
+        now = time.monotonic()
+        started, base_files, base_bytes = stage_start.setdefault(
+            progress.stage, (now, progress.files_done, progress.bytes_done)
         )
+        elapsed = now - started
         
-        processing_status['current_status'] = 'Scanning for PDFs...'
-        processing_status['progress'] = 20
-        
-        duplicates = detector.find_duplicates()
+        bytes_per_s = (progress.bytes_done - base_bytes) / elapsed if elapsed > 0 else 0.0
+        files_per_s = (progress.files_done - base_files) / elapsed if elapsed > 0 else 0.0
+        eta_seconds = None
+        if progress.bytes_total and bytes_per_s > 0:
+            eta_seconds = (progress.bytes_total - progress.bytes_done) / bytes_per_s
+        elif files_per_s > 0:
+            eta_seconds = (progress.files_total - progress.files_done) / files_per_s
         
-        processing_status['current_status'] = 'Processing duplicates...'
-        processing_status['progress'] = 60
-        
-        if duplicates:
-            detector.remove_duplicates_and_move_unique(duplicates)
+        if progress.bytes_total:
+            fraction = progress.bytes_done / progress.bytes_total
         else:
-            # Move all PDFs to final folder if no duplicates
-            pdf_files = list(Path(app.config['UPLOAD_FOLDER']).glob("*.pdf"))
-            pdf_files.extend(Path(app.config['UPLOAD_FOLDER']).glob("*.PDF"))
-            for pdf_path in pdf_files:
-                try:
-                    destination = Path(app.config['FINAL_FOLDER']) / pdf_path.name
-                    counter = 1
-                    while destination.exists():
-                        stem = pdf_path.stem
-                        suffix = pdf_path.suffix
-                        destination = Path(app.config['FINAL_FOLDER']) / f"{stem}_{counter}{suffix}"
-                        counter += 1
-                    import shutil
-                    shutil.move(str(pdf_path), str(destination))
-                except Exception as e:
-                    print(f"Error moving {pdf_path.name}: {e}")
-        
-        processing_status['progress'] = 90
-        processing_status['current_status'] = 'Finalizing...'
-        
-        # Get final statistics
-        stats = {
-            'total_pdfs': detector.stats['total_pdfs'],
-            'unique_pdfs': detector.stats['unique_pdfs'],
-            'duplicates_found': detector.stats['duplicates_found'],
-            'duplicates_removed': detector.stats['duplicates_removed'],
-            'errors': detector.stats['errors']
-        }
-        
-        processing_status['stats'] = stats
-        processing_status['progress'] = 100
-        processing_status['current_status'] = 'Completed!'
+            fraction = progress.files_done / progress.files_total if progress.files_total else 1.0
+        low, high = STAGE_PROGRESS.get(progress.stage, (0, 99))
         
-    except Exception as e:
-        processing_status['error'] = str(e)
-        processing_status['current_status'] = f'Error: {str(e)}'
-    finally:
-        processing_status['is_processing'] = False
+        job.update(
+            progress=int(low + (high - low) * fraction),
+            current_status=f"{STAGE_LABELS.get(progress.stage, progress.stage)} "
+                           f"({progress.files_done}/{progress.files_total})",
+            detail={
+                'stage': progress.stage,
+                'files_done': progress.files_done,
+                'files_total': progress.files_total,
+                'bytes_done': progress.bytes_done,
+                'bytes_total': progress.bytes_total,
+                'mb_per_s': round(bytes_per_s / (1024 * 1024), 1),
+                'eta_seconds': round(eta_seconds) if eta_seconds is not None else None
+            }
+        )
+    
+    return on_progress
+
+
+def process_duplicates(job):
+    """
+    Run one processing job on a worker thread of the job queue.
+    
+    Args:
+        job: Job being run; job.options may override the hash mode,
+            similarity threshold and verification of the configuration
+    
+    Returns:
+        Statistics of the run
+    """
+    options = job.options
+    
+    # Jobs share the upload and final folders, so runs over them never overlap:
+    # one job runs at a time whatever JOB_WORKERS is
+    with processing_lock:
+        try:
+            job.check_cancelled()
+            
+            detector = DuplicatePDFDetector(
+                source_folder=app.config['UPLOAD_FOLDER'],
+                final_folder=app.config['FINAL_FOLDER'],
+                log_folder=app.config['LOGS_FOLDER'],
+                chunk_size=app.config['HASH_CHUNK_SIZE'],
+                use_mmap=app.config['HASH_USE_MMAP'],
+                workers=app.config['HASH_WORKERS'],
+                hash_mode=options.get('mode', app.config['HASH_MODE']),
+                index_path=app.config['HASH_INDEX_PATH'],
+                similarity_threshold=options.get('threshold', app.config['SIMILARITY_THRESHOLD']),
+                verify=options.get('verify', app.config['VERIFY_DUPLICATES']),
+                recursive=SOURCE_SCAN_OPTIONS['recursive'],
+                include=SOURCE_SCAN_OPTIONS['include'],
+                exclude=SOURCE_SCAN_OPTIONS['exclude'],
+                symlinks=SOURCE_SCAN_OPTIONS['symlinks'],
+                digest_algorithm=app.config['HASH_ALGORITHM'],
+                prefilter_algorithm=app.config['PREFILTER_ALGORITHM'],
+                placement=app.config['PLACEMENT_MODE'],
+                progress_callback=progress_handler(job),
+                log_level=app.config['LOG_LEVEL'],
+                log_format=app.config['LOG_FORMAT'],
+                memory_budget=app.config['GROUPING_MEMORY_BUDGET'],
+                spill_folder=app.config['GROUPING_SPILL_FOLDER'],
+                storage=app.config['FINAL_STORAGE']
+            )
+            
+            job.update(progress=0, current_status='Scanning for PDFs...')
+            
+            duplicates = detector.find_duplicates()
+            
+            # Nothing has been deleted or moved yet, so stopping here is clean
+            job.check_cancelled()
+            job.update(progress=STAGE_PROGRESS['move'][0], current_status='Removing duplicates...')
+            
+            # Delete duplicates and move everything else from the same scan
+            if detector.manifest:
+                detector.remove_duplicates_and_move_unique(duplicates)
+            
+            job.update(progress=STAGE_PROGRESS['move'][1], current_status='Finalizing...')
+            
+            # Get final statistics
+            return {
+                'total_pdfs': detector.stats['total_pdfs'],
+                'unique_pdfs': detector.stats['unique_pdfs'],
+                'duplicates_found': detector.stats['duplicates_found'],
+                'duplicates_removed': detector.stats['duplicates_removed'],
+                'errors': detector.stats['errors'],
+                'size_unique': detector.stats['size_unique'],
+                'sample_unique': detector.stats['sample_unique'],
+                'fully_hashed': detector.stats['fully_hashed'],
+                'throughput': detector.throughput.summary(),
+                'placement': dict(detector.placement_report)
+            }
+        except JobCancelled:
+            raise
+        except Exception as e:
+            ERRORS.inc(stage='job', type=type(e).__name__)
+            raise
+        finally:
+            reset_workspace_digests()
+
+
+# Processing runs queue up and are served in order by a bounded worker pool
+job_queue = JobQueue(
+    process_duplicates,
+    JobStore(app.config['JOBS_DB_PATH']),
+    workers=app.config['JOB_WORKERS'],
+    max_queued=app.config['JOB_QUEUE_SIZE']
+)
+
+REGISTRY.gauge('sanitix_job_queue_depth', 'Processing jobs waiting for a worker',
+               callback=lambda: job_queue.counts()['queued'])
+REGISTRY.gauge('sanitix_jobs_active', 'Processing jobs currently running',
+               callback=lambda: job_queue.counts()['running'])
+
+
+def parse_job_options(data):
+    """
+    Validate the optional overrides of a job request.
+    
+    Args:
+        data: Decoded JSON body of the request, or None
+    
+    Returns:
+        Tuple of (options, error message or None)
+    """
+    options = {}
+    data = data or {}
+    
+    if 'mode' in data:
+        if data['mode'] not in HASH_MODES:
+            return None, f"mode must be one of: {', '.join(HASH_MODES)}"
+        options['mode'] = data['mode']
+    if 'threshold' in data:
+        try:
+            threshold = float(data['threshold'])
+        except (TypeError, ValueError):
+            return None, 'threshold must be a number'
+        if not 0 < threshold <= 1:
+            return None, 'threshold must be between 0 and 1'
+        options['threshold'] = threshold
+    if 'verify' in data:
+        options['verify'] = bool(data['verify'])
+    
+    return options, None
 
 
 @app.route('/')
@@ -151,9 +461,78 @@ def index():
     return render_template('index.html')
 
 
+def ingest_upload(temp_path, filename, digest):
+    """
+    Move a fully received upload into the upload folder.
+    
+    If the workspace already holds the same content the file is discarded
+    instead, and the result names the existing copy in duplicate_of.
+    
+    Args:
+        temp_path: Received file, on the same filesystem as the upload folder
+        filename: Sanitized name the file was uploaded under
+        digest: Tagged content digest of the file
+    
+    Returns:
+        Result dictionary as returned by the upload endpoints
+    """
+    global upload_names
+    
+    digests = get_workspace_digests() if app.config['DEDUPE_ON_UPLOAD'] else None
+    with workspace_lock:
+        if digests is not None:
+            existing = digests.get(digest)
+            if existing:
+                Path(temp_path).unlink()
+                location, existing_name = existing
+                return {
+                    'message': 'Duplicate of an existing file, upload discarded',
+                    'filename': None,
+                    'duplicate_of': existing_name,
+                    'duplicate_location': location
+                }
+        
+        # Handle duplicate filenames
+        if upload_names is None:
+            upload_names = NameAllocator(app.config['UPLOAD_FOLDER'])
+        file_path = upload_names.allocate(filename)
+        filename = file_path.name
+        
+        os.replace(temp_path, file_path)
+        if workspace_digests is not None:
+            workspace_digests[digest] = ('source', filename)
+    invalidate_folder_summaries('source')
+    
+    return {
+        'message': 'File uploaded successfully',
+        'filename': filename,
+        'duplicate_of': None
+    }
+
+
+def observe_upload_rate(received, seconds):
+    """Record the transfer rate of an upload request."""
+    if received > 0 and seconds > 0:
+        UPLOAD_BYTES_PER_SECOND.observe(received / seconds)
+
+
+@app.teardown_request
+def discard_upload_spools(exc):
+    """Delete spooled uploads that were not moved into the upload folder."""
+    for spool in request.upload_spools:
+        spool.discard()
+
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
-    """Handle file upload."""
+    """
+    Handle file upload.
+    
+    The upload is hashed while the multipart parser writes it to a spool in
+    the upload folder. If the workspace already holds the same content the
+    spool is discarded and the response names the existing copy in
+    duplicate_of.
+    """
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
     
@@ -164,84 +543,349 @@ def upload_file():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        file_path = Path(app.config['UPLOAD_FOLDER']) / filename
-        
-        # Handle duplicate filenames
-        counter = 1
-        original_name = file_path.stem
-        suffix = file_path.suffix
-        while file_path.exists():
-            filename = f"{original_name}_{counter}{suffix}"
-            file_path = Path(app.config['UPLOAD_FOLDER']) / filename
-            counter += 1
+        spool = file.stream
+        spool.close()
+        observe_upload_rate(spool.size, time.perf_counter() - spool.started)
         
-        file.save(str(file_path))
-        
-        return jsonify({
-            'message': 'File uploaded successfully',
-            'filename': filename
-        }), 200
+        return jsonify(ingest_upload(spool.path, filename, spool.digest())), 200
     
     return jsonify({'error': 'Invalid file type. Only PDF files are allowed.'}), 400
 
 
-@app.route('/api/process', methods=['POST'])
-def process():
-    """Start duplicate detection process."""
-    global processing_status
+# Resumable upload sessions, staged inside the upload folder so finalizing is a rename
+upload_sessions = UploadSessionStore(
+    app.config['UPLOAD_STAGING_FOLDER'] or os.path.join(app.config['UPLOAD_FOLDER'], '.staging'),
+    ttl=app.config['UPLOAD_SESSION_TTL'],
+    algorithm=app.config['HASH_ALGORITHM']
+)
+
+
+@app.route('/api/uploads', methods=['POST'])
+def create_upload_session():
+    """
+    Start a resumable upload of one or more files.
+    
+    The JSON body lists the files as {"files": [{"name": ..., "size": ...}]}.
+    Their bytes are then sent as one stream, the files concatenated in
+    order, with PUT /api/uploads/<id>.
+    """
+    data = request.get_json(silent=True) or {}
+    files = data.get('files')
+    if not isinstance(files, list) or not files:
+        return jsonify({'error': 'files must be a non-empty list'}), 400
+    if len(files) > app.config['UPLOAD_SESSION_MAX_FILES']:
+        return jsonify({'error': f"At most {app.config['UPLOAD_SESSION_MAX_FILES']} files per session"}), 400
+    
+    announced = []
+    for file in files:
+        name = file.get('name') if isinstance(file, dict) else None
+        size = file.get('size') if isinstance(file, dict) else None
+        if not name or not allowed_file(name) or not secure_filename(name):
+            return jsonify({'error': f'Invalid file type: {name}. Only PDF files are allowed.'}), 400
+        if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+            return jsonify({'error': f'Invalid size for {name}'}), 400
+        if size > app.config['UPLOAD_MAX_FILE_SIZE']:
+            return jsonify({'error': f'{name} is larger than the upload limit'}), 413
+        announced.append((secure_filename(name), size))
+    
+    return jsonify(upload_sessions.create(announced)), 201
+
+
+@app.route('/api/uploads/<session_id>', methods=['GET'])
+def get_upload_session(session_id):
+    """Get the received offset of a session and the state of each file."""
+    session = upload_sessions.status(session_id)
+    if session is None:
+        return jsonify({'error': 'Upload session not found'}), 404
+    return jsonify(session), 200
+
+
+@app.route('/api/uploads/<session_id>', methods=['PUT'])
+def upload_chunk(session_id):
+    """
+    Receive a chunk of a session's stream.
+    
+    The chunk's position is given by a 'Content-Range: bytes start-end/total'
+    header or an 'offset' query parameter. A chunk that does not start at
+    the received offset is refused with 409 and the offset to resume from.
+    """
+    content_range = request.headers.get('Content-Range')
+    if content_range:
+        match = re.match(r'^bytes (\d+)-\d+/(\d+|\*)$', content_range.strip())
+        if not match:
+            return jsonify({'error': 'Invalid Content-Range header'}), 400
+        offset = int(match.group(1))
+    else:
+        offset = request.args.get('offset', type=int)
+        if offset is None:
+            return jsonify({'error': 'Content-Range header or offset parameter required'}), 400
+    
+    started = time.perf_counter()
+    try:
+        position = upload_sessions.write(session_id, offset, request.stream,
+                                         app.config['HASH_CHUNK_SIZE'])
+    except KeyError:
+        return jsonify({'error': 'Upload session not found'}), 404
+    except OffsetMismatch as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    observe_upload_rate(request.content_length or position - offset, time.perf_counter() - started)
+    
+    session = upload_sessions.status(session_id)
+    return jsonify({
+        'offset': position,
+        'total': session['total'],
+        'complete': position == session['total']
+    }), 200
+
+
+@app.route('/api/uploads/<session_id>/finalize', methods=['POST'])
+def finalize_upload_session(session_id):
+    """
+    Add every completely received file of a session to the upload folder.
+    
+    Each file is checked for duplicates like a single upload, by the digest
+    computed while its bytes arrived. Files still
+    missing bytes stay in the session and can be finalized later; the
+    session is removed once all of its files are finalized.
+    """
+    session = upload_sessions.status(session_id)
+    if session is None:
+        return jsonify({'error': 'Upload session not found'}), 404
+    
+    results = []
+    for file in session['files']:
+        if file['state'] != 'complete':
+            continue
+        staging_path = upload_sessions.staging_path(session_id, file['index'])
+        try:
+            # Files partly staged before a restart have no running digest
+            digest = upload_sessions.digest(session_id, file['index']) or hash_file(
+                staging_path, app.config['HASH_CHUNK_SIZE'], algorithm=app.config['HASH_ALGORITHM']
+            )
+            result = ingest_upload(staging_path, file['name'], digest)
+        except Exception as e:
+            ERRORS.inc(stage='upload', type=type(e).__name__)
+            result = {'error': f'Error saving file: {str(e)}'}
+        else:
+            upload_sessions.finalized(session_id, file['index'])
+        result.update({'index': file['index'], 'name': file['name']})
+        results.append(result)
     
-    if processing_status['is_processing']:
-        return jsonify({'error': 'Processing already in progress'}), 400
+    pending = [file['index'] for file in session['files'] if file['state'] == 'pending']
+    return jsonify({'results': results, 'pending': pending}), 200
+
+
+@app.route('/api/uploads/<session_id>', methods=['DELETE'])
+def delete_upload_session(session_id):
+    """Abort a session and discard everything it received."""
+    if not upload_sessions.delete(session_id):
+        return jsonify({'error': 'Upload session not found'}), 404
+    return jsonify({'message': 'Upload session deleted'}), 200
+
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """
+    Queue a duplicate detection job.
+    
+    The JSON body may override 'mode', 'threshold' and 'verify' for this
+    job. Jobs run in the order they were submitted.
+    """
+    options, error = parse_job_options(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
     
-    # Reset status
-    processing_status['is_processing'] = False
-    processing_status['progress'] = 0
-    processing_status['stats'] = None
-    processing_status['error'] = None
+    # Nothing new arrived since the last run
+    _, source_count, _ = folder_summaries['source'].summary()
+    if not source_count:
+        return jsonify({'message': 'No new files to process', 'skipped': True}), 200
     
-    # Start processing in background thread
-    thread = threading.Thread(target=process_duplicates)
-    thread.daemon = True
-    thread.start()
+    try:
+        job = job_queue.submit(options)
+    except queue.Full:
+        return jsonify({'error': 'Too many jobs are waiting, try again later'}), 503
     
-    return jsonify({'message': 'Processing started'}), 200
+    return jsonify({'message': 'Job queued', 'job_id': job.id, 'job': job_queue.get(job.id)}), 202
+
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List the most recent jobs, newest first."""
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({'jobs': job_queue.store.recent(max(1, min(limit, 100)))}), 200
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the state, progress and results of a job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Stream the progress of a job as Server-Sent Events.
+    
+    Every event carries the job snapshot of GET /api/jobs/<id>, including
+    the stage detail with throughput and ETA. Changes are sent as
+    'progress' events, bursts of them at most every SSE_INTERVAL seconds,
+    and the stream ends with a 'done' event of the job's final state.
+    """
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    interval = app.config['SSE_INTERVAL']
+    keepalive = app.config['SSE_KEEPALIVE']
+    
+    def stream():
+        sent = None
+        last_sent = time.monotonic()
+        while True:
+            job = job_queue.job(job_id)
+            snapshot = job_queue.get(job_id)
+            key = (snapshot['state'], snapshot.get('version'), snapshot.get('position'))
+            if key != sent:
+                sent = key
+                last_sent = time.monotonic()
+                if snapshot['state'] in FINAL_STATES:
+                    yield f"event: done\ndata: {json.dumps(snapshot)}\n\n"
+                    return
+                yield f"event: progress\ndata: {json.dumps(snapshot)}\n\n"
+                time.sleep(interval)
+            elif time.monotonic() - last_sent >= keepalive:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+            
+            if job is not None:
+                # Queue positions change without a new version, so wake up regularly
+                job.wait(snapshot.get('version'), timeout=1.0)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancel a job.
+    
+    A queued job is dropped at once; a running job stops before it starts
+    deleting or moving files, or finishes if it already has.
+    """
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['state'] in ('completed', 'failed'):
+        return jsonify({'error': f"Job already {job['state']}", 'job': job}), 409
+    return jsonify({'message': 'Cancellation requested', 'job': job}), 200
+
+
+@app.route('/api/process', methods=['POST'])
+def process():
+    """Start duplicate detection process (queues a job with the default settings)."""
+    return create_job()
 
 
 @app.route('/api/status', methods=['GET'])
 def status():
-    """Get processing status."""
-    return jsonify(processing_status), 200
+    """Get the status of the most recent job in the legacy format."""
+    job = job_queue.latest()
+    if job is None:
+        return jsonify({
+            'is_processing': False,
+            'progress': 0,
+            'current_status': '',
+            'stats': None,
+            'error': None
+        }), 200
+    return jsonify({
+        'job_id': job['id'],
+        'is_processing': job['state'] in ('queued', 'running'),
+        'progress': job['progress'],
+        'current_status': job['current_status'],
+        'stats': job['stats'],
+        'error': job['error']
+    }), 200
 
 
 @app.route('/api/stats', methods=['GET'])
 def stats():
-    """Get statistics about PDFs."""
-    source_files, source_size = get_file_info(app.config['UPLOAD_FOLDER'])
-    final_files, final_size = get_file_info(app.config['FINAL_FOLDER'])
+    """
+    Get statistics about PDFs, with one page of each folder's file list.
     
-    return jsonify({
-        'source': {
-            'count': len(source_files),
-            'files': source_files,
-            'total_size_mb': round(source_size / (1024 * 1024), 2)
-        },
-        'final': {
-            'count': len(final_files),
-            'files': final_files,
-            'total_size_mb': round(final_size / (1024 * 1024), 2)
+    Query parameters:
+        folder: 'source' or 'final' to list only that folder
+        sort: 'name', 'size' or 'modified' (default: name)
+        order: 'asc' or 'desc' (default: asc)
+        limit: Files per page (default: STATS_PAGE_SIZE)
+        cursor: next_cursor of the previous page; requires folder
+    
+    Listings are cached until the app changes a folder or the folder's
+    modification time changes, and responses carry an ETag so unchanged
+    listings are answered with 304 Not Modified.
+    """
+    names = list(folder_summaries)
+    folder = request.args.get('folder')
+    if folder is not None:
+        if folder not in folder_summaries:
+            return jsonify({'error': f"folder must be one of: {', '.join(folder_summaries)}"}), 400
+        names = [folder]
+    cursor = request.args.get('cursor')
+    if cursor and folder is None:
+        return jsonify({'error': 'cursor requires folder'}), 400
+    
+    sort = request.args.get('sort', 'name')
+    order = request.args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': "order must be 'asc' or 'desc'"}), 400
+    limit = request.args.get('limit', app.config['STATS_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, app.config['STATS_MAX_PAGE_SIZE']))
+    
+    totals = {name: folder_summaries[name].summary() for name in names}
+    etag = hashlib.sha1(repr((
+        STATS_ETAG_SALT,
+        sorted((name, version) for name, (version, _, _) in totals.items()),
+        sort, order, limit, cursor
+    )).encode('utf-8')).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    
+    result = {}
+    for name in names:
+        _, count, total_size = totals[name]
+        try:
+            files, next_cursor = folder_summaries[name].page(sort, order == 'desc', cursor, limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        result[name] = {
+            'count': count,
+            'files': files,
+            'next_cursor': next_cursor,
+            'total_size_mb': round(total_size / (1024 * 1024), 2)
         }
-    }), 200
+    
+    response = jsonify(result)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response, 200
 
 
 @app.route('/api/clear-source', methods=['POST'])
 def clear_source():
     """Clear all files from source folder."""
     try:
-        folder = Path(app.config['UPLOAD_FOLDER'])
-        for file_path in folder.glob("*.pdf"):
-            file_path.unlink()
-        for file_path in folder.glob("*.PDF"):
-            file_path.unlink()
+        for entry in scan_pdfs(app.config['UPLOAD_FOLDER'], **SOURCE_SCAN_OPTIONS):
+            entry.path.unlink()
+        reset_workspace_digests()
         return jsonify({'message': 'Source folder cleared'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -251,19 +895,35 @@ def clear_source():
 def clear_final():
     """Clear all files from final folder."""
     try:
-        folder = Path(app.config['FINAL_FOLDER'])
-        for file_path in folder.glob("*.pdf"):
-            file_path.unlink()
-        for file_path in folder.glob("*.PDF"):
-            file_path.unlink()
+        if final_store:
+            final_store.clear()
+        for entry in scan_pdfs(app.config['FINAL_FOLDER']):
+            entry.path.unlink()
+        reset_workspace_digests()
         return jsonify({'message': 'Final folder cleared'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose timing histograms, job gauges and error counters to Prometheus."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/download/<filename>')
 def download_file(filename):
-    """Download a file from final folder."""
+    """
+    Download a file from final folder.
+    
+    With content-addressable storage the name is resolved through the
+    catalog and the stored blob is sent under that name.
+    """
+    if final_store:
+        blob = final_store.resolve(filename)
+        if blob is None:
+            return jsonify({'error': 'File not found'}), 404
+        return send_file(blob, mimetype='application/pdf', as_attachment=True, download_name=filename)
     return send_from_directory(
         app.config['FINAL_FOLDER'],
         filename,
@@ -271,6 +931,94 @@ def download_file(filename):
     )
 
 
+@app.route('/api/files/<filename>', methods=['DELETE'])
+def delete_file(filename):
+    """
+    Remove a file from the final folder.
+    
+    With content-addressable storage the name is removed from the catalog,
+    and the stored blob with it once no other name refers to it.
+    """
+    if final_store:
+        removed = final_store.remove(filename)
+    else:
+        path = safe_join(app.config['FINAL_FOLDER'], filename)
+        removed = path is not None and os.path.isfile(path) and allowed_file(filename)
+        if removed:
+            os.unlink(path)
+    if not removed:
+        return jsonify({'error': 'File not found'}), 404
+    reset_workspace_digests()
+    return jsonify({'message': f'{filename} removed'}), 200
+
+
+@app.route('/api/export', methods=['GET', 'POST'])
+def export_files():
+    """
+    Stream the final folder, or a subset of it, as one archive.
+    
+    The archive is generated while it is sent: 'format=zip' (default)
+    produces stored ZIP entries, 'format=tar' produces a tar archive with a
+    Content-Length that supports Range requests, so an interrupted download
+    can be resumed. A subset is chosen with repeated 'file' query
+    parameters, or a JSON body {"files": [...]} on POST.
+    """
+    export_format = request.args.get('format', 'zip')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    selected = request.args.getlist('file')
+    if request.method == 'POST':
+        selected = (request.get_json(silent=True) or {}).get('files') or selected
+    
+    final_folder = app.config['FINAL_FOLDER']
+    entries = final_store.manifest() if final_store else scan_pdfs(final_folder)
+    if selected:
+        wanted = set(selected)
+        entries = [entry for entry in entries if entry.name in wanted]
+        missing = wanted - {entry.name for entry in entries}
+        if missing:
+            return jsonify({'error': 'Files not found', 'files': sorted(missing)}), 404
+    
+    filename = f"sanitixpdf-{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    chunk_size = app.config['HASH_CHUNK_SIZE']
+    
+    if export_format == 'zip':
+        response = Response(iter_zip(entries, final_folder, chunk_size), mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    layout = TarLayout(entries, final_folder)
+    headers = {
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Accept-Ranges': 'bytes',
+        'ETag': f'"{layout.etag}"'
+    }
+    
+    # A range is served only if the archive is still the one it was cut from:
+    # If-Range must carry its strong ETag, a date is never precise enough.
+    # Multiple ranges are not supported and, as RFC 9110 allows, ignored.
+    byte_range = request.range
+    if_range = request.headers.get('If-Range')
+    if byte_range and if_range is not None and if_range.strip() != headers['ETag']:
+        byte_range = None
+    if byte_range and len(byte_range.ranges) != 1:
+        byte_range = None
+    if byte_range:
+        content_range = byte_range.make_content_range(layout.size)
+        if content_range is None:
+            headers['Content-Range'] = f'bytes */{layout.size}'
+            return Response(status=416, headers=headers)
+        start, stop = content_range.start, content_range.stop
+        headers['Content-Range'] = content_range.to_header()
+        headers['Content-Length'] = str(stop - start)
+        return Response(layout.iter_range(start, stop - 1, chunk_size), status=206,
+                        mimetype='application/x-tar', headers=headers)
+    
+    headers['Content-Length'] = str(layout.size)
+    return Response(layout.iter_range(0, None, chunk_size), mimetype='application/x-tar', headers=headers)
+
+
 if __name__ == '__main__':
     from config import Config
     app.run(
@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+"""
+SanitixPDF - Benchmarks
+Generates a reproducible synthetic PDF corpus and times the hot paths of the
+detector and the web app on it. Results are written as JSON and can be
+compared against a stored baseline to catch regressions before an upgrade.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import tempfile
+import statistics
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+import PyPDF2
+from PyPDF2 import PdfWriter
+from duplicate_pdf_detector import DuplicatePDFDetector
+from log_pipeline import configure_logging, shutdown_logging
+
+
+# Scenarios run by default, in order
+SCENARIOS = ('byte_hash', 'text_hash', 'structural_hash', 'near_hash', 'move', 'upload', 'stats')
+
+# Words the synthetic page text is drawn from
+VOCABULARY = (
+    'invoice', 'contract', 'report', 'summary', 'annual', 'quarter', 'revenue', 'balance',
+    'account', 'payment', 'customer', 'supplier', 'delivery', 'order', 'total', 'amount',
+    'date', 'reference', 'section', 'clause', 'party', 'agreement', 'term', 'notice',
+    'policy', 'review', 'approved', 'pending', 'draft', 'final', 'project', 'budget',
+    'schedule', 'meeting', 'minutes', 'action', 'owner', 'status', 'risk', 'issue',
+    'the', 'of', 'and', 'to', 'in', 'for', 'with', 'on', 'by', 'from', 'at', 'as'
+)
+
+WORDS_PER_LINE = 12
+LINES_PER_PAGE = 40
+
+
+def _page_text(rng: random.Random) -> List[str]:
+    """Return the lines of one page of random text."""
+    return [' '.join(rng.choice(VOCABULARY) for _ in range(WORDS_PER_LINE))
+            for _ in range(LINES_PER_PAGE)]
+
+
+def _write_objects(objects: List[bytes]) -> bytes:
+    """Serialize numbered PDF objects, the first being the catalog, with an xref table."""
+    output = io.BytesIO()
+    output.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+    xref = output.tell()
+    output.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b'%010d 00000 n \n' % offset)
+    output.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    return output.getvalue()
+
+
+def _stream(data: bytes) -> bytes:
+    """Return the body of a stream object holding data."""
+    return b'<< /Length %d >>\nstream\n' % len(data) + data + b'\nendstream'
+
+
+def build_pdf(pages: List[List[str]], padding: bytes = b'', title: str = None) -> bytes:
+    """
+    Write a PDF with one page of text lines per entry of pages.
+    
+    The page objects are written as PDF syntax, since PyPDF2 has no public
+    way to add a stream object, and then read and written again with
+    PdfReader and PdfWriter, which also store the title.
+    
+    Args:
+        pages: Lines of text of every page
+        padding: Bytes stored in a stream the page content does not use, to
+            reach a target file size without adding text to extract
+        title: Document title stored in the metadata
+    
+    Returns:
+        Bytes of the PDF
+    """
+    font = 3 + 2 * len(pages)
+    kids = b' '.join(b'%d 0 R' % (3 + 2 * number) for number in range(len(pages)))
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>',
+               b'<< /Type /Pages /Kids [' + kids + b'] /Count %d >>' % len(pages)]
+    for number, lines in enumerate(pages):
+        operators = [b'BT /F1 10 Tf 14 TL 56 750 Td']
+        for line in lines:
+            operators.append(b'(' + line.encode('latin-1') + b') Tj T*')
+        operators.append(b'ET')
+        extra = b' /SanitixPadding %d 0 R' % (font + 1) if padding and number == 0 else b''
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R '
+                       b'/Resources << /Font << /F1 %d 0 R >> >>%s >>' % (4 + 2 * number, font, extra))
+        objects.append(_stream(b'\n'.join(operators)))
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    if padding:
+        objects.append(_stream(padding))
+    
+    writer = PdfWriter()
+    writer.append_pages_from_reader(PyPDF2.PdfReader(io.BytesIO(_write_objects(objects))))
+    if title:
+        writer.add_metadata({'/Title': title})
+    
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def resave_pdf(data: bytes, producer: str, timestamp: str) -> bytes:
+    """
+    Write a PDF again page by page, as another tool saving a copy would.
+    
+    Args:
+        data: Bytes of the PDF
+        producer: New /Producer of the copy
+        timestamp: New /CreationDate and /ModDate of the copy, in PDF date format
+    
+    Returns:
+        Bytes of the copy, with the same pages but a different file layout
+        and volatile metadata
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    writer = PdfWriter()
+    writer.append_pages_from_reader(reader)
+    metadata = {key: value for key, value in (reader.metadata or {}).items()}
+    metadata.update({'/Producer': producer, '/CreationDate': timestamp, '/ModDate': timestamp})
+    writer.add_metadata(metadata)
+    
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def _padded_pdf(pages: List[List[str]], size: int, rng: random.Random, title: str) -> bytes:
+    """Build a PDF and pad it with incompressible bytes to roughly size bytes."""
+    data = build_pdf(pages, title=title)
+    missing = size - len(data)
+    if missing <= 64:
+        return data
+    padding = rng.getrandbits(8 * missing).to_bytes(missing, 'little')
+    return build_pdf(pages, padding, title)
+
+
+def generate_corpus(folder, count: int = 200, pages: Tuple[int, int] = (1, 5),
+                    size_kb: Tuple[int, int] = (20, 200), duplicate_ratio: float = 0.2,
+                    near_duplicate_ratio: float = 0.1, seed: int = 0,
+                    resaved_ratio: float = 0.0) -> Dict:
+    """
+    Write a synthetic corpus of PDFs.
+    
+    The same arguments always produce byte-identical files. Exact duplicates
+    are copies of a unique PDF under another name; near-duplicates have the
+    same pages with one word changed, so they differ in content and text
+    hash but group together in near mode; re-saved copies have the same
+    pages written out again with a new producer and dates, so only the
+    structural mode matches them. File names are shuffled so copies do not
+    sit next to their originals.
+    
+    Args:
+        folder: Folder the PDFs are written to (created if needed)
+        count: Total number of files
+        pages: Minimum and maximum page count of a unique PDF
+        size_kb: Minimum and maximum file size of a unique PDF in KB
+        duplicate_ratio: Fraction of the files that are exact duplicates
+        near_duplicate_ratio: Fraction of the files that are near-duplicates
+        seed: Seed of the random generator
+        resaved_ratio: Fraction of the files that are re-saved copies
+    
+    Returns:
+        Description of the corpus: its parameters and what was written
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    ratios = (duplicate_ratio, near_duplicate_ratio, resaved_ratio)
+    if min(ratios) < 0 or sum(ratios) >= 1:
+        raise ValueError("duplicate ratios must be non-negative and leave room for unique files")
+    
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    
+    duplicates = int(round(count * duplicate_ratio))
+    near_duplicates = int(round(count * near_duplicate_ratio))
+    resaved = int(round(count * resaved_ratio))
+    unique = max(1, count - duplicates - near_duplicates - resaved)
+    duplicates = count - unique - near_duplicates - resaved
+    
+    names = [f"document_{number:06d}.pdf" for number in range(count)]
+    rng.shuffle(names)
+    
+    originals = []
+    total_bytes = 0
+    for number in range(unique):
+        texts = [_page_text(rng) for _ in range(rng.randint(*pages))]
+        size = rng.randint(*size_kb) * 1024
+        data = _padded_pdf(texts, size, rng, f"Document {number}")
+        path = folder / names.pop()
+        path.write_bytes(data)
+        originals.append((path, texts, size))
+        total_bytes += len(data)
+    
+    for number in range(near_duplicates):
+        source, texts, size = rng.choice(originals)
+        texts = [list(lines) for lines in texts]
+        page = rng.randrange(len(texts))
+        line = rng.randrange(len(texts[page]))
+        words = texts[page][line].split(' ')
+        words[rng.randrange(len(words))] = 'revised'
+        texts[page][line] = ' '.join(words)
+        data = _padded_pdf(texts, size, rng, f"Revision {number}")
+        (folder / names.pop()).write_bytes(data)
+        total_bytes += len(data)
+    
+    for _ in range(duplicates):
+        source = rng.choice(originals)[0]
+        destination = folder / names.pop()
+        shutil.copyfile(source, destination)
+        total_bytes += destination.stat().st_size
+    
+    for number in range(resaved):
+        source = rng.choice(originals)[0]
+        data = resave_pdf(source.read_bytes(), f"Resaver {number % 3}", f"D:2024010{number % 9 + 1}120000")
+        (folder / names.pop()).write_bytes(data)
+        total_bytes += len(data)
+    
+    return {
+        'count': count,
+        'pages': list(pages),
+        'size_kb': list(size_kb),
+        'duplicate_ratio': duplicate_ratio,
+        'near_duplicate_ratio': near_duplicate_ratio,
+        'seed': seed,
+        'unique': unique,
+        'duplicates': duplicates,
+        'near_duplicates': near_duplicates,
+        'resaved': resaved,
+        'bytes': total_bytes
+    }
+
+
+def _copy_corpus(corpus: Path, folder: Path) -> Path:
+    """Replace folder with a fresh copy of the corpus."""
+    shutil.rmtree(folder, ignore_errors=True)
+    shutil.copytree(corpus, folder)
+    return folder
+
+
+def _rates(files: int, size: int, seconds: float) -> Dict:
+    """Return the throughput figures shared by all scenarios."""
+    return {
+        'seconds': round(seconds, 6),
+        'files': files,
+        'bytes': size,
+        'files_per_s': round(files / seconds, 2) if seconds > 0 else None,
+        'mb_per_s': round(size / (1024 * 1024) / seconds, 2) if seconds > 0 else None
+    }
+
+
+def _detector(workspace: Path, name: str, corpus: Path, mode: str, workers: int) -> DuplicatePDFDetector:
+    """Create a detector over a fresh copy of the corpus, without a hash index."""
+    return DuplicatePDFDetector(
+        source_folder=str(_copy_corpus(corpus, workspace / name / 'source')),
+        final_folder=str(workspace / name / 'final'),
+        log_folder=str(workspace / 'logs'),
+        workers=workers,
+        hash_mode=mode
+    )
+
+
+def _bench_find_duplicates(mode: str) -> Callable:
+    """Return a scenario timing find_duplicates in one hash mode."""
+    def scenario(workspace: Path, corpus: Path, workers: int) -> Dict:
+        detector = _detector(workspace, f"{mode}_hash", corpus, mode, workers)
+        started = time.perf_counter()
+        duplicates = detector.find_duplicates()
+        seconds = time.perf_counter() - started
+        result = _rates(len(detector.manifest), sum(entry.size for entry in detector.manifest), seconds)
+        result['groups'] = len(duplicates)
+        result['duplicates_found'] = detector.stats['duplicates_found']
+        return result
+    return scenario
+
+
+def bench_move(workspace: Path, corpus: Path, workers: int) -> Dict:
+    """Time removing duplicates and placing the unique PDFs in the final folder."""
+    detector = _detector(workspace, 'move', corpus, 'content', workers)
+    duplicates = detector.find_duplicates()
+    started = time.perf_counter()
+    detector.remove_duplicates_and_move_unique(duplicates)
+    seconds = time.perf_counter() - started
+    result = _rates(len(detector.manifest), sum(entry.size for entry in detector.manifest), seconds)
+    result['placement'] = dict(detector.placement_report)
+    return result
+
+
+@contextmanager
+def _environment(name: str, value: str):
+    """Set an environment variable for the duration of a block."""
+    previous = os.environ.get(name)
+    os.environ[name] = value
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ[name]
+        else:
+            os.environ[name] = previous
+
+
+def _load_app(workspace: Path):
+    """
+    Import the web app with its folders inside the benchmark workspace.
+    
+    The folders are passed in a settings file named by SANITIXPDF_SETTINGS,
+    so the shared Config classes are left as they are.
+    """
+    if 'app' in sys.modules:
+        return sys.modules['app']
+    folder = workspace / 'app'
+    settings = {
+        'UPLOAD_FOLDER': folder / 'source',
+        'FINAL_FOLDER': folder / 'final',
+        'LOGS_FOLDER': folder / 'logs',
+        'HASH_INDEX_PATH': folder / 'logs' / 'hash_index.db',
+        'JOBS_DB_PATH': folder / 'logs' / 'jobs.db'
+    }
+    for key in ('UPLOAD_FOLDER', 'FINAL_FOLDER', 'LOGS_FOLDER'):
+        settings[key].mkdir(parents=True, exist_ok=True)
+    settings_file = folder / 'settings.py'
+    settings_file.write_text(''.join(f"{key} = {str(value)!r}\n" for key, value in settings.items()))
+    with _environment('SANITIXPDF_SETTINGS', str(settings_file)):
+        import app
+    return app
+
+
+def _reset_app(app):
+    """Empty the app's upload and final folders."""
+    for key in ('UPLOAD_FOLDER', 'FINAL_FOLDER'):
+        folder = Path(app.app.config[key])
+        shutil.rmtree(folder, ignore_errors=True)
+        folder.mkdir(parents=True)
+    app.reset_workspace_digests()
+
+
+def bench_upload(workspace: Path, corpus: Path, workers: int) -> Dict:
+    """Time uploading every corpus file through /api/upload."""
+    app = _load_app(workspace)
+    _reset_app(app)
+    client = app.app.test_client()
+    files = sorted(corpus.iterdir())
+    payloads = [(path.name, path.read_bytes()) for path in files]
+    
+    accepted = 0
+    started = time.perf_counter()
+    for name, data in payloads:
+        response = client.post('/api/upload', data={'file': (io.BytesIO(data), name)},
+                               content_type='multipart/form-data')
+        if response.status_code != 200:
+            raise RuntimeError(f"Upload of {name} failed: {response.status_code}")
+        if response.get_json().get('duplicate_of') is None:
+            accepted += 1
+    seconds = time.perf_counter() - started
+    
+    result = _rates(len(payloads), sum(len(data) for _, data in payloads), seconds)
+    result['accepted'] = accepted
+    return result
+
+
+def bench_stats(workspace: Path, corpus: Path, workers: int, requests: int = 50) -> Dict:
+    """Time /api/stats on a folder holding the corpus, after a change and when cached."""
+    app = _load_app(workspace)
+    _reset_app(app)
+    for path in corpus.iterdir():
+        shutil.copyfile(path, Path(app.app.config['UPLOAD_FOLDER']) / path.name)
+    client = app.app.test_client()
+    
+    def request_ms(url: str) -> float:
+        started = time.perf_counter()
+        response = client.get(url)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} failed: {response.status_code}")
+        return elapsed
+    
+    app.invalidate_folder_summaries('source', 'final')
+    cold = request_ms('/api/stats')
+    warm = sorted(request_ms('/api/stats') for _ in range(requests))
+    
+    # Walk every page of the listing by size
+    pages = 0
+    cursor = None
+    started = time.perf_counter()
+    while True:
+        url = '/api/stats?folder=source&sort=size&limit=50'
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        pages += 1
+        cursor = response.get_json()['source'].get('next_cursor')
+        if not cursor:
+            break
+    walk = time.perf_counter() - started
+    
+    return {
+        'seconds': round(cold / 1000 + sum(warm) / 1000 + walk, 6),
+        'files': len(list(corpus.iterdir())),
+        'cold_ms': round(cold, 3),
+        'warm_p50_ms': round(statistics.median(warm), 3),
+        'warm_p95_ms': round(warm[int(len(warm) * 0.95) - 1], 3),
+        'pages': pages,
+        'page_walk_ms': round(walk * 1000, 3)
+    }
+
+
+SCENARIO_FUNCTIONS = {
+    'byte_hash': _bench_find_duplicates('content'),
+    'text_hash': _bench_find_duplicates('text'),
+    'structural_hash': _bench_find_duplicates('structural'),
+    'near_hash': _bench_find_duplicates('near'),
+    'move': bench_move,
+    'upload': bench_upload,
+    'stats': bench_stats
+}
+
+
+def run_benchmarks(corpus, workspace, scenarios=SCENARIOS, workers: int = 1,
+                   repeat: int = 3) -> Dict:
+    """
+    Run benchmark scenarios over a corpus.
+    
+    Each scenario runs repeat times on a fresh copy of the corpus; the
+    fastest run is reported, which is the least disturbed by other activity
+    on the machine.
+    
+    Args:
+        corpus: Folder holding the corpus
+        workspace: Scratch folder scenarios copy the corpus into
+        scenarios: Names of the scenarios to run, from SCENARIOS
+        workers: Number of hashing workers of the detector
+        repeat: Number of runs per scenario
+    
+    Returns:
+        Results of every scenario, keyed on its name
+    """
+    corpus = Path(corpus)
+    workspace = Path(workspace)
+    results = {}
+    for name in scenarios:
+        if name not in SCENARIO_FUNCTIONS:
+            raise ValueError(f"Unknown scenario: {name}")
+        runs = [SCENARIO_FUNCTIONS[name](workspace, corpus, workers) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run['seconds'])
+        best['runs'] = [run['seconds'] for run in runs]
+        results[name] = best
+    return results
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float = 0.1) -> Dict:
+    """
+    Compare the scenario timings of two benchmark reports.
+    
+    Args:
+        results: Scenario results of the current run
+        baseline: Scenario results of the baseline run
+        tolerance: Fraction a scenario may be slower than the baseline
+    
+    Returns:
+        Per-scenario baseline seconds, current seconds, relative change and
+        whether the change is a regression
+    """
+    comparison = {}
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get('seconds'):
+            continue
+        change = result['seconds'] / previous['seconds'] - 1
+        comparison[name] = {
+            'baseline_seconds': previous['seconds'],
+            'seconds': result['seconds'],
+            'change': round(change, 4),
+            'regression': change > tolerance
+        }
+    return comparison
+
+
+def _parse_range(value: str) -> Tuple[int, int]:
+    """Parse 'N' or 'MIN-MAX' into a (min, max) tuple."""
+    low, _, high = value.partition('-')
+    low, high = int(low), int(high or low)
+    if low < 1 or high < low:
+        raise ValueError(value)
+    return low, high
+
+
+def main():
+    """Main entry point."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Benchmark SanitixPDF on a synthetic PDF corpus"
+    )
+    parser.add_argument('--count', type=int, default=200,
+                        help='Number of PDFs in the corpus (default: 200)')
+    parser.add_argument('--pages', type=_parse_range, default=(1, 5),
+                        help='Page count of unique PDFs, N or MIN-MAX (default: 1-5)')
+    parser.add_argument('--size-kb', type=_parse_range, default=(20, 200),
+                        help='Size of unique PDFs in KB, N or MIN-MAX (default: 20-200)')
+    parser.add_argument('--duplicates', type=float, default=0.2,
+                        help='Fraction of exact duplicates (default: 0.2)')
+    parser.add_argument('--near-duplicates', type=float, default=0.1,
+                        help='Fraction of near-duplicates (default: 0.1)')
+    parser.add_argument('--resaved', type=float, default=0.0,
+                        help='Fraction of copies saved again with new metadata (default: 0.0)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed of the corpus (default: 0)')
+    parser.add_argument('--scenarios', type=str, default=','.join(SCENARIOS),
+                        help=f"Comma-separated scenarios to run (default: {','.join(SCENARIOS)})")
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of hashing workers (default: 1)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per scenario; the fastest is reported (default: 3)')
+    parser.add_argument('--workdir', type=str, default=None,
+                        help='Folder for the corpus and scratch copies (default: a temporary folder)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the JSON results to this file instead of standard output')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Fraction a scenario may be slower than the baseline (default: 0.1)')
+    parser.add_argument('--generate-only', action='store_true',
+                        help='Only write the corpus to <workdir>/corpus')
+    
+    args = parser.parse_args()
+    
+    scenarios = [name for name in args.scenarios.split(',') if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.generate_only and not args.workdir:
+        parser.error("--generate-only requires --workdir")
+    
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix='sanitixpdf-bench-'))
+    corpus_folder = workdir / 'corpus'
+    shutil.rmtree(corpus_folder, ignore_errors=True)
+    corpus = generate_corpus(corpus_folder, args.count, args.pages, args.size_kb,
+                             args.duplicates, args.near_duplicates, args.seed, args.resaved)
+    if args.generate_only:
+        print(json.dumps(corpus, indent=2))
+        return
+    
+    # The console is kept for the report; warnings still reach the log file
+    configure_logging(workdir / 'logs', 'WARNING', console=False)
+    try:
+        results = run_benchmarks(corpus_folder, workdir / 'work', scenarios, args.workers, args.repeat)
+    finally:
+        shutdown_logging()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'pypdf2': PyPDF2.__version__
+        },
+        'settings': {'workers': args.workers, 'repeat': args.repeat},
+        'corpus': corpus,
+        'scenarios': results
+    }
+    
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['comparison'] = compare_to_baseline(results, baseline.get('scenarios', {}), args.tolerance)
+        regressions = [name for name, entry in report['comparison'].items() if entry['regression']]
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    
+    if regressions:
+        print(f"Slower than baseline: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
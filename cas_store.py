@@ -0,0 +1,251 @@
+"""
+SanitixPDF - Content-addressable storage
+Optional layout of the final folder in which every distinct PDF is stored
+once, as a blob named by its digest in sharded subfolders of .cas/objects.
+A SQLite catalog maps human-readable names to digests, so "is this content
+stored already?" is a single lookup, and counts the names of every blob so
+a blob is deleted with its last name. Names exist only in the catalog: the
+final folder itself stays empty however many files are stored, and
+listings, downloads and exports resolve names through the catalog.
+"""
+
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import List, Optional, Tuple
+from digests import new_hasher, tag_digest
+from naming import NameAllocator
+from placement import place_file
+from scanner import ManifestEntry
+
+
+# Ways the final folder can be laid out
+STORAGE_MODES = ('flat', 'cas')
+
+# Folder inside the final folder holding the blobs and the catalog
+CAS_FOLDER = '.cas'
+
+
+def hash_blob(path: Path, algorithm: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the tagged content digest of a file."""
+    hasher = new_hasher(algorithm)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return tag_digest(algorithm, hasher.hexdigest())
+
+
+class CasStore:
+    """
+    Thread-safe content-addressable store rooted in the final folder.
+    
+    Blobs live at .cas/objects/<algorithm>/<ab>/<cd>/<hex digest>, two
+    levels of 256 shards, so no directory grows beyond a few thousand
+    entries even with millions of blobs. The catalog's blobs table counts
+    the names referring to each blob.
+    """
+    
+    def __init__(self, root, algorithm: str = 'sha256', chunk_size: int = 1024 * 1024):
+        """
+        Open (or create) the store.
+        
+        Args:
+            root: Final folder; the catalog and blobs go below .cas
+            algorithm: Digest algorithm used for files stored without a digest
+            chunk_size: Read buffer size in bytes for hashing
+        """
+        self.root = Path(root)
+        self.algorithm = algorithm
+        self.chunk_size = chunk_size
+        self.folder = self.root / CAS_FOLDER
+        self.objects = self.folder / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.names = NameAllocator(self.root, self._catalog_names)
+        self._lock = threading.Lock()
+        
+        self.connection = sqlite3.connect(str(self.folder / 'catalog.db'), check_same_thread=False)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                refs INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS names (
+                name TEXT PRIMARY KEY,
+                digest TEXT NOT NULL REFERENCES blobs (digest),
+                added_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS names_digest ON names (digest);
+            """
+        )
+        self.connection.commit()
+    
+    def object_path(self, digest: str) -> Path:
+        """Return where the blob of a tagged digest is stored."""
+        algorithm, _, hexdigest = digest.partition(':')
+        return self.objects / algorithm / hexdigest[:2] / hexdigest[2:4] / hexdigest
+    
+    def lookup(self, digest: str) -> Optional[str]:
+        """
+        Find stored content.
+        
+        Args:
+            digest: Tagged content digest
+        
+        Returns:
+            The first name the content was stored under, or None
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT name FROM names WHERE digest = ? ORDER BY added_at, name LIMIT 1", (digest,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def resolve(self, name: str) -> Optional[Path]:
+        """
+        Find the blob a name refers to.
+        
+        Args:
+            name: Name in the catalog
+        
+        Returns:
+            Path of the blob, or None if the name is unknown or its blob is gone
+        """
+        with self._lock:
+            row = self.connection.execute("SELECT digest FROM names WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        blob = self.object_path(row[0])
+        return blob if blob.exists() else None
+    
+    def entries(self) -> List[Tuple[str, str]]:
+        """Return (name, digest) of every name in the catalog, sorted by name."""
+        with self._lock:
+            return self.connection.execute("SELECT name, digest FROM names ORDER BY name").fetchall()
+    
+    def manifest(self) -> List[ManifestEntry]:
+        """
+        List the stored names the way a scan lists a folder.
+        
+        Entries point at the blobs and carry their catalog name as alias, so
+        listings and exports show names while reading the stored content.
+        Names whose blob is missing are left out.
+        
+        Returns:
+            Manifest entries sorted by name
+        """
+        manifest = []
+        for name, digest in self.entries():
+            blob = self.object_path(digest)
+            try:
+                stat = blob.stat()
+            except OSError:
+                continue
+            manifest.append(ManifestEntry(blob, stat.st_size, stat.st_mtime_ns, stat.st_ino, name))
+        return manifest
+    
+    def _catalog_names(self) -> List[str]:
+        """Return every name in the catalog. Caller holds the lock."""
+        return [name for (name,) in self.connection.execute("SELECT name FROM names")]
+    
+    def put(self, source: Path, name: str, digest: str = None,
+            placement: str = 'rename') -> Tuple[str, Optional[str]]:
+        """
+        Store a file under a name, removing the source.
+        
+        Content that is stored already is neither written nor named again:
+        the source is deleted as a duplicate of the stored copy.
+        
+        Args:
+            source: File to store
+            name: Preferred name; a conflicting name gets a counter suffix
+            digest: Tagged content digest of the file, hashed if omitted
+            placement: Strategy for moving new content into the store, one
+                of PLACEMENT_MODES
+        
+        Returns:
+            Tuple of (name the content is stored under, placement strategy
+            used, or None if the source was a duplicate of stored content)
+        """
+        source = Path(source)
+        if digest is None:
+            digest = hash_blob(source, self.algorithm, self.chunk_size)
+        blob = self.object_path(digest)
+        
+        with self._lock:
+            stored = self.connection.execute(
+                "SELECT name FROM names WHERE digest = ? ORDER BY added_at, name LIMIT 1", (digest,)
+            ).fetchone()
+            if stored and blob.exists():
+                source.unlink()
+                return stored[0], None
+            
+            # A blob without names was left by an interrupted put
+            blob.unlink(missing_ok=True)
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            strategy = place_file(source, blob, placement)
+            name = self.names.allocate(name).name
+            with self.connection:
+                updated = self.connection.execute(
+                    "UPDATE blobs SET size = ?, refs = refs + 1 WHERE digest = ?",
+                    (blob.stat().st_size, digest)
+                ).rowcount
+                if not updated:
+                    self.connection.execute(
+                        "INSERT INTO blobs (digest, size, refs) VALUES (?, ?, 1)",
+                        (digest, blob.stat().st_size)
+                    )
+                self.connection.execute(
+                    "INSERT INTO names (name, digest, added_at) VALUES (?, ?, ?)",
+                    (name, digest, datetime.now().isoformat())
+                )
+        return name, strategy
+    
+    def remove(self, name: str) -> bool:
+        """
+        Remove a name, and the blob with it if no other name refers to it.
+        
+        Args:
+            name: Name in the catalog
+        
+        Returns:
+            True if the name was in the catalog
+        """
+        with self._lock:
+            row = self.connection.execute("SELECT digest FROM names WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return False
+            digest = row[0]
+            with self.connection:
+                self.connection.execute("DELETE FROM names WHERE name = ?", (name,))
+                self.connection.execute("UPDATE blobs SET refs = refs - 1 WHERE digest = ?", (digest,))
+                refs = self.connection.execute(
+                    "SELECT refs FROM blobs WHERE digest = ?", (digest,)
+                ).fetchone()
+                orphaned = refs is None or refs[0] <= 0
+                if orphaned:
+                    self.connection.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            if orphaned:
+                self.object_path(digest).unlink(missing_ok=True)
+            self.names.release(name)
+        return True
+    
+    def clear(self):
+        """Remove every name and blob."""
+        with self._lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM names")
+                self.connection.execute("DELETE FROM blobs")
+            shutil.rmtree(self.objects, ignore_errors=True)
+            self.objects.mkdir(parents=True, exist_ok=True)
+            self.names = NameAllocator(self.root, self._catalog_names)
+    
+    def close(self):
+        """Close the catalog."""
+        self.connection.close()
@@ -22,6 +22,58 @@ class Config:
     LOGS_FOLDER = str(LOGS_FOLDER)
     ALLOWED_EXTENSIONS = {'pdf', 'PDF'}
     
+    # Resumable upload sessions
+    UPLOAD_STAGING_FOLDER = os.environ.get('UPLOAD_STAGING_FOLDER')  # default: <UPLOAD_FOLDER>/.staging
+    UPLOAD_SESSION_TTL = float(os.environ.get('UPLOAD_SESSION_TTL') or 24 * 3600)  # seconds
+    UPLOAD_SESSION_MAX_FILES = int(os.environ.get('UPLOAD_SESSION_MAX_FILES') or 10000)
+    UPLOAD_MAX_FILE_SIZE = int(os.environ.get('UPLOAD_MAX_FILE_SIZE') or 4 * 1024 * 1024 * 1024)  # 4GB
+    
+    # Hashing configuration
+    HASH_CHUNK_SIZE = int(os.environ.get('HASH_CHUNK_SIZE') or 1024 * 1024)  # 1MB
+    HASH_USE_MMAP = os.environ.get('HASH_USE_MMAP', 'False').lower() == 'true'
+    HASH_WORKERS = int(os.environ.get('HASH_WORKERS') or 1)
+    HASH_MODE = os.environ.get('HASH_MODE') or 'content'  # 'content', 'text', 'structural' or 'near'
+    SIMILARITY_THRESHOLD = float(os.environ.get('SIMILARITY_THRESHOLD') or 0.9)
+    VERIFY_DUPLICATES = os.environ.get('VERIFY_DUPLICATES', 'False').lower() == 'true'
+    
+    # Source folder scanning
+    SCAN_RECURSIVE = os.environ.get('SCAN_RECURSIVE', 'False').lower() == 'true'
+    SCAN_INCLUDE = [p for p in (os.environ.get('SCAN_INCLUDE') or '*.pdf').split(',') if p]
+    SCAN_EXCLUDE = [p for p in (os.environ.get('SCAN_EXCLUDE') or '').split(',') if p]
+    SCAN_SYMLINKS = os.environ.get('SCAN_SYMLINKS') or 'files'  # 'follow', 'files' or 'skip'
+    HASH_ALGORITHM = os.environ.get('HASH_ALGORITHM') or 'sha256'  # 'sha256' or 'blake2b'
+    PREFILTER_ALGORITHM = os.environ.get('PREFILTER_ALGORITHM') or 'fast64'
+    HASH_INDEX_PATH = os.environ.get('HASH_INDEX_PATH') or os.path.join(LOGS_FOLDER, 'hash_index.db')
+    # Bounds only the grouping records. The scan manifest and the per-stage path
+    # lists stay in memory, about 0.6-1 KB per file with 90-character paths,
+    # so an 8 GB worker handles roughly 6 million files per run, not 20 million
+    GROUPING_MEMORY_BUDGET = int(os.environ.get('GROUPING_MEMORY_BUDGET') or 256 * 1024 * 1024)  # 256MB
+    GROUPING_SPILL_FOLDER = os.environ.get('GROUPING_SPILL_FOLDER')  # default: system temp folder
+    FINAL_STORAGE = os.environ.get('FINAL_STORAGE') or 'flat'  # 'flat' or 'cas'
+    
+    # Processing job queue. Every job works on the same upload and final folders
+    # and holds the app's processing lock, so extra workers only wait for it
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 1)
+    JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE') or 100)
+    JOBS_DB_PATH = os.environ.get('JOBS_DB_PATH') or os.path.join(LOGS_FOLDER, 'jobs.db')
+    SSE_INTERVAL = float(os.environ.get('SSE_INTERVAL') or 0.5)  # seconds between progress events
+    SSE_KEEPALIVE = float(os.environ.get('SSE_KEEPALIVE') or 15)
+    
+    # Folder listings of /api/stats
+    STATS_PAGE_SIZE = int(os.environ.get('STATS_PAGE_SIZE') or 200)
+    STATS_MAX_PAGE_SIZE = int(os.environ.get('STATS_MAX_PAGE_SIZE') or 1000)
+    STATS_MAX_AGE = float(os.environ.get('STATS_MAX_AGE') or 60)  # seconds before a forced rescan
+    
+    # How unique PDFs reach the final folder: 'rename', 'hardlink', 'reflink' or 'copy'
+    PLACEMENT_MODE = os.environ.get('PLACEMENT_MODE') or 'rename'
+    
+    # Reject uploads whose content is already in the source or final folder
+    DEDUPE_ON_UPLOAD = os.environ.get('DEDUPE_ON_UPLOAD', 'True').lower() == 'true'
+    
+    # Logging: 'DEBUG' adds one line per file; 'json' writes JSON lines
+    LOG_LEVEL = (os.environ.get('LOG_LEVEL') or 'INFO').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT') or 'text'
+    
     # Server configuration
     HOST = os.environ.get('HOST') or '0.0.0.0'
     PORT = int(os.environ.get('PORT') or 5000)
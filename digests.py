@@ -0,0 +1,126 @@
+"""
+SanitixPDF - Digest engines
+Selectable hash algorithms for file and text digests, plus throughput
+accounting so each engine's speed can be reported after a run.
+"""
+
+import zlib
+import hashlib
+import threading
+from typing import Dict
+
+
+# Algorithms a digest can be computed with
+DIGEST_ALGORITHMS = ('sha256', 'blake2b', 'fast64')
+
+
+class Fast64:
+    """
+    Non-cryptographic 64-bit checksum built from CRC-32 and Adler-32.
+    
+    Both halves run at memory speed in zlib, which makes this suitable
+    for bucketing candidates that a strong digest then confirms. It must
+    never be the only evidence that two files are identical.
+    """
+    
+    def __init__(self, data: bytes = b''):
+        """
+        Initialize the checksum.
+        
+        Args:
+            data: Optional first block of data
+        """
+        self._crc = 0
+        self._adler = 1
+        if data:
+            self.update(data)
+    
+    def update(self, data: bytes):
+        """Feed a block of data into the checksum."""
+        self._crc = zlib.crc32(data, self._crc)
+        self._adler = zlib.adler32(data, self._adler)
+    
+    def hexdigest(self) -> str:
+        """Return the checksum as 16 hex characters."""
+        return f"{self._crc:08x}{self._adler:08x}"
+
+
+def new_hasher(algorithm: str, data: bytes = b''):
+    """
+    Create an incremental hasher for a digest algorithm.
+    
+    Args:
+        algorithm: One of DIGEST_ALGORITHMS
+        data: Optional first block of data
+    
+    Returns:
+        Object with update() and hexdigest() methods
+    """
+    if algorithm == 'sha256':
+        return hashlib.sha256(data)
+    if algorithm == 'blake2b':
+        return hashlib.blake2b(data)
+    if algorithm == 'fast64':
+        return Fast64(data)
+    raise ValueError(f"Unknown digest algorithm: {algorithm}")
+
+
+def tag_digest(algorithm: str, hexdigest: str) -> str:
+    """Prefix a hex digest with the name of the algorithm that produced it."""
+    return f"{algorithm}:{hexdigest}"
+
+
+def digest_size(algorithm: str) -> int:
+    """Return the length in bytes of a raw digest made with an algorithm."""
+    return len(new_hasher(algorithm).hexdigest()) // 2
+
+
+def digest_bytes(digest: str) -> bytes:
+    """Return the raw bytes of a tagged or untagged hex digest."""
+    return bytes.fromhex(digest.rpartition(':')[2])
+
+
+def digest_algorithm(digest: str) -> str:
+    """Return the algorithm name of a tagged digest, or None if untagged."""
+    algorithm, separator, _ = digest.partition(':')
+    return algorithm if separator else None
+
+
+class ThroughputMeter:
+    """Thread-safe tally of bytes hashed and time spent per digest engine."""
+    
+    def __init__(self):
+        """Initialize an empty tally."""
+        self._lock = threading.Lock()
+        self._totals = {}
+    
+    def record(self, engine: str, byte_count: int, seconds: float):
+        """
+        Add a measurement for an engine.
+        
+        Args:
+            engine: Name of the digest engine or hash stage
+            byte_count: Bytes processed
+            seconds: Wall-clock time spent
+        """
+        with self._lock:
+            total_bytes, total_seconds = self._totals.get(engine, (0, 0.0))
+            self._totals[engine] = (total_bytes + byte_count, total_seconds + seconds)
+    
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return the totals and speed of every engine.
+        
+        Returns:
+            Dictionary mapping engine name to bytes, seconds and mb_per_s
+        """
+        with self._lock:
+            totals = dict(self._totals)
+        return {
+            engine: {
+                'bytes': byte_count,
+                'seconds': round(seconds, 3),
+                'mb_per_s': round(byte_count / (1024 * 1024) / seconds, 1) if seconds > 0 else 0.0
+            }
+            for engine, (byte_count, seconds) in sorted(totals.items())
+        }
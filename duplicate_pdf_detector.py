@@ -5,20 +5,474 @@ This module identifies duplicate PDFs based on content and keeps only unique cop
 """
 
 import os
+import sys
+import json
+import mmap
+import time
+import signal
+import struct
 import hashlib
-import shutil
 import logging
+import threading
 from pathlib import Path
-from typing import Dict, List, Tuple
-from datetime import datetime
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import PyPDF2
 from collections import defaultdict
+from hash_index import HashIndex
+from scanner import ManifestEntry, SYMLINK_POLICIES, is_selected, scan_pdfs
+from near_duplicates import shingle_hashes, minhash_signature, group_near_duplicates
+from digests import (DIGEST_ALGORITHMS, ThroughputMeter, digest_bytes, digest_size,
+                     new_hasher, tag_digest)
+from placement import PLACEMENT_MODES, place_file
+from cas_store import STORAGE_MODES, CasStore
+from naming import NameAllocator
+from grouping import DEFAULT_MEMORY_BUDGET, MAX_FILE_IDS, RecordGrouper
+from plans import Checkpoint, PlanWriter, read_plan
+from watcher import InotifyWatcher, create_watcher
+from log_pipeline import LOG_FORMATS, LOG_LEVELS, configure_logging, worker_logging
+from metrics import (REGISTRY, ERRORS, HASH_SECONDS_PER_MB, PARSE_SECONDS_PER_PAGE,
+                     PLACEMENT_SECONDS, WATCH_SECONDS)
+
+
+# Default read buffer for streaming content hashes
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Supported ways of deciding that two PDFs are duplicates
+HASH_MODES = ('content', 'text', 'structural', 'near')
+
+# Document information entries rewritten whenever a PDF is saved again
+VOLATILE_INFO_KEYS = ('/CreationDate', '/ModDate', '/Producer')
+
+# Grouping key of the size stage
+_SIZE_KEY = struct.Struct('>Q')
+
+logger = logging.getLogger(__name__)
+
+# Parse timings gathered while a hash job runs in a worker thread or process
+_job_timings = threading.local()
+
+
+def _observe_parse(seconds: float, pages: int):
+    """
+    Record how long parsing a PDF took.
+    
+    Inside a hash job the timing is handed back with the job's result, so
+    timings made in worker processes reach the parent's metrics.
+    """
+    if not pages:
+        return
+    timings = getattr(_job_timings, 'parse', None)
+    if timings is not None:
+        timings.append((seconds, pages))
+    else:
+        PARSE_SECONDS_PER_PAGE.observe(seconds / pages)
+
+
+def hash_file(pdf_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE, use_mmap: bool = False,
+              algorithm: str = 'sha256') -> str:
+    """
+    Compute the digest of a file without loading it into memory.
+    
+    Args:
+        pdf_path: Path to the file
+        chunk_size: Number of bytes hashed per step
+        use_mmap: Hash from a memory map instead of a read buffer
+        algorithm: Digest algorithm, one of DIGEST_ALGORITHMS
+        
+    Returns:
+        Digest of the file content, tagged with the algorithm name
+    """
+    hasher = new_hasher(algorithm)
+    with open(pdf_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        
+        # Empty files cannot be mapped
+        if use_mmap and size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, chunk_size):
+                        hasher.update(view[offset:offset + chunk_size])
+                finally:
+                    view.release()
+            return tag_digest(algorithm, hasher.hexdigest())
+        
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while True:
+            count = file.readinto(buffer)
+            if not count:
+                break
+            hasher.update(view[:count])
+    return tag_digest(algorithm, hasher.hexdigest())
+
+
+def hash_file_sample(pdf_path: Path, size: int, sample_size: int, algorithm: str = 'sha256') -> str:
+    """
+    Compute the digest of the head and tail of a file.
+    
+    Files no larger than two samples are read whole, so for them the
+    sample hash equals the full content hash of the same algorithm.
+    
+    Args:
+        pdf_path: Path to the file
+        size: Size of the file in bytes
+        sample_size: Bytes read from each end of the file
+        algorithm: Digest algorithm, one of DIGEST_ALGORITHMS
+        
+    Returns:
+        Digest of the sampled bytes, tagged with the algorithm name
+    """
+    with open(pdf_path, 'rb') as file:
+        if size <= 2 * sample_size:
+            return tag_digest(algorithm, new_hasher(algorithm, file.read()).hexdigest())
+        hasher = new_hasher(algorithm, file.read(sample_size))
+        file.seek(-sample_size, os.SEEK_END)
+        hasher.update(file.read(sample_size))
+        return tag_digest(algorithm, hasher.hexdigest())
+
+
+def iter_page_texts(pdf_reader: PyPDF2.PdfReader, pdf_path: Path) -> Iterator[str]:
+    """
+    Yield the extracted text of each page, one page at a time.
+    
+    Pages whose text cannot be extracted are logged and yield an empty string.
+    
+    Args:
+        pdf_reader: Open reader for the PDF
+        pdf_path: Path to the PDF file, used in log messages
+        
+    Yields:
+        Text of each page in document order
+    """
+    for page in pdf_reader.pages:
+        try:
+            yield page.extract_text()
+        except Exception as e:
+            logger.warning(f"Error extracting text from page in {pdf_path}: {str(e)}")
+            yield ""
+
+
+def _metadata_text(pdf_reader: PyPDF2.PdfReader) -> str:
+    """Return the document information as hashed in text mode, or '' if there is none."""
+    try:
+        return str(pdf_reader.metadata) if pdf_reader.metadata else ""
+    except Exception:
+        return ""
+
+
+def text_digest_file(pdf_path: Path, algorithm: str = 'sha256') -> Tuple[str, str]:
+    """
+    Hash the extracted text and metadata of a PDF in a single parse.
+    
+    Each page's text is fed straight into the document hasher, so the full
+    text is never held in memory. A digest of every page is recorded as
+    well so later comparisons do not need to parse the file again.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        algorithm: Digest algorithm, one of DIGEST_ALGORITHMS
+        
+    Returns:
+        Tuple of (digest of the text and metadata, comma-separated digests
+        of each page's text), both tagged with the algorithm name
+    """
+    hasher = new_hasher(algorithm)
+    page_hashes = []
+    started = time.perf_counter()
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for text in iter_page_texts(pdf_reader, pdf_path):
+            encoded = text.encode('utf-8')
+            hasher.update(encoded)
+            page_hashes.append(new_hasher(algorithm, encoded).hexdigest())
+        
+        # Also include metadata for more accurate comparison
+        hasher.update(_metadata_text(pdf_reader).encode('utf-8'))
+    _observe_parse(time.perf_counter() - started, len(page_hashes))
+    
+    return tag_digest(algorithm, hasher.hexdigest()), tag_digest(algorithm, ",".join(page_hashes))
+
+
+def text_hash_file(pdf_path: Path, algorithm: str = 'sha256') -> str:
+    """
+    Compute the digest of the extracted text and metadata of a PDF.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        algorithm: Digest algorithm, one of DIGEST_ALGORITHMS
+        
+    Returns:
+        Digest of extracted text, tagged with the algorithm name
+    """
+    return text_digest_file(pdf_path, algorithm)[0]
+
+
+def texts_identical(pdf1_path: Path, pdf2_path: Path) -> bool:
+    """
+    Compare the extracted text and metadata of two PDFs page by page.
+    
+    Both files are parsed again and their texts compared as strings, not
+    by digest, so the result does not depend on the digests that grouped
+    them or on any cached in the hash index. The comparison stops at the
+    first page that differs.
+    
+    Args:
+        pdf1_path: Path to first PDF
+        pdf2_path: Path to second PDF
+        
+    Returns:
+        True if both have the same number of pages, page texts and metadata
+    """
+    with open(pdf1_path, 'rb') as f1, open(pdf2_path, 'rb') as f2:
+        reader1 = PyPDF2.PdfReader(f1)
+        reader2 = PyPDF2.PdfReader(f2)
+        if len(reader1.pages) != len(reader2.pages):
+            return False
+        for text1, text2 in zip(iter_page_texts(reader1, pdf1_path), iter_page_texts(reader2, pdf2_path)):
+            if text1 != text2:
+                return False
+        return _metadata_text(reader1) == _metadata_text(reader2)
+
+
+def _stream_data(stream) -> bytes:
+    """Return the decoded data of a stream, or its raw data if PyPDF2 cannot decode it."""
+    try:
+        return stream.get_data()
+    except Exception:
+        return stream._data
+
+
+def _content_data(stream) -> bytes:
+    """
+    Return the decoded operators of a content stream with every run of
+    whitespace collapsed to one space, since tools that save a copy lay
+    the same operators out differently.
+    """
+    return b' '.join(_stream_data(stream).split())
+
+
+def _hash_xobjects(resources, hasher, seen: set):
+    """Feed the image data and form content of the XObjects in a resource dictionary into a hasher."""
+    if not resources:
+        return
+    xobjects = resources.get_object().get('/XObject')
+    if not xobjects:
+        return
+    xobjects = xobjects.get_object()
+    for name in sorted(xobjects):
+        # Forms may use themselves; each object is hashed once per page
+        idnum = getattr(xobjects.raw_get(name), 'idnum', None)
+        if idnum is not None:
+            if idnum in seen:
+                continue
+            seen.add(idnum)
+        xobject = xobjects[name].get_object()
+        subtype = xobject.get('/Subtype')
+        if subtype == '/Image':
+            hasher.update(b'image')
+            hasher.update(_stream_data(xobject))
+        elif subtype == '/Form':
+            hasher.update(b'form')
+            hasher.update(_content_data(xobject))
+            _hash_xobjects(xobject.get('/Resources'), hasher, seen)
+
+
+def page_structure_digest(page: PyPDF2.PageObject, algorithm: str = 'sha256') -> str:
+    """
+    Digest what one page draws: its geometry, decoded content streams and XObjects.
+    
+    Args:
+        page: Page of a PdfReader
+        algorithm: Digest algorithm, one of DIGEST_ALGORITHMS
+    
+    Returns:
+        Hex digest of the page
+    """
+    hasher = new_hasher(algorithm)
+    hasher.update(repr([float(value) for value in page.mediabox]).encode('ascii'))
+    hasher.update(str(page.get('/Rotate', 0)).encode('ascii'))
+    contents = page.get('/Contents')
+    if contents is not None:
+        contents = contents.get_object()
+        for stream in (contents if isinstance(contents, list) else [contents]):
+            hasher.update(_content_data(stream.get_object()))
+    _hash_xobjects(page.get('/Resources'), hasher, set())
+    return hasher.hexdigest()
+
+
+def structural_hash_file(pdf_path: Path, algorithm: str = 'sha256') -> str:
+    """
+    Compute the digest of the page structure of a PDF, without extracting text.
+    
+    Every page's decoded content streams and the data of the image and form
+    XObjects they use are hashed, along with the document information
+    except VOLATILE_INFO_KEYS. The trailer /ID and the file layout are never
+    looked at, so a copy saved again by another tool gets the same digest,
+    and scanned PDFs without text are still told apart by their images.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        algorithm: Digest algorithm, one of DIGEST_ALGORITHMS
+        
+    Returns:
+        Digest of the page structure, tagged with the algorithm name
+    """
+    hasher = new_hasher(algorithm)
+    started = time.perf_counter()
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        pages = len(pdf_reader.pages)
+        hasher.update(str(pages).encode('ascii'))
+        for page in pdf_reader.pages:
+            hasher.update(page_structure_digest(page, algorithm).encode('ascii'))
+        
+        try:
+            info = pdf_reader.metadata
+        except Exception:
+            info = None
+        for key in sorted(info or ()):
+            if key not in VOLATILE_INFO_KEYS:
+                hasher.update(f"{key}={info[key]}".encode('utf-8'))
+    _observe_parse(time.perf_counter() - started, pages)
+    
+    return tag_digest(algorithm, hasher.hexdigest())
+
+
+def structures_identical(pdf1_path: Path, pdf2_path: Path, algorithm: str = 'sha256') -> bool:
+    """
+    Compare two PDFs page by page by structural digest.
+    
+    Args:
+        pdf1_path: Path to first PDF
+        pdf2_path: Path to second PDF
+        algorithm: Digest algorithm, one of DIGEST_ALGORITHMS
+        
+    Returns:
+        True if both have the same number of pages and every page draws the same
+    """
+    with open(pdf1_path, 'rb') as f1, open(pdf2_path, 'rb') as f2:
+        pages1 = PyPDF2.PdfReader(f1).pages
+        pages2 = PyPDF2.PdfReader(f2).pages
+        if len(pages1) != len(pages2):
+            return False
+        return all(page_structure_digest(page1, algorithm) == page_structure_digest(page2, algorithm)
+                   for page1, page2 in zip(pages1, pages2))
+
+
+def text_signature_file(pdf_path: Path, num_perm: int, shingle_size: int) -> Tuple[int, ...]:
+    """
+    Compute the MinHash signature of the word shingles of a PDF's text.
+    
+    Metadata is left out so re-exported copies still match.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        num_perm: Signature length
+        shingle_size: Number of consecutive words per shingle
+        
+    Returns:
+        MinHash signature, or an empty tuple if the PDF has no text
+    """
+    started = time.perf_counter()
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        text = " ".join(iter_page_texts(pdf_reader, pdf_path))
+        _observe_parse(time.perf_counter() - started, len(pdf_reader.pages))
+    
+    hashes = shingle_hashes(text, shingle_size)
+    if not hashes:
+        return ()
+    return minhash_signature(hashes, num_perm)
+
+
+def files_identical(pdf1_path: Path, pdf2_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> bool:
+    """
+    Byte-compare two files through memory maps, stopping at the first difference.
+    
+    Args:
+        pdf1_path: Path to first file
+        pdf2_path: Path to second file
+        chunk_size: Number of bytes compared per step
+        
+    Returns:
+        True if both files have identical content
+    """
+    with open(pdf1_path, 'rb') as f1, open(pdf2_path, 'rb') as f2:
+        size = os.fstat(f1.fileno()).st_size
+        if size != os.fstat(f2.fileno()).st_size:
+            return False
+        if size == 0:
+            return True
+        
+        with mmap.mmap(f1.fileno(), 0, access=mmap.ACCESS_READ) as map1, \
+                mmap.mmap(f2.fileno(), 0, access=mmap.ACCESS_READ) as map2:
+            view1, view2 = memoryview(map1), memoryview(map2)
+            try:
+                for offset in range(0, size, chunk_size):
+                    if view1[offset:offset + chunk_size] != view2[offset:offset + chunk_size]:
+                        return False
+            finally:
+                view1.release()
+                view2.release()
+    return True
+
+
+class _Outcome(NamedTuple):
+    """Result of one hash job, or the error it raised, with its timings."""
+    result: object
+    error: str
+    error_type: str
+    seconds: float
+    parse_timings: List[Tuple[float, int]]
+
+
+def _call_safely(func, args: tuple) -> _Outcome:
+    """Run a hash function, returning its outcome instead of raising."""
+    _job_timings.parse = []
+    started = time.perf_counter()
+    try:
+        result, error, error_type = func(*args), None, None
+    except Exception as e:
+        result, error, error_type = None, str(e), type(e).__name__
+    finally:
+        timings, _job_timings.parse = _job_timings.parse, None
+    return _Outcome(result, error, error_type, time.perf_counter() - started, timings)
+
+
+class Progress(NamedTuple):
+    """Files and bytes processed so far by one stage of a run."""
+    stage: str
+    files_done: int
+    files_total: int
+    bytes_done: int
+    bytes_total: int
 
 
 class DuplicatePDFDetector:
     """Main class for detecting and removing duplicate PDFs."""
     
-    def __init__(self, source_folder: str, final_folder: str, log_folder: str = "logs"):
+    # Bytes hashed from each end of a file in the sample stage
+    SAMPLE_SIZE = 64 * 1024
+    
+    # MinHash settings for near-duplicate mode
+    NUM_PERM = 128
+    SHINGLE_SIZE = 5
+    
+    def __init__(self, source_folder: str, final_folder: str, log_folder: str = "logs",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, use_mmap: bool = False,
+                 workers: int = 1, hash_mode: str = 'content',
+                 index_path: str = None, rebuild_index: bool = False,
+                 similarity_threshold: float = 0.9, verify: bool = False,
+                 recursive: bool = False, include: List[str] = None,
+                 exclude: List[str] = None, symlinks: str = 'files',
+                 digest_algorithm: str = 'sha256', prefilter_algorithm: str = 'fast64',
+                 placement: str = 'rename',
+                 progress_callback: Callable[[Progress], None] = None,
+                 log_level: str = 'INFO', log_format: str = 'text',
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET, spill_folder: str = None,
+                 storage: str = 'flat'):
         """
         Initialize the detector.
         
@@ -26,164 +480,627 @@ class DuplicatePDFDetector:
             source_folder: Path to folder containing PDFs to check
             final_folder: Path to folder where unique PDFs will be moved
             log_folder: Path to folder for log files
+            chunk_size: Read buffer size in bytes for content hashing
+            use_mmap: Hash file content through a memory map
+            workers: Number of parallel hashing workers
+            hash_mode: 'content' to compare raw bytes, 'text' to compare extracted
+                text, 'structural' to compare page content streams and images,
+                'near' to group PDFs with similar text
+            index_path: SQLite file caching digests between runs (None disables it)
+            rebuild_index: Discard cached digests and hash every file again
+            similarity_threshold: Minimum text similarity for near-duplicates
+            verify: Confirm duplicate groups by direct comparison before removal
+            recursive: Also scan subfolders of the source folder
+            include: Glob patterns of files to scan (default: *.pdf, any case)
+            exclude: Glob patterns of files and subfolders to leave alone
+            symlinks: Symbolic link policy: 'follow', 'files' or 'skip'
+            digest_algorithm: Strong digest that decides whether files are duplicates
+            prefilter_algorithm: Digest used to bucket candidates in the sample stage
+            placement: Preferred way of placing unique PDFs in the final folder:
+                'rename', 'hardlink', 'reflink' or 'copy'
+            progress_callback: Called with a Progress after every file of every
+                stage; an exception it raises aborts the run
+            log_level: Verbosity if logging is not configured yet in this
+                process; per-file events are logged at DEBUG
+            log_format: 'text' or 'json' lines if logging is not configured yet
+            memory_budget: Bytes of grouping records held in memory per stage
+                before sorted runs spill to disk. The scan manifest and the
+                per-stage lists of paths are not bounded by it and take
+                about 0.6-1 KB per file
+            spill_folder: Folder for spilled runs (default: system temp folder)
+            storage: 'flat' to keep unique PDFs as plain files in the final
+                folder, 'cas' to store each distinct content once under its
+                digest with a catalog of names
         """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive number of bytes")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if hash_mode not in HASH_MODES:
+            raise ValueError(f"hash_mode must be one of: {', '.join(HASH_MODES)}")
+        if not 0 < similarity_threshold <= 1:
+            raise ValueError("similarity_threshold must be between 0 and 1")
+        if symlinks not in SYMLINK_POLICIES:
+            raise ValueError(f"symlinks must be one of: {', '.join(SYMLINK_POLICIES)}")
+        if digest_algorithm == 'fast64' or digest_algorithm not in DIGEST_ALGORITHMS:
+            raise ValueError("digest_algorithm must be 'sha256' or 'blake2b'")
+        if prefilter_algorithm not in DIGEST_ALGORITHMS:
+            raise ValueError(f"prefilter_algorithm must be one of: {', '.join(DIGEST_ALGORITHMS)}")
+        if placement not in PLACEMENT_MODES:
+            raise ValueError(f"placement must be one of: {', '.join(PLACEMENT_MODES)}")
+        if log_level.upper() not in LOG_LEVELS:
+            raise ValueError(f"log_level must be one of: {', '.join(LOG_LEVELS)}")
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"log_format must be one of: {', '.join(LOG_FORMATS)}")
+        if memory_budget <= 0:
+            raise ValueError("memory_budget must be a positive number of bytes")
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"storage must be one of: {', '.join(STORAGE_MODES)}")
+        
         self.source_folder = Path(source_folder)
         self.final_folder = Path(final_folder)
         self.log_folder = Path(log_folder)
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.workers = workers
+        self.hash_mode = hash_mode
+        self.similarity_threshold = similarity_threshold
+        self.verify = verify
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.symlinks = symlinks
+        self.digest_algorithm = digest_algorithm
+        self.prefilter_algorithm = prefilter_algorithm
+        self.placement = placement
+        self.progress_callback = progress_callback
+        self.log_level = log_level
+        self.log_format = log_format
+        self.memory_budget = memory_budget
+        self.spill_folder = spill_folder
+        
+        # Bytes and time spent per digest engine
+        self.throughput = ThroughputMeter()
+        
+        # Number of files placed with each strategy
+        self.placement_report = defaultdict(int)
+        
+        # Single scan of the source folder shared by every stage
+        self.manifest = []
+        self._entries = {}
+        
+        # Estimated similarity per near-duplicate group
+        self.group_similarity = {}
+        
+        # Per-page text digests recorded by the text hash mode
+        self.page_hashes = {}
         
         # Create folders if they don't exist
         self.final_folder.mkdir(parents=True, exist_ok=True)
         self.log_folder.mkdir(parents=True, exist_ok=True)
         
+        # Content-addressable layout of the final folder
+        self.store = CasStore(self.final_folder, digest_algorithm, chunk_size) if storage == 'cas' else None
+        
         # Setup logging
         self._setup_logging()
         
+        # Persistent digest cache
+        self.index = None
+        if index_path:
+            self.index = HashIndex(index_path, self.source_folder)
+            if rebuild_index:
+                self.logger.info(f"Rebuilding hash index: {index_path}")
+                self.index.clear()
+        
         # Statistics
         self.stats = {
             'total_pdfs': 0,
             'unique_pdfs': 0,
             'duplicates_found': 0,
             'duplicates_removed': 0,
-            'errors': 0
+            'errors': 0,
+            'size_unique': 0,
+            'sample_unique': 0,
+            'fully_hashed': 0,
+            'index_hits': 0,
+            'verification_failures': 0,
+            'spilled_runs': 0
         }
     
     def _setup_logging(self):
-        """Setup logging configuration."""
-        log_file = self.log_folder / f"duplicate_detection_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
-        self.logger.info(f"Logging initialized. Log file: {log_file}")
+        """
+        Attach the detector to the process-wide logging pipeline.
+        
+        The pipeline is configured by the first detector (or the app) of the
+        process; later detectors reuse its queue, handlers and log file.
+        """
+        log_file = configure_logging(self.log_folder, self.log_level, self.log_format)
+        self.logger = logger
+        self.logger.info(f"Logging to {log_file}")
+    
+    def verify_duplicates(self, duplicates: Dict[str, List[Path]]) -> Dict[str, List[Path]]:
+        """
+        Confirm every duplicate group against its representative.
+        
+        Each member is compared with the group's first PDF only, reading
+        both files again rather than trusting the digests that grouped
+        them: byte by byte in content mode, by freshly extracted page text
+        in text mode and page structure digest by digest in structural mode.
+        Members that differ are dropped from the group and kept as unique.
+        Near-duplicate groups are similar by design and are not verified.
+        
+        Args:
+            duplicates: Dictionary mapping hash to list of duplicate PDF paths
+            
+        Returns:
+            Dictionary of the groups that still have more than one PDF
+        """
+        if self.hash_mode == 'near':
+            self.logger.info("Skipping verification of near-duplicate groups")
+            return duplicates
+        
+        self.logger.info(f"Verifying {len(duplicates)} duplicate groups...")
+        
+        pairs = []
+        for hash_val, paths in duplicates.items():
+            paths_sorted = sorted(paths)
+            pairs.extend((hash_val, paths_sorted[0], pdf_path) for pdf_path in paths_sorted[1:])
+        
+        if self.hash_mode == 'text':
+            jobs = [(representative, pdf_path) for _, representative, pdf_path in pairs]
+            results = self._run_hash_jobs(texts_identical, jobs, use_processes=True, stage='verify')
+        elif self.hash_mode == 'structural':
+            jobs = [(representative, pdf_path, self.digest_algorithm) for _, representative, pdf_path in pairs]
+            results = self._run_hash_jobs(structures_identical, jobs, use_processes=True, stage='verify')
+        else:
+            jobs = [(representative, pdf_path, self.chunk_size) for _, representative, pdf_path in pairs]
+            results = self._run_hash_jobs(files_identical, jobs, use_processes=False, stage='verify')
+        
+        verified = {hash_val: [sorted(paths)[0]] for hash_val, paths in duplicates.items()}
+        for (hash_val, representative, pdf_path), identical in zip(pairs, results):
+            if identical:
+                verified[hash_val].append(pdf_path)
+            else:
+                self.logger.warning(f"Verification failed: {pdf_path.name} differs from {representative.name}")
+                self.stats['verification_failures'] += 1
+        
+        return {hash_val: paths for hash_val, paths in verified.items() if len(paths) > 1}
     
-    def _get_pdf_content_hash(self, pdf_path: Path) -> str:
+    def _hash_files(self, func, jobs: List[tuple], use_processes: bool = False,
+                    index_field=None, algorithm: str = None, engine: str = None,
+                    read_limit: int = None, stage: str = None) -> List[str]:
         """
-        Generate a hash of PDF content for comparison.
+        Run a module-level hash function over many files.
+        
+        When more than one worker is configured the work is spread over a
+        thread pool, or a process pool for CPU-bound hashing. Results are
+        returned in job order regardless of which worker finishes first.
+        Digests found in the hash index for unchanged files are reused.
         
         Args:
-            pdf_path: Path to PDF file
+            func: Hash function taking the PDF path as its first argument
+            jobs: Argument tuples for func, one per file
+            use_processes: Use a process pool instead of a thread pool
+            index_field: Hash index column caching this digest, or a tuple of
+                columns when func returns a tuple of digests
+            algorithm: Digest algorithm cached digests must have been made with
+            engine: Name under which throughput is recorded
+            read_limit: Maximum bytes func reads per file, for throughput
+            stage: Name under which progress is reported
             
         Returns:
-            SHA256 hash of PDF content as hex string
+            List of digests in job order, None for files that failed
         """
+        digests = [None] * len(jobs)
+        if self.index and index_field:
+            for position, args in enumerate(jobs):
+                digests[position] = self.index.lookup(self._entries[args[0]], index_field, algorithm)
+            pending = [position for position, digest in enumerate(digests) if digest is None]
+            self.stats['index_hits'] += len(jobs) - len(pending)
+        else:
+            pending = list(range(len(jobs)))
+        
+        sizes = []
+        for position in pending:
+            size = self._entries[jobs[position][0]].size
+            sizes.append(min(size, read_limit) if read_limit else size)
+        
+        started = time.perf_counter()
+        computed = self._run_hash_jobs(func, [jobs[position] for position in pending], use_processes,
+                                       stage=stage, sizes=sizes)
+        for position, digest in zip(pending, computed):
+            digests[position] = digest
+        
+        if engine and pending:
+            self.throughput.record(engine, sum(sizes), time.perf_counter() - started)
+        
+        if self.index and index_field:
+            self.index.update(
+                ((self._entries[jobs[position][0]], digests[position])
+                 for position in pending if digests[position]),
+                index_field
+            )
+        return digests
+    
+    def _run_hash_jobs(self, func, jobs: List[tuple], use_processes: bool,
+                       stage: str = None, sizes: List[int] = None) -> List[str]:
+        """
+        Execute hash jobs sequentially or on a worker pool.
+        
+        Args:
+            func: Hash function taking the PDF path as its first argument
+            jobs: Argument tuples for func, one per file
+            use_processes: Use a process pool instead of a thread pool
+            stage: Name under which progress is reported after every file
+            sizes: Bytes each job processes, for progress reporting
+            
+        Returns:
+            List of hex digests in job order, None for files that failed
+        """
+        sizes = sizes or [self._entries[args[0]].size if args[0] in self._entries else 0
+                          for args in jobs]
+        bytes_total = sum(sizes)
+        
+        if self.workers > 1 and len(jobs) > 1:
+            if use_processes:
+                initializer, initargs = worker_logging()
+                executor = ProcessPoolExecutor(max_workers=self.workers,
+                                               initializer=initializer, initargs=initargs)
+                chunksize = max(1, len(jobs) // (self.workers * 4))
+            else:
+                executor = ThreadPoolExecutor(max_workers=self.workers)
+                chunksize = 1
+            results = executor.map(_call_safely, [func] * len(jobs), jobs, chunksize=chunksize)
+        else:
+            executor = None
+            results = (_call_safely(func, args) for args in jobs)
+        
+        # Only the digests are kept, not the outcomes, to bound memory on large runs
+        digests = []
+        bytes_done = 0
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_content = file.read()
-                return hashlib.sha256(pdf_content).hexdigest()
-        except Exception as e:
-            self.logger.error(f"Error reading PDF {pdf_path}: {str(e)}")
-            self.stats['errors'] += 1
-            return None
+            for args, outcome, size in zip(jobs, results, sizes):
+                digests.append(outcome.result)
+                bytes_done += size
+                self._observe_outcome(outcome, size, stage or 'hash')
+                if outcome.error:
+                    self.logger.error(f"Error reading PDF {args[0]}: {outcome.error}")
+                    self._record_error(stage or 'hash', outcome.error_type)
+                if stage:
+                    self._report(stage, len(digests), len(jobs), bytes_done, bytes_total)
+        finally:
+            if executor:
+                # Drop queued work if the progress callback aborted the run
+                if sys.version_info >= (3, 9):
+                    executor.shutdown(wait=True, cancel_futures=True)
+                else:
+                    executor.shutdown(wait=True)
+        return digests
+    
+    @staticmethod
+    def _observe_outcome(outcome: _Outcome, size: int, stage: str):
+        """Record the timings of a finished hash job in the metrics."""
+        if outcome.error:
+            return
+        for seconds, pages in outcome.parse_timings:
+            PARSE_SECONDS_PER_PAGE.observe(seconds / pages)
+        if size:
+            HASH_SECONDS_PER_MB.observe(outcome.seconds / (size / (1024 * 1024)), stage=stage)
     
-    def _get_pdf_text_hash(self, pdf_path: Path) -> str:
+    def _record_error(self, stage: str, error_type: str):
+        """Count an error in the run statistics and the error metrics."""
+        self.stats['errors'] += 1
+        ERRORS.inc(stage=stage, type=error_type)
+    
+    def _report(self, stage: str, files_done: int, files_total: int,
+                bytes_done: int, bytes_total: int):
+        """Pass the progress of a stage to the progress callback, if any."""
+        if self.progress_callback:
+            self.progress_callback(Progress(stage, files_done, files_total, bytes_done, bytes_total))
+    
+    def _new_grouper(self, key_size: int) -> RecordGrouper:
+        """Create a grouper bounded by the configured memory budget."""
+        return RecordGrouper(key_size, self.memory_budget, self.spill_folder)
+    
+    def _collect_groups(self, grouper: RecordGrouper, pdf_files: List[Path],
+                        algorithm: str) -> Tuple[Dict[str, List[Path]], int]:
+        """
+        Turn the records of a digest grouper into duplicate groups.
+        
+        Args:
+            grouper: Grouper keyed by raw digests, with positions in pdf_files as IDs
+            pdf_files: PDF paths the IDs refer to
+            algorithm: Algorithm of the digests, used to tag the group keys
+        
+        Returns:
+            Tuple of (groups of more than one PDF keyed by tagged digest,
+            number of PDFs whose digest no other PDF has)
+        """
+        hash_groups = {}
+        unique_count = 0
+        for key, file_ids in grouper.groups():
+            if len(file_ids) == 1:
+                unique_count += 1
+            else:
+                hash_groups[tag_digest(algorithm, key.hex())] = [pdf_files[file_id] for file_id in file_ids]
+        self.stats['spilled_runs'] += grouper.spilled_runs
+        return hash_groups, unique_count
+    
+    def _group_by_content_hash(self, pdf_files: List[Path]) -> Tuple[Dict[str, List[Path]], int]:
         """
-        Generate a hash based on extracted text content of PDF.
-        This is a more thorough comparison method.
+        Group PDFs by content hash, reading only files that may be duplicates.
+        
+        Files are first grouped by size, size collisions are narrowed by a
+        head+tail sample hash, and only the remaining candidates get a full
+        content hash. Each stage groups packed (key, file ID) records, which
+        spill to disk beyond the memory budget, instead of lists of paths.
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_files: PDF paths to group
             
         Returns:
-            SHA256 hash of extracted text as hex string
+            Tuple of (hash groups of more than one PDF, number of PDFs found
+            to be unique)
         """
+        # Stage 1: group PDFs by file size; files are identified by their
+        # position in pdf_files
+        candidates = []
+        unique_count = 0
+        with self._new_grouper(_SIZE_KEY.size) as size_groups:
+            for file_id, pdf_path in enumerate(pdf_files):
+                size_groups.add(_SIZE_KEY.pack(self._entries[pdf_path].size), file_id)
+            for _, file_ids in size_groups.groups():
+                if len(file_ids) == 1:
+                    unique_count += 1
+                else:
+                    candidates.extend(file_ids)
+            self.stats['spilled_runs'] += size_groups.spilled_runs
+        
+        self.stats['size_unique'] = unique_count
+        self.logger.info(f"Size stage: {unique_count} PDFs have a unique size")
+        
+        # Stage 2: group size collisions by a head+tail sample hash, using
+        # the (possibly non-cryptographic) prefilter digest
+        jobs = [(pdf_files[file_id], self._entries[pdf_files[file_id]].size, self.SAMPLE_SIZE,
+                 self.prefilter_algorithm)
+                for file_id in candidates]
+        sample_hashes = self._hash_files(hash_file_sample, jobs, index_field='sample_hash',
+                                         algorithm=self.prefilter_algorithm,
+                                         engine=self.prefilter_algorithm,
+                                         read_limit=2 * self.SAMPLE_SIZE,
+                                         stage='sample')
+        del jobs
+        
+        sample_unique = 0
+        full_hash = self.prefilter_algorithm == self.digest_algorithm
+        hash_groups = self._new_grouper(digest_size(self.digest_algorithm))
         try:
-            text_content = ""
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    try:
-                        text_content += page.extract_text()
-                    except Exception as e:
-                        self.logger.warning(f"Error extracting text from page in {pdf_path}: {str(e)}")
+            to_hash = []
+            with self._new_grouper(_SIZE_KEY.size + digest_size(self.prefilter_algorithm)) as sample_groups:
+                for file_id, sample_hash in zip(candidates, sample_hashes):
+                    if sample_hash:
+                        size = self._entries[pdf_files[file_id]].size
+                        sample_groups.add(_SIZE_KEY.pack(size) + digest_bytes(sample_hash), file_id)
+                del candidates, sample_hashes
+                
+                for key, file_ids in sample_groups.groups():
+                    if len(file_ids) == 1:
+                        sample_unique += 1
+                        continue
+                    # The sample already covered the whole file with the strong digest
+                    if full_hash and _SIZE_KEY.unpack_from(key)[0] <= 2 * self.SAMPLE_SIZE:
+                        for file_id in file_ids:
+                            hash_groups.add(key[_SIZE_KEY.size:], file_id)
+                    else:
+                        to_hash.extend(file_ids)
+                self.stats['spilled_runs'] += sample_groups.spilled_runs
             
-            # Also include metadata for more accurate comparison
-            try:
-                with open(pdf_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    if pdf_reader.metadata:
-                        text_content += str(pdf_reader.metadata)
-            except:
-                pass
+            self.stats['sample_unique'] = sample_unique
+            unique_count += sample_unique
+            self.logger.info(f"Sample stage: {sample_unique} PDFs have a unique head/tail sample")
             
-            return hashlib.sha256(text_content.encode('utf-8')).hexdigest()
-        except Exception as e:
-            self.logger.error(f"Error processing PDF {pdf_path}: {str(e)}")
-            self.stats['errors'] += 1
-            return None
+            # Stage 3: confirm remaining candidates with the strong content digest
+            jobs = [(pdf_files[file_id], self.chunk_size, self.use_mmap, self.digest_algorithm)
+                    for file_id in to_hash]
+            content_hashes = self._hash_files(hash_file, jobs, index_field='content_hash',
+                                              algorithm=self.digest_algorithm,
+                                              engine=self.digest_algorithm,
+                                              stage='hash')
+            for file_id, content_hash in zip(to_hash, content_hashes):
+                self.logger.debug(f"Processing: {pdf_files[file_id].name}",
+                                  extra={'event': 'hashed', 'file': str(pdf_files[file_id]),
+                                         'digest': content_hash})
+                if content_hash:
+                    hash_groups.add(digest_bytes(content_hash), file_id)
+            
+            self.stats['fully_hashed'] = len(jobs)
+            self.logger.info(f"Full hash stage: {self.stats['fully_hashed']} PDFs fully hashed")
+            
+            duplicates, hash_unique = self._collect_groups(hash_groups, pdf_files, self.digest_algorithm)
+        finally:
+            hash_groups.close()
+        
+        return duplicates, unique_count + hash_unique
     
-    def _compare_pdfs_detailed(self, pdf1_path: Path, pdf2_path: Path) -> bool:
+    def _group_by_text_hash(self, pdf_files: List[Path]) -> Tuple[Dict[str, List[Path]], int]:
         """
-        Detailed comparison of two PDFs by comparing page count and content.
+        Group PDFs by a hash of their extracted text.
+        
+        Text extraction is CPU-bound, so it runs in a process pool when more
+        than one worker is configured.
         
         Args:
-            pdf1_path: Path to first PDF
-            pdf2_path: Path to second PDF
+            pdf_files: PDF paths to group
             
         Returns:
-            True if PDFs are identical, False otherwise
+            Tuple of (hash groups of more than one PDF, number of PDFs found
+            to be unique)
         """
-        try:
-            with open(pdf1_path, 'rb') as f1, open(pdf2_path, 'rb') as f2:
-                reader1 = PyPDF2.PdfReader(f1)
-                reader2 = PyPDF2.PdfReader(f2)
-                
-                # Compare page count
-                if len(reader1.pages) != len(reader2.pages):
-                    return False
-                
-                # Compare each page's text content
-                for i in range(len(reader1.pages)):
-                    text1 = reader1.pages[i].extract_text()
-                    text2 = reader2.pages[i].extract_text()
-                    if text1 != text2:
-                        return False
-                
-                return True
-        except Exception as e:
-            self.logger.error(f"Error in detailed comparison: {str(e)}")
-            return False
+        jobs = [(pdf_path, self.digest_algorithm) for pdf_path in pdf_files]
+        results = self._hash_files(text_digest_file, jobs, use_processes=True,
+                                   index_field=('text_hash', 'page_hashes'),
+                                   algorithm=self.digest_algorithm,
+                                   engine=f"text/{self.digest_algorithm}",
+                                   stage='text')
+        with self._new_grouper(digest_size(self.digest_algorithm)) as hash_groups:
+            for file_id, (pdf_path, result) in enumerate(zip(pdf_files, results)):
+                self.logger.debug(f"Processing: {pdf_path.name}",
+                                  extra={'event': 'hashed', 'file': str(pdf_path),
+                                         'digest': result[0] if result else None})
+                if result:
+                    text_hash, page_hashes = result
+                    hash_groups.add(digest_bytes(text_hash), file_id)
+                    page_hashes = page_hashes.partition(':')[2]
+                    self.page_hashes[pdf_path] = page_hashes.split(",") if page_hashes else []
+            
+            self.stats['fully_hashed'] = len(jobs)
+            return self._collect_groups(hash_groups, pdf_files, self.digest_algorithm)
     
-    def find_duplicates(self) -> Dict[str, List[Path]]:
+    def _group_by_structure_hash(self, pdf_files: List[Path]) -> Tuple[Dict[str, List[Path]], int]:
         """
-        Find duplicate PDFs in the source folder.
+        Group PDFs by a hash of their page content streams and images.
+        
+        Parsing is CPU-bound, so it runs in a process pool when more than
+        one worker is configured.
         
+        Args:
+            pdf_files: PDF paths to group
+            
         Returns:
-            Dictionary mapping hash to list of PDF paths with that hash
+            Tuple of (hash groups of more than one PDF, number of PDFs found
+            to be unique)
+        """
+        jobs = [(pdf_path, self.digest_algorithm) for pdf_path in pdf_files]
+        digests = self._hash_files(structural_hash_file, jobs, use_processes=True,
+                                   index_field='structure_hash',
+                                   algorithm=self.digest_algorithm,
+                                   engine=f"structure/{self.digest_algorithm}",
+                                   stage='structure')
+        with self._new_grouper(digest_size(self.digest_algorithm)) as hash_groups:
+            for file_id, (pdf_path, digest) in enumerate(zip(pdf_files, digests)):
+                self.logger.debug(f"Processing: {pdf_path.name}",
+                                  extra={'event': 'hashed', 'file': str(pdf_path), 'digest': digest})
+                if digest:
+                    hash_groups.add(digest_bytes(digest), file_id)
+            
+            self.stats['fully_hashed'] = len(jobs)
+            return self._collect_groups(hash_groups, pdf_files, self.digest_algorithm)
+    
+    def _group_by_similarity(self, pdf_files: List[Path]) -> Tuple[Dict[str, List[Path]], int]:
+        """
+        Group PDFs whose text is similar but not necessarily identical.
+        
+        Each PDF gets a MinHash signature of its word shingles, and an LSH
+        index proposes candidate pairs so documents are never compared
+        pairwise. The estimated similarity of each group is stored in
+        group_similarity.
+        
+        Args:
+            pdf_files: PDF paths to group
+            
+        Returns:
+            Tuple of (near-duplicate groups, number of PDFs in no group)
+        """
+        jobs = [(pdf_path, self.NUM_PERM, self.SHINGLE_SIZE) for pdf_path in pdf_files]
+        results = self._hash_files(text_signature_file, jobs, use_processes=True, engine='minhash',
+                                   stage='signature')
+        
+        signatures = {}
+        for (pdf_path, _, _), signature in zip(jobs, results):
+            self.logger.debug(f"Processing: {pdf_path.name}", extra={'event': 'hashed', 'file': str(pdf_path)})
+            if signature:
+                signatures[pdf_path] = signature
+            elif signature is not None:
+                self.logger.warning(f"No text found in {pdf_path.name}, treating it as unique")
+        
+        self.stats['fully_hashed'] = len(jobs)
+        
+        hash_groups = {}
+        self.group_similarity = {}
+        for paths, score in group_near_duplicates(signatures, self.similarity_threshold):
+            group_key = hashlib.sha256(repr(signatures[paths[0]]).encode('utf-8')).hexdigest()
+            hash_groups[group_key] = paths
+            self.group_similarity[group_key] = score
+        
+        grouped = sum(len(paths) for paths in hash_groups.values())
+        return hash_groups, len(pdf_files) - grouped
+    
+    def scan(self) -> List[ManifestEntry]:
+        """
+        Scan the source folder once and keep the manifest for later stages.
+        
+        Returns:
+            Manifest entries of every PDF found, sorted by path
         """
         self.logger.info(f"Scanning folder: {self.source_folder}")
         
-        # Get all PDF files
-        pdf_files = list(self.source_folder.glob("*.pdf"))
-        pdf_files.extend(self.source_folder.glob("*.PDF"))
+        self.manifest = scan_pdfs(
+            self.source_folder,
+            recursive=self.recursive,
+            include=self.include,
+            exclude=self.exclude,
+            symlinks=self.symlinks,
+            skip_dirs=[self.final_folder, self.log_folder]
+        )
+        self._entries = {entry.path: entry for entry in self.manifest}
+        
+        total_size = sum(entry.size for entry in self.manifest)
+        self._report('scan', len(self.manifest), len(self.manifest), total_size, total_size)
+        self.logger.info(f"Found {len(self.manifest)} PDF files")
+        return self.manifest
+    
+    def find_duplicates(self, manifest: List[ManifestEntry] = None) -> Dict[str, List[Path]]:
+        """
+        Find duplicate PDFs in the source folder.
         
+        Args:
+            manifest: Entries from an earlier scan (scans the folder if omitted)
+            
+        Returns:
+            Dictionary mapping hash to list of PDF paths with that hash
+        """
+        if manifest is None:
+            manifest = self.scan()
+        else:
+            self.manifest = sorted(manifest)
+            self._entries = {entry.path: entry for entry in self.manifest}
+        
+        # Sorted so grouping does not depend on scan order
+        pdf_files = [entry.path for entry in self.manifest]
         self.stats['total_pdfs'] = len(pdf_files)
-        self.logger.info(f"Found {self.stats['total_pdfs']} PDF files")
+        
+        if self.index:
+            pruned = self.index.prune(self.manifest)
+            if pruned:
+                self.logger.info(f"Pruned {pruned} stale hash index entries")
         
         if not pdf_files:
             self.logger.warning("No PDF files found in source folder")
             return {}
+        if len(pdf_files) >= MAX_FILE_IDS:
+            raise ValueError(f"Cannot group more than {MAX_FILE_IDS - 1} files in one run")
         
-        # Group PDFs by content hash
-        hash_groups = defaultdict(list)
-        
-        for pdf_path in pdf_files:
-            self.logger.info(f"Processing: {pdf_path.name}")
-            
-            # Use both content hash and text hash for more accurate detection
-            content_hash = self._get_pdf_content_hash(pdf_path)
-            if content_hash:
-                hash_groups[content_hash].append(pdf_path)
+        if self.hash_mode == 'text':
+            hash_groups, unique_count = self._group_by_text_hash(pdf_files)
+        elif self.hash_mode == 'structural':
+            hash_groups, unique_count = self._group_by_structure_hash(pdf_files)
+        elif self.hash_mode == 'near':
+            hash_groups, unique_count = self._group_by_similarity(pdf_files)
+        else:
+            hash_groups, unique_count = self._group_by_content_hash(pdf_files)
+        if self.stats['spilled_runs']:
+            self.logger.info(f"Grouping spilled {self.stats['spilled_runs']} sorted runs to disk")
         
         # Identify duplicates (groups with more than one PDF)
         duplicates = {hash_val: paths for hash_val, paths in hash_groups.items() if len(paths) > 1}
         
-        self.stats['unique_pdfs'] = len([g for g in hash_groups.values() if len(g) == 1])
+        unique_count += len([g for g in hash_groups.values() if len(g) == 1])
+        if self.verify and duplicates:
+            candidates = sum(len(paths) for paths in duplicates.values())
+            duplicates = self.verify_duplicates(duplicates)
+            unique_count += candidates - sum(len(paths) for paths in duplicates.values())
+        self.stats['unique_pdfs'] = unique_count
         self.stats['duplicates_found'] = sum(len(paths) - 1 for paths in duplicates.values())
         
         self.logger.info(f"Found {len(duplicates)} groups of duplicate PDFs")
@@ -192,17 +1109,66 @@ class DuplicatePDFDetector:
         
         return duplicates
     
+    def _place(self, pdf_path: Path, name: str, names: NameAllocator,
+               digest: str = None) -> Tuple[str, str]:
+        """
+        Place a unique PDF in the final folder, or in the store with CAS storage.
+        
+        With CAS storage a PDF whose content was stored by an earlier run is
+        a duplicate: the store deletes it instead of adding another name.
+        
+        Args:
+            pdf_path: PDF to place
+            name: Preferred name in the final folder
+            names: Allocator of names in a flat final folder
+            digest: Tagged content digest of the PDF, if already known
+        
+        Returns:
+            Tuple of (name the PDF is available under, placement strategy
+            used, or None if the PDF was deleted as a duplicate of stored
+            content)
+        """
+        started = time.perf_counter()
+        if self.store:
+            name, strategy = self.store.put(pdf_path, name, digest, self.placement)
+        else:
+            destination = names.allocate(name)
+            strategy = place_file(pdf_path, destination, self.placement)
+            name = destination.name
+        
+        if strategy is None:
+            self.logger.debug(f"  Deleting duplicate: {pdf_path.name}",
+                              extra={'event': 'delete', 'file': str(pdf_path),
+                                     'duplicate_of': str(self.final_folder / name)})
+        else:
+            PLACEMENT_SECONDS.observe(time.perf_counter() - started, strategy=strategy)
+            self.placement_report[strategy] += 1
+        return name, strategy
+    
     def remove_duplicates_and_move_unique(self, duplicates: Dict[str, List[Path]]):
         """
         Remove duplicate PDFs and move unique ones to final folder.
         
+        The files to move come from the manifest of the scan, so the source
+        folder is not listed again. Each file is placed with the configured
+        strategy, falling back to the next one when the filesystem refuses it;
+        the strategy actually used is counted in placement_report.
+        
         Args:
             duplicates: Dictionary mapping hash to list of duplicate PDF paths
         """
+        if not self.manifest:
+            self.scan()
+        
         # First, handle duplicates - keep the first one, delete the rest
+        deleted = set()
+        kept = set()
+        kept_digests = {}
         for hash_val, paths in duplicates.items():
-            self.logger.info(f"\nProcessing duplicate group (hash: {hash_val[:16]}...)")
-            self.logger.info(f"  Found {len(paths)} duplicate PDFs")
+            self.logger.debug(f"Processing duplicate group (hash: {hash_val[:16]}...)")
+            self.logger.debug(f"  Found {len(paths)} duplicate PDFs")
+            if hash_val in self.group_similarity:
+                self.logger.debug(f"  Similarity: {self.group_similarity[hash_val]:.2f}")
             
             # Sort paths to ensure consistent selection
             paths_sorted = sorted(paths)
@@ -211,40 +1177,238 @@ class DuplicatePDFDetector:
             pdf_to_keep = paths_sorted[0]
             pdfs_to_delete = paths_sorted[1:]
             
-            self.logger.info(f"  Keeping: {pdf_to_keep.name}")
+            self.logger.debug(f"  Keeping: {pdf_to_keep.name}",
+                              extra={'event': 'keep', 'file': str(pdf_to_keep), 'group': hash_val})
+            kept.add(pdf_to_keep)
+            if self.hash_mode == 'content':
+                kept_digests[pdf_to_keep] = hash_val
             
             for pdf_to_delete in pdfs_to_delete:
                 try:
-                    self.logger.info(f"  Deleting duplicate: {pdf_to_delete.name}")
+                    self.logger.debug(f"  Deleting duplicate: {pdf_to_delete.name}",
+                                      extra={'event': 'delete', 'file': str(pdf_to_delete),
+                                             'duplicate_of': str(pdf_to_keep)})
                     pdf_to_delete.unlink()
+                    deleted.add(pdf_to_delete)
                     self.stats['duplicates_removed'] += 1
                 except Exception as e:
                     self.logger.error(f"  Error deleting {pdf_to_delete.name}: {str(e)}")
-                    self.stats['errors'] += 1
+                    self._record_error('delete', type(e).__name__)
         
         # Now move all unique PDFs to final folder
         self.logger.info("\nMoving unique PDFs to final folder...")
         
-        pdf_files = list(self.source_folder.glob("*.pdf"))
-        pdf_files.extend(self.source_folder.glob("*.PDF"))
+        pdf_files = [entry.path for entry in self.manifest if entry.path not in deleted]
+        
+        # Name conflicts are resolved against one listing of the final folder
+        names = NameAllocator(self.final_folder)
         
-        for pdf_path in pdf_files:
+        bytes_total = sum(self._entries[pdf_path].size for pdf_path in pdf_files)
+        bytes_done = 0
+        for count, pdf_path in enumerate(pdf_files, 1):
+            bytes_done += self._entries[pdf_path].size
             try:
-                destination = self.final_folder / pdf_path.name
-                
-                # Handle name conflicts
-                counter = 1
-                while destination.exists():
-                    stem = pdf_path.stem
-                    suffix = pdf_path.suffix
-                    destination = self.final_folder / f"{stem}_{counter}{suffix}"
-                    counter += 1
-                
-                self.logger.info(f"Moving: {pdf_path.name} -> {destination.name}")
-                shutil.move(str(pdf_path), str(destination))
+                name, strategy = self._place(pdf_path, pdf_path.name, names, kept_digests.get(pdf_path))
+                if strategy is None:
+                    # A duplicate of content stored by an earlier run
+                    self.stats['duplicates_found'] += 1
+                    self.stats['duplicates_removed'] += 1
+                    if pdf_path not in kept:
+                        self.stats['unique_pdfs'] -= 1
+                else:
+                    self.logger.debug(f"Moving: {pdf_path.name} -> {name} ({strategy})",
+                                      extra={'event': 'move', 'file': str(pdf_path),
+                                             'destination': name, 'strategy': strategy})
             except Exception as e:
                 self.logger.error(f"Error moving {pdf_path.name}: {str(e)}")
-                self.stats['errors'] += 1
+                self._record_error('move', type(e).__name__)
+            self._report('move', count, len(pdf_files), bytes_done, bytes_total)
+    
+    def _relative(self, pdf_path: Path) -> str:
+        """Return the path of a PDF relative to the source folder, as stored in plans."""
+        return pdf_path.relative_to(self.source_folder).as_posix()
+    
+    def write_plan(self, plan_path) -> int:
+        """
+        Find duplicates and write the actions that would remove them to a plan.
+        
+        No file is deleted or moved. Each duplicate group contributes a keep
+        action for its first PDF and a delete action for every other one;
+        every PDF that is not deleted then gets a move action. Actions carry
+        the file size and, where known, the digest that grouped the file.
+        
+        Args:
+            plan_path: Plan file to write; a .gz suffix compresses it
+        
+        Returns:
+            Number of actions written
+        """
+        duplicates = self.find_duplicates()
+        
+        header = {
+            'source': str(self.source_folder.resolve()),
+            'final': str(self.final_folder.resolve()),
+            'hash_mode': self.hash_mode,
+            'digest_algorithm': self.digest_algorithm,
+            'files': len(self.manifest),
+            'groups': len(duplicates),
+            'actions': len(self.manifest) + len(duplicates)
+        }
+        
+        deleted = set()
+        digests = {}
+        with PlanWriter(plan_path, **header) as plan:
+            for hash_val, paths in sorted(duplicates.items(), key=lambda item: min(item[1])):
+                paths_sorted = sorted(paths)
+                pdf_to_keep = paths_sorted[0]
+                digests[pdf_to_keep] = hash_val
+                plan.add('keep', self._relative(pdf_to_keep), size=self._entries[pdf_to_keep].size,
+                         digest=hash_val)
+                for pdf_to_delete in paths_sorted[1:]:
+                    plan.add('delete', self._relative(pdf_to_delete), size=self._entries[pdf_to_delete].size,
+                             digest=hash_val, keep=self._relative(pdf_to_keep))
+                    deleted.add(pdf_to_delete)
+            
+            for entry in self.manifest:
+                if entry.path not in deleted:
+                    plan.add('move', self._relative(entry.path), size=entry.size,
+                             digest=digests.get(entry.path), name=entry.path.name)
+        
+        self.logger.info(f"Wrote plan with {plan.count} actions to {plan_path}")
+        return plan.count
+    
+    def _matches_plan(self, pdf_path: Path, digest: str, header: Dict) -> bool:
+        """
+        Check that a file still has the digest a plan grouped it by.
+        
+        Near-duplicate groups have no per-file digest and always match.
+        """
+        algorithm = header.get('digest_algorithm', self.digest_algorithm)
+        if header.get('hash_mode') == 'content':
+            return hash_file(pdf_path, self.chunk_size, self.use_mmap, algorithm) == digest
+        if header.get('hash_mode') == 'text':
+            return text_hash_file(pdf_path, algorithm) == digest
+        if header.get('hash_mode') == 'structural':
+            return structural_hash_file(pdf_path, algorithm) == digest
+        return True
+    
+    def apply_plan(self, plan_path, checkpoint_interval: int = 1000) -> Dict[str, int]:
+        """
+        Carry out the actions of a plan, resuming after its last checkpoint.
+        
+        Paths in the plan are resolved against this detector's source folder,
+        so a plan can be applied on another host holding the same files.
+        Before acting on a file its size is compared with the plan; a
+        duplicate is only deleted while the PDF kept in its place still
+        exists, and with verify enabled only if both still have the planned
+        digest. Actions whose file is already gone count as already applied,
+        which makes replaying actions after a crash harmless.
+        
+        Args:
+            plan_path: Plan file written by write_plan
+            checkpoint_interval: Number of actions between checkpoints
+        
+        Returns:
+            Counters of the actions applied, skipped and failed
+        
+        Raises:
+            ValueError: If the file is not a plan of a supported version
+        """
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be at least 1")
+        
+        header, plan_id, actions = read_plan(plan_path)
+        checkpoint = Checkpoint(plan_path, plan_id)
+        if checkpoint.complete:
+            self.logger.info(f"Plan {plan_path} was already applied")
+            return checkpoint.stats
+        
+        if header.get('source') != str(self.source_folder.resolve()):
+            self.logger.info(f"Applying plan built on {header.get('host')} for {header.get('source')} "
+                             f"to {self.source_folder}")
+        if checkpoint.seq:
+            self.logger.info(f"Resuming plan after action {checkpoint.seq}")
+        
+        previous = dict(checkpoint.stats)
+        results = defaultdict(int, previous)
+        names = NameAllocator(self.final_folder)
+        verified = {}
+        total = header.get('actions', 0)
+        seq = checkpoint.seq
+        try:
+            for action in actions:
+                if action['seq'] <= checkpoint.seq:
+                    continue
+                outcome = self._apply_action(action, header, names, verified)
+                results[outcome] += 1
+                seq = action['seq']
+                if seq % checkpoint_interval == 0:
+                    checkpoint.save(seq, results)
+                self._report('apply', seq, max(total, seq), 0, 0)
+        finally:
+            # Everything up to seq is done, whether the loop finished or not
+            complete = seq >= total
+            checkpoint.save(seq, results, complete=complete)
+        
+        self.stats['duplicates_removed'] += results['deleted'] - previous.get('deleted', 0)
+        self.logger.info(
+            f"Applied plan: {results['deleted']} deleted, {results['moved']} moved, "
+            f"{results['missing']} already gone, {results['changed']} changed since planning, "
+            f"{results['failed']} failed"
+        )
+        return dict(results)
+    
+    def _apply_action(self, action: Dict, header: Dict, names: NameAllocator,
+                      verified: Dict[Path, bool]) -> str:
+        """
+        Apply one plan action.
+        
+        Returns:
+            Outcome: 'kept', 'deleted', 'moved', 'missing', 'changed' or 'failed'
+        """
+        kind = action['action']
+        pdf_path = self.source_folder / action['path']
+        if kind == 'keep':
+            return 'kept'
+        
+        try:
+            try:
+                size = pdf_path.stat().st_size
+            except FileNotFoundError:
+                return 'missing'
+            if size != action['size']:
+                self.logger.warning(f"Skipping {action['path']}: its size changed since planning")
+                return 'changed'
+            
+            if kind == 'delete':
+                pdf_to_keep = self.source_folder / action['keep']
+                if not pdf_to_keep.exists():
+                    self.logger.warning(f"Keeping {action['path']}: {action['keep']} no longer exists")
+                    return 'changed'
+                if self.verify and action.get('digest'):
+                    if pdf_to_keep not in verified:
+                        verified[pdf_to_keep] = self._matches_plan(pdf_to_keep, action['digest'], header)
+                    if not verified[pdf_to_keep] or not self._matches_plan(pdf_path, action['digest'], header):
+                        self.logger.warning(f"Keeping {action['path']}: content changed since planning")
+                        return 'changed'
+                pdf_path.unlink()
+                self.logger.debug(f"  Deleting duplicate: {pdf_path.name}",
+                                  extra={'event': 'delete', 'file': str(pdf_path),
+                                         'duplicate_of': str(pdf_to_keep), 'seq': action['seq']})
+                return 'deleted'
+            
+            # The planned digest may be stale, so the store hashes the file itself
+            name, strategy = self._place(pdf_path, action.get('name', pdf_path.name), names)
+            if strategy is None:
+                return 'deleted'
+            self.logger.debug(f"Moving: {pdf_path.name} -> {name} ({strategy})",
+                              extra={'event': 'move', 'file': str(pdf_path), 'destination': name,
+                                     'strategy': strategy, 'seq': action['seq']})
+            return 'moved'
+        except Exception as e:
+            self.logger.error(f"Error applying {kind} of {action['path']}: {str(e)}")
+            self._record_error('apply', type(e).__name__)
+            return 'failed'
     
     def process(self):
         """Main processing method."""
@@ -262,24 +1426,9 @@ class DuplicatePDFDetector:
         
         if not duplicates and self.stats['total_pdfs'] > 0:
             self.logger.info("No duplicates found. All PDFs are unique.")
-            # Still move all PDFs to final folder
-            pdf_files = list(self.source_folder.glob("*.pdf"))
-            pdf_files.extend(self.source_folder.glob("*.PDF"))
-            for pdf_path in pdf_files:
-                try:
-                    destination = self.final_folder / pdf_path.name
-                    counter = 1
-                    while destination.exists():
-                        stem = pdf_path.stem
-                        suffix = pdf_path.suffix
-                        destination = self.final_folder / f"{stem}_{counter}{suffix}"
-                        counter += 1
-                    shutil.move(str(pdf_path), str(destination))
-                except Exception as e:
-                    self.logger.error(f"Error moving {pdf_path.name}: {str(e)}")
         
         # Remove duplicates and move unique PDFs
-        if duplicates:
+        if self.manifest:
             self.remove_duplicates_and_move_unique(duplicates)
         
         # Print summary
@@ -290,10 +1439,175 @@ class DuplicatePDFDetector:
         self.logger.info(f"Unique PDFs: {self.stats['unique_pdfs']}")
         self.logger.info(f"Duplicates found: {self.stats['duplicates_found']}")
         self.logger.info(f"Duplicates removed: {self.stats['duplicates_removed']}")
+        self.logger.info(f"Skipped by size: {self.stats['size_unique']}")
+        self.logger.info(f"Skipped by sample hash: {self.stats['sample_unique']}")
+        self.logger.info(f"Fully hashed: {self.stats['fully_hashed']}")
+        self.logger.info(f"Hash index hits: {self.stats['index_hits']}")
+        self.logger.info(f"Verification failures: {self.stats['verification_failures']}")
+        for engine, throughput in self.throughput.summary().items():
+            self.logger.info(
+                f"Throughput {engine}: {throughput['bytes'] / (1024 * 1024):.1f} MB "
+                f"in {throughput['seconds']}s ({throughput['mb_per_s']} MB/s)"
+            )
+        for strategy, count in sorted(self.placement_report.items()):
+            self.logger.info(f"Placed by {strategy}: {count}")
+            if strategy != self.placement:
+                self.logger.warning(f"{count} file(s) fell back from {self.placement} to {strategy}")
         self.logger.info(f"Errors encountered: {self.stats['errors']}")
         self.logger.info(f"Final folder: {self.final_folder}")
         self.logger.info("=" * 60)
 
+    def _digest_job(self, pdf_path: Path) -> Tuple[Callable, tuple]:
+        """Return the hash function and arguments giving a PDF's exact digest in this mode."""
+        if self.hash_mode == 'text':
+            return text_hash_file, (pdf_path, self.digest_algorithm)
+        if self.hash_mode == 'structural':
+            return structural_hash_file, (pdf_path, self.digest_algorithm)
+        return hash_file, (pdf_path, self.chunk_size, self.use_mmap, self.digest_algorithm)
+    
+    def _resident_digests(self) -> Dict[str, Path]:
+        """
+        Digest every PDF already in the final folder.
+        
+        With CAS storage in content mode the store's catalog already answers
+        this, so nothing is digested and the map stays empty; in the other
+        modes the stored blobs are digested.
+        
+        Returns:
+            Dictionary mapping digest to the PDF in the final folder
+        """
+        if self.store and self.hash_mode == 'content':
+            self.logger.info(f"Using the content catalog of {self.final_folder}")
+            return {}
+        entries = self.store.manifest() if self.store else scan_pdfs(self.final_folder)
+        jobs = [self._digest_job(entry.path) for entry in entries]
+        digests = self._run_hash_jobs(jobs[0][0], [args for _, args in jobs],
+                                      use_processes=self.hash_mode != 'content', stage='resident',
+                                      sizes=[entry.size for entry in entries]) if jobs else []
+        resident = {}
+        for entry, digest in zip(entries, digests):
+            if digest:
+                resident.setdefault(digest, entry.path)
+        self.logger.info(f"Loaded {len(resident)} digests of PDFs in {self.final_folder}")
+        return resident
+    
+    def _ingest(self, pdf_path: Path, resident: Dict[str, Path], names: NameAllocator):
+        """
+        Deduplicate one newly arrived PDF against the final folder.
+        
+        The PDF is deleted when a PDF with the same digest is in the final
+        folder, and placed there otherwise. A PDF that cannot be read is
+        placed without a digest, as a full run would treat it as unique.
+        """
+        started = time.perf_counter()
+        if not is_selected(pdf_path, self.source_folder, self.include, self.exclude):
+            return
+        if self.symlinks == 'skip' and pdf_path.is_symlink():
+            return
+        try:
+            size = pdf_path.stat().st_size
+        except FileNotFoundError:
+            # Already handled, for example by the run over the backlog
+            return
+        
+        func, args = self._digest_job(pdf_path)
+        outcome = _call_safely(func, args)
+        self._observe_outcome(outcome, size, 'watch')
+        if outcome.error:
+            self.logger.error(f"Error reading PDF {pdf_path}: {outcome.error}")
+            self._record_error('watch', outcome.error_type)
+        digest = outcome.result
+        self.stats['total_pdfs'] += 1
+        
+        pdf_to_keep = resident.get(digest) if digest else None
+        try:
+            if pdf_to_keep and pdf_to_keep.exists():
+                pdf_path.unlink()
+                self.stats['duplicates_found'] += 1
+                self.stats['duplicates_removed'] += 1
+                WATCH_SECONDS.observe(time.perf_counter() - started, outcome='deleted')
+                self.logger.debug(f"  Deleting duplicate: {pdf_path.name}",
+                                  extra={'event': 'delete', 'file': str(pdf_path),
+                                         'duplicate_of': str(pdf_to_keep)})
+                return
+            
+            name, strategy = self._place(pdf_path, pdf_path.name, names,
+                                         digest if self.hash_mode == 'content' else None)
+            if strategy is None:
+                self.stats['duplicates_found'] += 1
+                self.stats['duplicates_removed'] += 1
+                WATCH_SECONDS.observe(time.perf_counter() - started, outcome='deleted')
+                return
+            WATCH_SECONDS.observe(time.perf_counter() - started, outcome='placed')
+            self.stats['unique_pdfs'] += 1
+            if digest:
+                resident[digest] = self.store.resolve(name) if self.store else self.final_folder / name
+            self.logger.debug(f"Moving: {pdf_path.name} -> {name} ({strategy})",
+                              extra={'event': 'move', 'file': str(pdf_path),
+                                     'destination': name, 'strategy': strategy})
+        except Exception as e:
+            self.logger.error(f"Error placing {pdf_path.name}: {str(e)}")
+            self._record_error('watch', type(e).__name__)
+    
+    def watch(self, debounce: float = 0.05, poll_interval: float = 1.0, polling: bool = False,
+              stop_event: threading.Event = None):
+        """
+        Keep deduplicating PDFs as they arrive in the source folder.
+        
+        The PDFs already in the source folder are processed first and the
+        final folder is digested once. After that each new PDF is handled on
+        its own as soon as its writer closes it: it is deleted if its digest
+        is already known and placed in the final folder otherwise, so no
+        folder is scanned or regrouped again. Linux inotify reports new
+        files; elsewhere the source folder is polled.
+        
+        Args:
+            debounce: Seconds a closed file must go unmodified before it is handled
+            poll_interval: Seconds between scans when polling
+            polling: Poll the source folder even where inotify is available
+            stop_event: Ends the watch when set; without it the watch runs
+                until interrupted
+        
+        Raises:
+            ValueError: In near-duplicate mode, which has no exact digest
+        """
+        if self.hash_mode == 'near':
+            raise ValueError("watch mode needs hash_mode 'content', 'text' or 'structural'")
+        if debounce < 0 or poll_interval <= 0:
+            raise ValueError("debounce must not be negative and poll_interval must be positive")
+        if not self.source_folder.exists():
+            self.logger.error(f"Source folder does not exist: {self.source_folder}")
+            return
+        
+        # Watch before the backlog run so files arriving meanwhile are not missed
+        watcher = create_watcher(self.source_folder, recursive=self.recursive,
+                                 skip_dirs=[self.final_folder, self.log_folder],
+                                 debounce=debounce, interval=poll_interval, polling=polling,
+                                 include=self.include, exclude=self.exclude, symlinks=self.symlinks)
+        try:
+            self.process()
+            resident = self._resident_digests()
+            names = NameAllocator(self.final_folder)
+            backend = 'inotify' if isinstance(watcher, InotifyWatcher) else f"polling every {poll_interval}s"
+            self.logger.info(f"Watching {self.source_folder} for new PDFs ({backend})")
+            
+            while not (stop_event and stop_event.is_set()):
+                ready, rescan = watcher.poll(0.5)
+                if rescan:
+                    self.logger.warning("File events were lost; rescanning the source folder")
+                    ready = [entry.path for entry in self.scan()]
+                for pdf_path in ready:
+                    self._ingest(pdf_path, resident, names)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+            self.logger.info(
+                f"Stopped watching: {self.stats['total_pdfs']} PDFs handled, "
+                f"{self.stats['duplicates_removed']} duplicates removed, "
+                f"{self.stats['errors']} errors"
+            )
+
 
 def main():
     """Main entry point."""
@@ -320,17 +1634,257 @@ def main():
         default='logs',
         help='Log folder (default: logs)'
     )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'Read buffer size in bytes for content hashing (default: {DEFAULT_CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--mmap',
+        action='store_true',
+        help='Hash file content through a memory map instead of a read buffer'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of parallel hashing workers (default: 1)'
+    )
+    parser.add_argument(
+        '--mode',
+        choices=HASH_MODES,
+        default='content',
+        help='Compare raw file content, extracted text, page content streams and images '
+             '(structural), or near-duplicate text (default: content)'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.9,
+        help='Minimum text similarity for --mode near (default: 0.9)'
+    )
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='Confirm duplicate groups by direct comparison before removing files'
+    )
+    parser.add_argument(
+        '--recursive',
+        action='store_true',
+        help='Also scan subfolders of the source folder'
+    )
+    parser.add_argument(
+        '--include',
+        action='append',
+        default=None,
+        help='Glob pattern of files to scan, repeatable (default: *.pdf, any case)'
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=None,
+        help='Glob pattern of files or subfolders to skip, repeatable'
+    )
+    parser.add_argument(
+        '--digest',
+        choices=[name for name in DIGEST_ALGORITHMS if name != 'fast64'],
+        default='sha256',
+        help='Strong digest that decides whether files are duplicates (default: sha256)'
+    )
+    parser.add_argument(
+        '--prefilter',
+        choices=DIGEST_ALGORITHMS,
+        default='fast64',
+        help='Digest used to bucket candidates before the strong digest (default: fast64)'
+    )
+    parser.add_argument(
+        '--placement',
+        choices=PLACEMENT_MODES,
+        default='rename',
+        help='How unique PDFs are placed in the final folder; falls back to the '
+             'next mode when unsupported (default: rename)'
+    )
+    parser.add_argument(
+        '--symlinks',
+        choices=SYMLINK_POLICIES,
+        default='files',
+        help='Follow linked files and folders, linked files only, or skip links (default: files)'
+    )
+    parser.add_argument(
+        '--index',
+        type=str,
+        default=None,
+        help='SQLite file caching digests between runs (default: <logs>/hash_index.db)'
+    )
+    parser.add_argument(
+        '--no-index',
+        action='store_true',
+        help='Do not read or write the hash index'
+    )
+    parser.add_argument(
+        '--rebuild-index',
+        action='store_true',
+        help='Discard cached digests and hash every file again'
+    )
+    parser.add_argument(
+        '--plan',
+        type=str,
+        default=None,
+        help='Only write the actions that would remove duplicates to this JSON Lines '
+             'plan file (.gz to compress); no file is changed'
+    )
+    parser.add_argument(
+        '--apply',
+        type=str,
+        default=None,
+        help='Apply a plan written by --plan, resuming after its last checkpoint; '
+             'with --verify, digests are checked again before deleting'
+    )
+    parser.add_argument(
+        '--checkpoint-interval',
+        type=int,
+        default=1000,
+        help='Number of plan actions applied between checkpoints (default: 1000)'
+    )
+    parser.add_argument(
+        '--storage',
+        choices=STORAGE_MODES,
+        default='flat',
+        help='Keep unique PDFs as plain files, or store each distinct content once '
+             'under its digest with a catalog of names (default: flat)'
+    )
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+        help='Megabytes of grouping records kept in memory per stage before sorted '
+             f'runs spill to disk (default: {DEFAULT_MEMORY_BUDGET // (1024 * 1024)}); '
+             'the list of scanned files adds about 1 KB per file'
+    )
+    parser.add_argument(
+        '--spill-folder',
+        type=str,
+        default=None,
+        help='Folder for spilled grouping runs (default: system temp folder)'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='After processing the source folder, keep running and deduplicate '
+             'each new PDF as soon as it is written (not in near mode)'
+    )
+    parser.add_argument(
+        '--watch-debounce',
+        type=float,
+        default=0.05,
+        help='Seconds a new file must go unmodified after being closed (default: 0.05)'
+    )
+    parser.add_argument(
+        '--poll',
+        action='store_true',
+        help='Watch by rescanning the source folder instead of using inotify'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=1.0,
+        help='Seconds between rescans when inotify is unavailable or --poll is given (default: 1.0)'
+    )
+    parser.add_argument(
+        '--log-level',
+        choices=LOG_LEVELS,
+        default='INFO',
+        help='Minimum level of log records; DEBUG adds one line per file (default: INFO)'
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Same as --log-level DEBUG'
+    )
+    parser.add_argument(
+        '--log-format',
+        choices=LOG_FORMATS,
+        default='text',
+        help='Write log records as text lines or JSON lines (default: text)'
+    )
+    parser.add_argument(
+        '--metrics-json',
+        type=str,
+        default=None,
+        help='Also write the run\'s timing and error metrics to this JSON file'
+    )
     
     args = parser.parse_args()
     
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size must be a positive number of bytes")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if not 0 < args.threshold <= 1:
+        parser.error("--threshold must be between 0 and 1")
+    if args.plan and args.apply:
+        parser.error("--plan and --apply cannot be combined")
+    if args.checkpoint_interval < 1:
+        parser.error("--checkpoint-interval must be at least 1")
+    if args.memory_budget < 1:
+        parser.error("--memory-budget must be at least 1 MB")
+    if args.watch and (args.plan or args.apply):
+        parser.error("--watch cannot be combined with --plan or --apply")
+    if args.watch and args.mode == 'near':
+        parser.error("--watch needs --mode content, text or structural")
+    if args.watch_debounce < 0 or args.poll_interval <= 0:
+        parser.error("--watch-debounce must not be negative and --poll-interval must be positive")
+    
+    index_path = None
+    if not args.no_index:
+        index_path = args.index or str(Path(args.logs) / 'hash_index.db')
+    
     # Create detector and process
     detector = DuplicatePDFDetector(
         source_folder=args.source,
         final_folder=args.final,
-        log_folder=args.logs
+        log_folder=args.logs,
+        chunk_size=args.chunk_size,
+        use_mmap=args.mmap,
+        workers=args.workers,
+        hash_mode=args.mode,
+        index_path=index_path,
+        rebuild_index=args.rebuild_index,
+        similarity_threshold=args.threshold,
+        verify=args.verify,
+        recursive=args.recursive,
+        include=args.include,
+        exclude=args.exclude,
+        symlinks=args.symlinks,
+        digest_algorithm=args.digest,
+        prefilter_algorithm=args.prefilter,
+        placement=args.placement,
+        log_level='DEBUG' if args.verbose else args.log_level,
+        log_format=args.log_format,
+        memory_budget=args.memory_budget * 1024 * 1024,
+        spill_folder=args.spill_folder,
+        storage=args.storage
     )
     
-    detector.process()
+    if args.plan:
+        detector.write_plan(args.plan)
+    elif args.apply:
+        detector.apply_plan(args.apply, args.checkpoint_interval)
+    elif args.watch:
+        # Stop cleanly when a service manager sends SIGTERM
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        detector.watch(args.watch_debounce, args.poll_interval, args.poll, stop)
+    else:
+        detector.process()
+    
+    # Timing histograms and error counters of the whole run
+    metrics = json.dumps(REGISTRY.summary(), indent=2, sort_keys=True)
+    detector.logger.info(f"Metrics summary:\n{metrics}")
+    if args.metrics_json:
+        with open(args.metrics_json, 'w', encoding='utf-8') as f:
+            f.write(metrics + '\n')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+"""
+SanitixPDF - Archive export
+Streams files as a ZIP or tar archive that is generated on the fly, so no
+temporary archive is written and memory use does not grow with the export.
+"""
+
+import io
+import hashlib
+import tarfile
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List
+from scanner import ManifestEntry
+
+
+# Archive formats /api/export can produce
+EXPORT_FORMATS = ('zip', 'tar')
+
+BLOCK_SIZE = tarfile.BLOCKSIZE
+
+
+def _archive_name(entry: ManifestEntry, root: Path) -> str:
+    """Return the path of a file inside the archive."""
+    if entry.alias:
+        return entry.alias
+    try:
+        return entry.path.relative_to(root).as_posix()
+    except ValueError:
+        return entry.path.name
+
+
+def _read_exactly(path: Path, start: int, length: int, chunk_size: int) -> Iterator[bytes]:
+    """
+    Yield bytes [start, start + length) of a file.
+    
+    A file that shrank after it was listed is padded with zeros and bytes
+    appended to it are left out, so the archive keeps the layout its
+    headers describe.
+    """
+    end = start + length
+    with open(path, 'rb') as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            block = f.read(min(chunk_size, end - position))
+            if not block:
+                break
+            position += len(block)
+            yield block
+    while position < end:
+        padding = min(chunk_size, end - position)
+        position += padding
+        yield bytes(padding)
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands out what zipfile wrote to it."""
+    
+    def __init__(self):
+        """Initialize an empty buffer."""
+        super().__init__()
+        self._chunks = []
+    
+    def writable(self) -> bool:
+        """The buffer only accepts writes."""
+        return True
+    
+    def write(self, data) -> int:
+        """Keep a copy of the written bytes."""
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def take(self) -> bytes:
+        """Return and forget everything written since the last call."""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(entries: List[ManifestEntry], root, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """
+    Generate a ZIP archive of files with stored (uncompressed) entries.
+    
+    PDFs are already compressed internally, so storing them costs no space
+    and keeps the export at disk speed. Entries use data descriptors and
+    ZIP64 where needed, which lets the archive be written front to back.
+    
+    Args:
+        entries: Files to include
+        root: Folder archive paths are relative to
+        chunk_size: Read buffer size in bytes
+    
+    Returns:
+        Iterator over the bytes of the archive
+    """
+    root = Path(root)
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for entry in entries:
+            modified = datetime.fromtimestamp(entry.mtime_ns / 1e9)
+            info = zipfile.ZipInfo(_archive_name(entry, root),
+                                   date_time=max(modified.timetuple()[:6], (1980, 1, 1, 0, 0, 0)))
+            info.compress_type = zipfile.ZIP_STORED
+            info.external_attr = 0o644 << 16
+            with archive.open(info, 'w', force_zip64=entry.size >= zipfile.ZIP64_LIMIT) as output:
+                for block in _read_exactly(entry.path, 0, entry.size, chunk_size):
+                    output.write(block)
+                    yield buffer.take()
+            yield buffer.take()
+    yield buffer.take()
+
+
+class TarLayout:
+    """
+    Byte layout of an uncompressed tar archive of a list of files.
+    
+    Every header and data offset is known before streaming starts, which
+    gives the archive a Content-Length and lets any byte range of it be
+    generated on its own to resume an interrupted download.
+    """
+    
+    def __init__(self, entries: List[ManifestEntry], root):
+        """
+        Compute the layout.
+        
+        Args:
+            entries: Files to include
+            root: Folder archive paths are relative to
+        """
+        self.root = Path(root)
+        self.entries = list(entries)
+        self._segments = []
+        offset = 0
+        for entry in self.entries:
+            header_size = len(self._header(entry))
+            self._segments.append((offset, header_size))
+            offset += header_size + entry.size + (-entry.size % BLOCK_SIZE)
+        self.size = offset + 2 * BLOCK_SIZE
+    
+    def _header(self, entry: ManifestEntry) -> bytes:
+        """Build the tar header block(s) of one file."""
+        info = tarfile.TarInfo(_archive_name(entry, self.root))
+        info.size = entry.size
+        info.mtime = entry.mtime_ns // 1_000_000_000
+        info.mode = 0o644
+        return info.tobuf(format=tarfile.PAX_FORMAT, encoding='utf-8', errors='surrogateescape')
+    
+    @property
+    def etag(self) -> str:
+        """Identifier that changes whenever the archive content would change."""
+        digest = hashlib.sha1()
+        for entry in self.entries:
+            digest.update(f"{_archive_name(entry, self.root)}\0{entry.size}\0{entry.mtime_ns}\n".encode())
+        return digest.hexdigest()
+    
+    def iter_range(self, start: int = 0, end: int = None,
+                   chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """
+        Generate bytes [start, end] of the archive.
+        
+        Args:
+            start: First byte to produce
+            end: Last byte to produce, inclusive (default: end of the archive)
+            chunk_size: Read buffer size in bytes
+        
+        Returns:
+            Iterator over the requested bytes
+        """
+        stop = self.size if end is None else end + 1
+        for entry, (offset, header_size) in zip(self.entries, self._segments):
+            data_start = offset + header_size
+            padding = -entry.size % BLOCK_SIZE
+            entry_end = data_start + entry.size + padding
+            if entry_end <= start:
+                continue
+            if offset >= stop:
+                return
+            
+            # Header
+            if start < data_start:
+                header = self._header(entry)
+                yield header[max(start - offset, 0):min(stop, data_start) - offset]
+            
+            # File data
+            low = max(start, data_start)
+            high = min(stop, data_start + entry.size)
+            if low < high:
+                yield from _read_exactly(entry.path, low - data_start, high - low, chunk_size)
+            
+            # Padding to the next block
+            low = max(start, data_start + entry.size)
+            high = min(stop, entry_end)
+            if low < high:
+                yield bytes(high - low)
+        
+        # End-of-archive marker
+        trailer_start = self.size - 2 * BLOCK_SIZE
+        low = max(start, trailer_start)
+        if low < stop:
+            yield bytes(stop - low)
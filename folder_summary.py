@@ -0,0 +1,190 @@
+"""
+SanitixPDF - Folder summaries
+Cached listing of a folder's PDFs that is served page by page and only
+rescanned when the folder has changed.
+"""
+
+import os
+import json
+import time
+import base64
+import bisect
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from scanner import ManifestEntry, scan_pdfs
+
+
+# Fields a listing can be sorted on
+SORT_KEYS = ('name', 'size', 'modified')
+
+
+def file_info(entry: ManifestEntry) -> Dict:
+    """Describe a manifest entry the way the API lists files."""
+    return {
+        'name': entry.name,
+        'size': entry.size,
+        'size_mb': round(entry.size / (1024 * 1024), 2),
+        'modified': datetime.fromtimestamp(entry.mtime_ns / 1e9).isoformat()
+    }
+
+
+def encode_cursor(key: tuple) -> str:
+    """Turn a sort key into an opaque, URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Turn a cursor back into the sort key it was made from.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode('ascii'))))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class FolderSummary:
+    """
+    Thread-safe cached listing of the PDFs in one folder.
+    
+    The listing is rebuilt when invalidate() was called, when the folder's
+    modification time changed, or when it is older than max_age seconds,
+    which also catches changes in subfolders of a recursive scan.
+    """
+    
+    def __init__(self, folder, max_age: float = 60.0, lister: Callable[[], List[ManifestEntry]] = None,
+                 **scan_options):
+        """
+        Initialize the summary. The folder is scanned on first use.
+        
+        Args:
+            folder: Folder to list
+            max_age: Seconds after which the listing is rebuilt regardless
+            lister: Returns the listing instead of a scan of the folder, as
+                the catalog of a content-addressable final folder does
+            scan_options: Keyword arguments passed on to scan_pdfs
+        """
+        self.folder = folder
+        self.max_age = max_age
+        self.lister = lister
+        self.scan_options = scan_options
+        self.version = 0
+        self._lock = threading.Lock()
+        self._entries = None
+        self._stale = True
+        self._total_size = 0
+        self._views = {}
+        self._folder_mtime = None
+        self._scanned_at = 0.0
+    
+    def invalidate(self):
+        """Force a rescan on the next request."""
+        with self._lock:
+            self._stale = True
+    
+    def _folder_mtime_ns(self) -> Optional[int]:
+        """Return the folder's modification time, or None if it is missing."""
+        try:
+            return os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _refresh(self):
+        """Rescan the folder if the cached listing may be stale. Caller holds the lock."""
+        folder_mtime = self._folder_mtime_ns()
+        if (not self._stale and folder_mtime == self._folder_mtime
+                and time.monotonic() - self._scanned_at < self.max_age):
+            return
+        
+        try:
+            entries = self.lister() if self.lister else scan_pdfs(self.folder, **self.scan_options)
+        except FileNotFoundError:
+            entries = []
+        if entries != self._entries:
+            self.version += 1
+            self._entries = entries
+            self._total_size = sum(entry.size for entry in entries)
+            self._views = {}
+        self._stale = False
+        self._folder_mtime = folder_mtime
+        self._scanned_at = time.monotonic()
+    
+    @staticmethod
+    def _sort_key(entry: ManifestEntry, sort: str) -> tuple:
+        """Return the unique sort key of an entry."""
+        name = entry.name
+        if sort == 'size':
+            primary = entry.size
+        elif sort == 'modified':
+            primary = entry.mtime_ns
+        else:
+            primary = name.lower()
+        return (primary, name, str(entry.path))
+    
+    def _view(self, sort: str) -> Tuple[List[ManifestEntry], List[tuple]]:
+        """Return the entries in ascending order of a sort key, with their keys."""
+        if sort not in self._views:
+            keyed = sorted((self._sort_key(entry, sort), entry) for entry in self._entries)
+            self._views[sort] = ([entry for _, entry in keyed], [key for key, _ in keyed])
+        return self._views[sort]
+    
+    def summary(self) -> Tuple[int, int, int]:
+        """
+        Return the current listing's totals.
+        
+        Returns:
+            Tuple of (version, file count, total size in bytes)
+        """
+        with self._lock:
+            self._refresh()
+            return self.version, len(self._entries), self._total_size
+    
+    def page(self, sort: str = 'name', descending: bool = False, cursor: str = None,
+             limit: int = 100) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Return one page of the listing.
+        
+        Cursors point after the last file of the previous page by sort key,
+        so pages stay consistent when files are added or removed between
+        requests.
+        
+        Args:
+            sort: Field to sort on, one of SORT_KEYS
+            descending: Sort from largest to smallest
+            cursor: next_cursor of the previous page (first page if omitted)
+            limit: Maximum number of files on the page
+        
+        Returns:
+            Tuple of (file descriptions, cursor of the next page or None)
+        
+        Raises:
+            ValueError: If sort or cursor is invalid
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        after = decode_cursor(cursor) if cursor else None
+        
+        with self._lock:
+            self._refresh()
+            entries, keys = self._view(sort)
+            
+            try:
+                if descending:
+                    end = bisect.bisect_left(keys, after) if after else len(entries)
+                    start = max(0, end - limit)
+                    selected = entries[start:end][::-1]
+                    more = start > 0
+                else:
+                    start = bisect.bisect_right(keys, after) if after else 0
+                    selected = entries[start:start + limit]
+                    more = start + limit < len(entries)
+            except TypeError:
+                # A cursor made for a different sort field
+                raise ValueError("Invalid cursor")
+        
+        next_cursor = encode_cursor(self._sort_key(selected[-1], sort)) if more and selected else None
+        return [file_info(entry) for entry in selected], next_cursor
@@ -0,0 +1,134 @@
+"""
+SanitixPDF - Compact grouping
+Groups files by fixed-width binary keys, such as file sizes or raw digests,
+without a Python list per group. Each file is one packed record holding the
+key and the file's integer ID; records are sorted in memory, and once they
+outgrow a memory budget each sorted batch is spilled to a temporary file
+and the batches are merged back in a single pass.
+"""
+
+import sys
+import heapq
+import struct
+import tempfile
+from itertools import groupby
+from typing import Iterator, List, Tuple
+
+
+# Default memory allowed for buffered records before they spill to disk
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# File IDs are stored big-endian so records sort by key, then by ID
+_ID = struct.Struct('>I')
+MAX_FILE_IDS = 2 ** (8 * _ID.size)
+
+# Memory a buffered record costs beyond its payload: bytes header and list slot
+_RECORD_OVERHEAD = sys.getsizeof(b'') + 8
+
+# Records read from a spilled run per block
+_READ_RECORDS = 4096
+
+
+class RecordGrouper:
+    """
+    Collects (key, file ID) records and yields the IDs sharing each key.
+    
+    Groups come out in key order with IDs ascending, so a grouping does not
+    depend on the order records were added in.
+    """
+    
+    def __init__(self, key_size: int, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 spill_folder: str = None):
+        """
+        Initialize an empty grouper.
+        
+        Args:
+            key_size: Length in bytes of every key
+            memory_budget: Bytes of records buffered before a sorted run is
+                written to disk
+            spill_folder: Folder for spilled runs (default: system temp folder)
+        """
+        if key_size < 1:
+            raise ValueError("key_size must be at least 1")
+        self.key_size = key_size
+        self.record_size = key_size + _ID.size
+        self.spill_folder = spill_folder
+        self.count = 0
+        self._limit = max(1, memory_budget // (self.record_size + _RECORD_OVERHEAD))
+        self._records = []
+        self._runs = []
+    
+    @property
+    def spilled_runs(self) -> int:
+        """Number of sorted runs written to disk so far."""
+        return len(self._runs)
+    
+    def add(self, key: bytes, file_id: int):
+        """
+        Add a record.
+        
+        Args:
+            key: Grouping key of exactly key_size bytes
+            file_id: Integer identifying the file, below MAX_FILE_IDS
+        """
+        if len(key) != self.key_size:
+            raise ValueError(f"key must be {self.key_size} bytes, got {len(key)}")
+        self._records.append(key + _ID.pack(file_id))
+        self.count += 1
+        if len(self._records) >= self._limit:
+            self._spill()
+    
+    def _spill(self):
+        """Write the buffered records to disk as one sorted run."""
+        self._records.sort()
+        run = tempfile.TemporaryFile(prefix='sanitix-group-', dir=self.spill_folder)
+        for start in range(0, len(self._records), _READ_RECORDS):
+            run.write(b''.join(self._records[start:start + _READ_RECORDS]))
+        run.seek(0)
+        self._runs.append(run)
+        self._records = []
+    
+    def _read_run(self, run) -> Iterator[bytes]:
+        """Yield the records of a spilled run in order."""
+        size = self.record_size
+        while True:
+            block = run.read(size * _READ_RECORDS)
+            if not block:
+                return
+            for offset in range(0, len(block), size):
+                yield block[offset:offset + size]
+    
+    def groups(self) -> Iterator[Tuple[bytes, List[int]]]:
+        """
+        Yield every key with the IDs of its files, including single files.
+        
+        Can be consumed once; spilled runs are merged lazily, so only one
+        group is held in memory at a time besides the in-memory batch.
+        
+        Returns:
+            Iterator of (key, sorted file IDs)
+        """
+        self._records.sort()
+        if self._runs:
+            records = heapq.merge(self._records, *(self._read_run(run) for run in self._runs))
+        else:
+            records = iter(self._records)
+        
+        key_size = self.key_size
+        for key, members in groupby(records, key=lambda record: record[:key_size]):
+            yield key, [_ID.unpack_from(record, key_size)[0] for record in members]
+    
+    def close(self):
+        """Delete spilled runs and drop buffered records."""
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._records = []
+    
+    def __enter__(self):
+        """Return the grouper for use in a with block."""
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        """Delete spilled runs."""
+        self.close()
@@ -0,0 +1,171 @@
+"""
+SanitixPDF - Persistent hash index
+Remembers file digests between runs so unchanged PDFs are not rehashed.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+from scanner import ManifestEntry
+from digests import digest_algorithm
+
+
+class HashIndex:
+    """SQLite-backed cache of file digests keyed on path, size, mtime and inode."""
+    
+    # Digest columns that can be cached for a file
+    FIELDS = ('sample_hash', 'content_hash', 'text_hash', 'page_hashes', 'structure_hash')
+    
+    def __init__(self, db_path: str, folder: str):
+        """
+        Open (or create) the index and load the entries for one folder.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            folder: Folder whose entries this instance reads and prunes
+        """
+        self.db_path = Path(db_path)
+        self.folder = os.path.abspath(folder)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self.connection = sqlite3.connect(str(self.db_path))
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                folder TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                sample_hash TEXT,
+                content_hash TEXT,
+                text_hash TEXT,
+                page_hashes TEXT,
+                structure_hash TEXT
+            )
+            """
+        )
+        
+        # Add digest columns introduced after the database was created
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(files)")}
+        for field in self.FIELDS:
+            if field not in columns:
+                self.connection.execute(f"ALTER TABLE files ADD COLUMN {field} TEXT")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS files_folder ON files (folder)")
+        self.connection.commit()
+        
+        self._entries = self._load()
+    
+    def _load(self) -> Dict[str, tuple]:
+        """Load this folder's entries into memory, keyed on path."""
+        cursor = self.connection.execute(
+            f"SELECT path, size, mtime_ns, inode, {', '.join(self.FIELDS)} "
+            "FROM files WHERE folder = ?",
+            (self.folder,)
+        )
+        return {row[0]: row[1:] for row in cursor}
+    
+    @staticmethod
+    def _key(manifest_entry: ManifestEntry) -> Tuple[int, int, int]:
+        """Return the (size, mtime_ns, inode) fingerprint of a manifest entry."""
+        return manifest_entry.size, manifest_entry.mtime_ns, manifest_entry.inode
+    
+    def lookup(self, manifest_entry: ManifestEntry, field, algorithm: str = None):
+        """
+        Return a cached digest if the file has not changed since it was indexed.
+        
+        Digests are stored tagged with the algorithm that produced them, so
+        a digest made with a different algorithm counts as missing.
+        
+        Args:
+            manifest_entry: Current manifest entry of the file
+            field: Digest column to read, or a tuple of columns
+            algorithm: Required digest algorithm (any if omitted)
+        
+        Returns:
+            Cached digest (a tuple of digests for a tuple of columns), or
+            None if any of them is missing or stale
+        """
+        entry = self._entries.get(os.path.abspath(manifest_entry.path))
+        if entry is None or entry[:3] != self._key(manifest_entry):
+            return None
+        
+        fields = field if isinstance(field, tuple) else (field,)
+        values = tuple(entry[3 + self.FIELDS.index(name)] for name in fields)
+        for value in values:
+            if value is None or (algorithm and digest_algorithm(value) != algorithm):
+                return None
+        return values if isinstance(field, tuple) else values[0]
+    
+    def update(self, records: Iterable[Tuple[ManifestEntry, str]], field):
+        """
+        Store digests for a batch of files.
+        
+        Entries whose fingerprint changed are replaced, which drops any
+        digests computed for the old version of the file.
+        
+        Args:
+            records: (manifest entry, digest) tuples, where digest is a tuple
+                when field is a tuple of columns
+            field: Digest column to write, or a tuple of columns
+        """
+        fields = field if isinstance(field, tuple) else (field,)
+        for name in fields:
+            if name not in self.FIELDS:
+                raise ValueError(f"Unknown index field: {name}")
+        
+        positions = [self.FIELDS.index(name) for name in fields]
+        rows = []
+        for manifest_entry, digest in records:
+            values = digest if isinstance(field, tuple) else (digest,)
+            path = os.path.abspath(manifest_entry.path)
+            key = self._key(manifest_entry)
+            entry = self._entries.get(path)
+            if entry is None or entry[:3] != key:
+                entry = key + (None,) * len(self.FIELDS)
+            digests = list(entry[3:])
+            for position, value in zip(positions, values):
+                digests[position] = value
+            entry = key + tuple(digests)
+            self._entries[path] = entry
+            rows.append((path, self.folder) + entry)
+        
+        if rows:
+            columns = ', '.join(self.FIELDS)
+            placeholders = ', '.join('?' * (5 + len(self.FIELDS)))
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO files (path, folder, size, mtime_ns, inode, {columns}) "
+                f"VALUES ({placeholders})",
+                rows
+            )
+            self.connection.commit()
+    
+    def prune(self, manifest: Iterable[ManifestEntry]) -> int:
+        """
+        Remove entries of this folder for files that no longer exist.
+        
+        Args:
+            manifest: Entries found by the current scan
+        
+        Returns:
+            Number of entries removed
+        """
+        seen = {os.path.abspath(manifest_entry.path) for manifest_entry in manifest}
+        stale = [(path,) for path in self._entries if path not in seen]
+        if stale:
+            self.connection.executemany("DELETE FROM files WHERE path = ?", stale)
+            self.connection.commit()
+            for (path,) in stale:
+                del self._entries[path]
+        return len(stale)
+    
+    def clear(self):
+        """Drop every entry of this folder so all files are hashed again."""
+        self.connection.execute("DELETE FROM files WHERE folder = ?", (self.folder,))
+        self.connection.commit()
+        self._entries = {}
+    
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
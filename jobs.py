@@ -0,0 +1,371 @@
+"""
+SanitixPDF - Processing jobs
+FIFO queue of processing jobs served by a bounded pool of worker threads,
+with every job's outcome kept in a small SQLite store.
+"""
+
+import json
+import uuid
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+# Lifecycle of a job; the last three are final
+JOB_STATES = ('queued', 'running', 'completed', 'failed', 'cancelled')
+FINAL_STATES = ('completed', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation was requested."""
+
+
+class Job:
+    """A processing request and its current progress."""
+    
+    def __init__(self, job_id: str, options: Dict = None):
+        """
+        Initialize a queued job.
+        
+        Args:
+            job_id: Unique identifier of the job
+            options: Parameters the job function receives
+        """
+        self.id = job_id
+        self.options = options or {}
+        self.state = 'queued'
+        self.progress = 0
+        self.current_status = 'Queued'
+        self.stats = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.detail = None
+        self.version = 0
+        self._cancel = threading.Event()
+        self._lock = threading.Condition()
+    
+    @property
+    def cancel_requested(self) -> bool:
+        """Whether cancellation of the job was requested."""
+        return self._cancel.is_set()
+    
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation of the job was requested."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+    
+    def update(self, progress: int = None, current_status: str = None, detail: Dict = None):
+        """
+        Record the progress of a running job.
+        
+        Args:
+            progress: Completion percentage
+            current_status: Human-readable description of the current step
+            detail: Stage, file and byte counters of the current step
+        """
+        with self._lock:
+            if progress is not None:
+                self.progress = progress
+            if current_status is not None:
+                self.current_status = current_status
+            if detail is not None:
+                self.detail = detail
+            self._changed()
+    
+    def _changed(self):
+        """Wake up watchers of the job. The caller holds the job's lock."""
+        self.version += 1
+        self._lock.notify_all()
+    
+    def wait(self, version: int, timeout: float) -> int:
+        """
+        Block until the job changes after the given version.
+        
+        Args:
+            version: Version the caller has already seen
+            timeout: Maximum number of seconds to wait
+        
+        Returns:
+            Current version, equal to the given one if the wait timed out
+        """
+        with self._lock:
+            self._lock.wait_for(lambda: self.version != version, timeout)
+            return self.version
+    
+    def to_dict(self) -> Dict:
+        """Return a JSON-serializable snapshot of the job."""
+        with self._lock:
+            return {
+                'id': self.id,
+                'state': self.state,
+                'options': self.options,
+                'progress': self.progress,
+                'current_status': self.current_status,
+                'stats': self.stats,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'detail': self.detail,
+                'version': self.version
+            }
+
+
+class JobStore:
+    """SQLite-backed record of jobs that survives restarts."""
+    
+    COLUMNS = ('id', 'state', 'options', 'progress', 'current_status', 'stats', 'error',
+               'created_at', 'started_at', 'finished_at')
+    
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the store.
+        
+        Jobs left queued or running by a previous process can never finish,
+        so they are marked as failed.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        
+        self.connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                options TEXT,
+                progress INTEGER NOT NULL,
+                current_status TEXT,
+                stats TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT
+            )
+            """
+        )
+        self.connection.execute(
+            "UPDATE jobs SET state = 'failed', error = 'Interrupted by a server restart', "
+            "finished_at = ? WHERE state IN ('queued', 'running')",
+            (datetime.now().isoformat(),)
+        )
+        self.connection.commit()
+    
+    def save(self, job: Job):
+        """Write the current snapshot of a job."""
+        record = job.to_dict()
+        record['options'] = json.dumps(record['options'])
+        record['stats'] = json.dumps(record['stats']) if record['stats'] is not None else None
+        with self._lock:
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                tuple(record[column] for column in self.COLUMNS)
+            )
+            self.connection.commit()
+    
+    def _to_dict(self, row) -> Dict:
+        """Convert a database row back into a job snapshot."""
+        record = dict(zip(self.COLUMNS, row))
+        record['options'] = json.loads(record['options']) if record['options'] else {}
+        record['stats'] = json.loads(record['stats']) if record['stats'] else None
+        record['detail'] = None
+        return record
+    
+    def load(self, job_id: str) -> Optional[Dict]:
+        """
+        Return the stored snapshot of a job.
+        
+        Args:
+            job_id: Identifier of the job
+        
+        Returns:
+            Job snapshot, or None if the job is unknown
+        """
+        with self._lock:
+            row = self.connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+    
+    def recent(self, limit: int = 20) -> List[Dict]:
+        """Return the snapshots of the most recently created jobs, newest first."""
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs ORDER BY created_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self.connection.close()
+
+
+class JobQueue:
+    """First-in, first-out job queue served by a fixed number of worker threads."""
+    
+    def __init__(self, target: Callable[[Job], Dict], store: JobStore,
+                 workers: int = 1, max_queued: int = 100):
+        """
+        Initialize the queue. Worker threads start with the first job.
+        
+        Args:
+            target: Function that runs a job and returns its statistics
+            store: Store the outcome of every job is written to
+            workers: Number of jobs that may run at the same time
+            max_queued: Number of jobs that may wait before submit() refuses more
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        
+        self.target = target
+        self.store = store
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._threads = []
+    
+    def _start_workers(self):
+        """Start the worker threads if they are not running yet."""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def submit(self, options: Dict = None) -> Job:
+        """
+        Queue a new job.
+        
+        Args:
+            options: Parameters passed to the target through job.options
+        
+        Returns:
+            The queued job
+        
+        Raises:
+            queue.Full: If max_queued jobs are already waiting
+        """
+        job = Job(uuid.uuid4().hex, options)
+        with self._lock:
+            self._queue.put_nowait(job)
+            self._jobs[job.id] = job
+            self._pending.append(job.id)
+            self._start_workers()
+        self.store.save(job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Return a snapshot of a job, including its place in the queue.
+        
+        Args:
+            job_id: Identifier of the job
+        
+        Returns:
+            Job snapshot, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            position = self._pending.index(job_id) + 1 if job_id in self._pending else None
+        snapshot = job.to_dict() if job else self.store.load(job_id)
+        if snapshot is not None:
+            snapshot['position'] = position
+        return snapshot
+    
+    def job(self, job_id: str) -> Optional[Job]:
+        """Return a job that is still queued or running in this process, or None."""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs waiting and running in this process."""
+        with self._lock:
+            queued = len(self._pending)
+            return {'queued': queued, 'running': len(self._jobs) - queued}
+    
+    def latest(self) -> Optional[Dict]:
+        """Return a snapshot of the most recently submitted job, or None."""
+        recent = self.store.recent(1)
+        return self.get(recent[0]['id']) if recent else None
+    
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """
+        Cancel a job.
+        
+        A queued job is cancelled at once. A running job is asked to stop
+        and becomes cancelled when it next checks for cancellation.
+        
+        Args:
+            job_id: Identifier of the job
+        
+        Returns:
+            Job snapshot, or None if the job is unknown
+        """
+        job = self.job(job_id)
+        if job is None:
+            return self.get(job_id)
+        
+        job._cancel.set()
+        with self._lock:
+            queued = job_id in self._pending
+            if queued:
+                self._pending.remove(job_id)
+        if queued:
+            self._finish(job, 'cancelled')
+        return self.get(job_id)
+    
+    def _finish(self, job: Job, state: str, stats: Dict = None, error: str = None):
+        """Move a job to a final state, store it and stop tracking it in memory."""
+        with job._lock:
+            job.state = state
+            job.stats = stats
+            job.error = error
+            job.current_status = {
+                'completed': 'Completed!',
+                'failed': f'Error: {error}',
+                'cancelled': 'Cancelled'
+            }[state]
+            if state == 'completed':
+                job.progress = 100
+            job.finished_at = datetime.now().isoformat()
+            job._changed()
+        self.store.save(job)
+        with self._lock:
+            self._jobs.pop(job.id, None)
+    
+    def _work(self):
+        """Run queued jobs one at a time, forever."""
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.id not in self._pending:
+                    # Cancelled while waiting
+                    continue
+                self._pending.remove(job.id)
+                with job._lock:
+                    job.state = 'running'
+                    job.current_status = 'Initializing...'
+                    job.started_at = datetime.now().isoformat()
+                    job._changed()
+            self.store.save(job)
+            
+            try:
+                stats = self.target(job)
+                self._finish(job, 'completed', stats=stats)
+            except JobCancelled:
+                self._finish(job, 'cancelled')
+            except Exception as e:
+                self._finish(job, 'failed', error=str(e))
@@ -0,0 +1,159 @@
+"""
+SanitixPDF - Logging pipeline
+Process-wide logging configured once: callers only put records on a queue,
+and a background thread formats them and writes them to the log file and
+the console, so slow log I/O never holds up hashing or moving files.
+Worker processes get their own cross-process queue drained into the same
+file and console.
+"""
+
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+import multiprocessing
+import logging.handlers
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+
+# Verbosity levels and record formats that can be configured
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+LOG_FORMATS = ('text', 'json')
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_lock = threading.Lock()
+_listener = None
+_log_file = None
+_worker_records = None
+_worker_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format each record as one JSON object per line, including extra= fields."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        """Return the record as a JSON line."""
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(log_folder, level: str = 'INFO', log_format: str = 'text',
+                      console: bool = True, name: str = 'duplicate_detection') -> Path:
+    """
+    Route all logging of the process through a queue to a file and the console.
+    
+    Only the first call configures anything; later calls, such as one per
+    detector in the web app, return the log file already in use. Logging is
+    flushed and stopped when the process exits.
+    
+    Args:
+        log_folder: Folder the log file is created in
+        level: Minimum level written, one of LOG_LEVELS
+        log_format: 'text' for readable lines, 'json' for one JSON object per line
+        console: Also write records to standard error
+        name: Prefix of the timestamped log file name
+    
+    Returns:
+        Path to the log file
+    """
+    global _listener, _log_file
+    
+    level = level.upper()
+    if level not in LOG_LEVELS:
+        raise ValueError(f"level must be one of: {', '.join(LOG_LEVELS)}")
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"log_format must be one of: {', '.join(LOG_FORMATS)}")
+    
+    with _lock:
+        if _listener is not None:
+            return _log_file
+        
+        log_folder = Path(log_folder)
+        log_folder.mkdir(parents=True, exist_ok=True)
+        log_file = log_folder / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        
+        formatter = JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT)
+        handlers = [logging.FileHandler(log_file, encoding='utf-8')]
+        if console:
+            handlers.append(logging.StreamHandler(sys.stderr))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        records = queue.SimpleQueue()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(logging.handlers.QueueHandler(records))
+        root.setLevel(level)
+        
+        _listener = logging.handlers.QueueListener(records, *handlers)
+        _listener.start()
+        _log_file = log_file
+        atexit.register(shutdown_logging)
+        return log_file
+
+
+def _attach_worker(records, level: int):
+    """Send the records of a worker process to the parent's log through a queue."""
+    root = logging.getLogger()
+    # A forked worker inherits a handler feeding the parent's in-process queue, which nobody reads here
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
+
+
+def worker_logging() -> Tuple[Optional[Callable], tuple]:
+    """
+    Return the initializer that makes a process pool's workers log to this process.
+    
+    The queue shared with workers is created on first use and drained by a
+    second background writer with the same handlers as configure_logging.
+    
+    Returns:
+        Tuple of (initializer, initargs) for ProcessPoolExecutor, or
+        (None, ()) if logging was not configured
+    """
+    global _worker_records, _worker_listener
+    with _lock:
+        if _listener is None:
+            return None, ()
+        if _worker_listener is None:
+            _worker_records = multiprocessing.Queue()
+            _worker_listener = logging.handlers.QueueListener(_worker_records, *_listener.handlers)
+            _worker_listener.start()
+        return _attach_worker, (_worker_records, logging.getLogger().level)
+
+
+def shutdown_logging():
+    """Write out queued records and stop the background writers."""
+    global _listener, _worker_records, _worker_listener
+    with _lock:
+        if _listener is None:
+            return
+        if _worker_listener is not None:
+            _worker_listener.stop()
+            _worker_records.close()
+            _worker_records = _worker_listener = None
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
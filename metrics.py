@@ -0,0 +1,283 @@
+"""
+SanitixPDF - Metrics
+Minimal in-process counters, gauges and histograms, rendered in the
+Prometheus text exposition format or summarized as JSON.
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    """Return label values in the metric's label order, rejecting unknown labels."""
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    """Render a Prometheus label set such as {stage="hash",le="0.5"}."""
+    parts = []
+    for name, value in zip(labelnames, values):
+        value = value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class holding a metric's name, help text and labelled values."""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        """
+        Initialize the metric.
+        
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+    
+    def _header(self) -> List[str]:
+        """Return the HELP and TYPE lines of the metric."""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+    
+    def render(self) -> List[str]:
+        """Return the metric in the Prometheus text format."""
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = self._header()
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+    
+    def summary(self):
+        """Return the metric's values, keyed on label values when labelled."""
+        with self._lock:
+            values = dict(self._values)
+        if not self.labelnames:
+            return values.get((), 0)
+        return {','.join(key): value for key, value in sorted(values.items())}
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    
+    kind = 'counter'
+    
+    def inc(self, amount: float = 1, **labels):
+        """Add to the counter."""
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or is read from a callback when rendered."""
+    
+    kind = 'gauge'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 callback: Callable[[], float] = None):
+        """
+        Initialize the gauge.
+        
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+            callback: Function returning the current value of an unlabelled gauge
+        """
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+    
+    def set(self, value: float, **labels):
+        """Set the gauge."""
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def set_function(self, callback: Callable[[], float]):
+        """Read the gauge from a callback from now on."""
+        self.callback = callback
+    
+    def _refresh(self):
+        """Read the current value from the callback, if any."""
+        if self.callback is not None:
+            value = self.callback()
+            with self._lock:
+                self._values[()] = value
+    
+    def render(self) -> List[str]:
+        """Return the gauge in the Prometheus text format."""
+        self._refresh()
+        return super().render()
+    
+    def summary(self):
+        """Return the gauge's current value(s)."""
+        self._refresh()
+        return super().summary()
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets."""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        """
+        Initialize the histogram.
+        
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+            buckets: Upper bounds of the buckets, in increasing order
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels):
+        """Record one observation."""
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+    
+    def render(self) -> List[str]:
+        """Return the histogram in the Prometheus text format."""
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = self._header()
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+    
+    def summary(self):
+        """Return count, sum and mean of the observations."""
+        with self._lock:
+            values = {key: (sum(counts), total) for key, (counts, total) in self._values.items()}
+        
+        def describe(count, total):
+            return {'count': count, 'sum': round(total, 6), 'mean': round(total / count, 6) if count else 0.0}
+        
+        if not self.labelnames:
+            return describe(*values.get((), (0, 0.0)))
+        return {','.join(key): describe(count, total) for key, (count, total) in sorted(values.items())}
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._metrics = {}
+    
+    def _register(self, metric: _Metric) -> _Metric:
+        """Add a metric, or return the existing one of the same name and kind."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Register (or look up) a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+              callback: Callable[[], float] = None) -> Gauge:
+        """Register (or look up) a gauge."""
+        gauge = self._register(Gauge(name, documentation, labelnames))
+        if callback is not None:
+            gauge.set_function(callback)
+        return gauge
+    
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = None) -> Histogram:
+        """Register (or look up) a histogram."""
+        if buckets is None:
+            return self._register(Histogram(name, documentation, labelnames))
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+    
+    def summary(self) -> Dict:
+        """Return every metric as a JSON-serializable dictionary."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return {metric.name: metric.summary() for metric in metrics}
+
+
+# Registry shared by the detector and the web app of one process
+REGISTRY = MetricsRegistry()
+
+HASH_SECONDS_PER_MB = REGISTRY.histogram(
+    'sanitix_hash_seconds_per_mb',
+    'Time spent hashing or comparing a file, per MB read',
+    ('stage',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+PARSE_SECONDS_PER_PAGE = REGISTRY.histogram(
+    'sanitix_pdf_parse_seconds_per_page',
+    'Time spent parsing a PDF and extracting its text, per page',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+PLACEMENT_SECONDS = REGISTRY.histogram(
+    'sanitix_placement_seconds',
+    'Time spent placing one file in the final folder',
+    ('strategy',),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+)
+WATCH_SECONDS = REGISTRY.histogram(
+    'sanitix_watch_seconds',
+    'Time from a watched file being ready to it being deleted or placed',
+    ('outcome',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+UPLOAD_BYTES_PER_SECOND = REGISTRY.histogram(
+    'sanitix_upload_bytes_per_second',
+    'Transfer rate of upload requests',
+    buckets=(1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8, 1e9)
+)
+ERRORS = REGISTRY.counter(
+    'sanitix_errors_total',
+    'Errors by pipeline stage and exception type',
+    ('stage', 'type')
+)
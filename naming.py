@@ -0,0 +1,123 @@
+"""
+SanitixPDF - Destination name allocation
+Hands out unique file names in a folder from an in-memory index instead
+of probing the filesystem with one stat call per candidate name.
+"""
+
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Iterable
+
+
+# Names produced for conflicts look like "<stem>_<counter><suffix>"
+COUNTER_PATTERN = re.compile(r"^(?P<stem>.*)_(?P<counter>\d+)$")
+
+# Platforms whose default filesystems treat "A.pdf" and "a.pdf" as one file
+CASE_INSENSITIVE_PLATFORMS = ('win32', 'cygwin', 'darwin')
+
+
+class NameAllocator:
+    """
+    Thread-safe allocator of unique names in one folder.
+    
+    The folder is listed once, on first use. For every stem the highest
+    numeric suffix seen so far is remembered, so a conflicting name is
+    resolved in constant time no matter how many files share the stem.
+    Names handed out are reserved immediately, which keeps concurrent
+    callers from receiving the same name before the file is written.
+    On case-insensitive filesystems names differing only in case are
+    treated as the same name.
+    """
+    
+    def __init__(self, folder, existing: Callable[[], Iterable[str]] = None,
+                 case_sensitive: bool = None):
+        """
+        Initialize the allocator.
+        
+        Args:
+            folder: Folder the names are allocated in
+            existing: Returns the names already taken, for names that are
+                not files in the folder (default: list the folder)
+            case_sensitive: Whether names differing only in case are
+                different files (default: False on Windows and macOS)
+        """
+        if case_sensitive is None:
+            case_sensitive = sys.platform not in CASE_INSENSITIVE_PLATFORMS
+        self.folder = Path(folder)
+        self.existing = existing
+        self.case_sensitive = case_sensitive
+        self._lock = threading.Lock()
+        self._taken = None
+        self._highest = {}
+    
+    def _load(self):
+        """List the folder and record every existing name."""
+        self._taken = set()
+        self._highest = {}
+        if self.existing:
+            for name in self.existing():
+                self._record(name)
+            return
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    self._record(entry.name)
+        except FileNotFoundError:
+            pass
+    
+    def _key(self, name: str) -> str:
+        """Return the form of a name used to compare it with other names."""
+        return name if self.case_sensitive else name.casefold()
+    
+    def _record(self, name: str):
+        """Mark a name as taken and update the highest counter of its stem."""
+        self._taken.add(self._key(name))
+        path = Path(self._key(name))
+        match = COUNTER_PATTERN.match(path.stem)
+        if match:
+            key = (match.group('stem'), path.suffix)
+            counter = int(match.group('counter'))
+            if counter > self._highest.get(key, 0):
+                self._highest[key] = counter
+    
+    def allocate(self, name: str) -> Path:
+        """
+        Reserve a unique name in the folder.
+        
+        Args:
+            name: Preferred file name
+        
+        Returns:
+            Path in the folder that no existing or previously allocated
+            file uses: the preferred name if free, otherwise
+            "<stem>_<counter><suffix>" with the next unused counter
+        """
+        with self._lock:
+            if self._taken is None:
+                self._load()
+            
+            if self._key(name) in self._taken:
+                path = Path(name)
+                key = (self._key(path.stem), self._key(path.suffix))
+                counter = self._highest.get(key, 0) + 1
+                name = f"{path.stem}_{counter}{path.suffix}"
+                while self._key(name) in self._taken:
+                    counter += 1
+                    name = f"{path.stem}_{counter}{path.suffix}"
+            
+            self._record(name)
+            return self.folder / name
+    
+    def release(self, name: str):
+        """
+        Make a name available again after its file was removed.
+        
+        Args:
+            name: Name handed out by allocate() or found in the folder
+        """
+        with self._lock:
+            if self._taken is not None:
+                self._taken.discard(self._key(name))
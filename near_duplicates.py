@@ -0,0 +1,249 @@
+"""
+SanitixPDF - Near-duplicate detection
+MinHash signatures over word shingles, indexed with LSH banding so that
+similar documents are found without comparing every pair.
+"""
+
+import re
+import random
+import hashlib
+from itertools import combinations
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Hashable, List, Set, Tuple
+
+
+# Mersenne prime used as the modulus of the permutation hashes
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 64) - 1
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> Set[int]:
+    """
+    Hash the overlapping word shingles of a text.
+    
+    Args:
+        text: Text to shingle
+        shingle_size: Number of consecutive words per shingle
+    
+    Returns:
+        Set of stable 64-bit shingle hashes
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = (" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1))
+    return {
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for shingle in shingles
+    }
+
+
+@lru_cache(maxsize=None)
+def _permutation(seed: int) -> Tuple[int, int]:
+    """Return the (a, b) coefficients of the universal hash that permutes shingle hashes."""
+    generator = random.Random(seed)
+    return generator.randint(1, MERSENNE_PRIME - 1), generator.randint(0, MERSENNE_PRIME - 1)
+
+
+@lru_cache(maxsize=None)
+def _probe_orders(num_perm: int, seed: int) -> Tuple[Tuple[int, ...], ...]:
+    """Return, for every signature position, the order in which other positions fill it when empty."""
+    generator = random.Random(seed)
+    orders = []
+    for position in range(num_perm):
+        others = [other for other in range(num_perm) if other != position]
+        generator.shuffle(others)
+        orders.append(tuple(others))
+    return tuple(orders)
+
+
+def minhash_signature(hashes: Set[int], num_perm: int = 128, seed: int = 1) -> Tuple[int, ...]:
+    """
+    Compute the MinHash signature of a set of shingle hashes.
+    
+    Uses one permutation hashing: every shingle hash is permuted once and
+    falls into one of num_perm bins, each of which keeps its smallest
+    value. Bins no shingle fell into copy a filled bin chosen in a fixed
+    pseudo-random order (optimal densification). Two documents then agree
+    on a position with probability equal to their Jaccard similarity, as
+    with num_perm independent permutations, for one hash per shingle
+    instead of num_perm.
+    
+    Args:
+        hashes: Shingle hashes of one document
+        num_perm: Number of bins (signature length)
+        seed: Seed for the permutation and the probe orders
+    
+    Returns:
+        Tuple of num_perm minimum hash values
+    """
+    if not hashes:
+        return (MAX_HASH,) * num_perm
+    a, b = _permutation(seed)
+    bins = [None] * num_perm
+    for value in hashes:
+        permuted = (a * value + b) % MERSENNE_PRIME
+        position = permuted % num_perm
+        current = bins[position]
+        if current is None or permuted < current:
+            bins[position] = permuted
+    
+    if None in bins:
+        filled = list(bins)
+        for position, order in enumerate(_probe_orders(num_perm, seed)):
+            if filled[position] is None:
+                bins[position] = next(filled[other] for other in order if filled[other] is not None)
+    return tuple(bins)
+
+
+def estimate_similarity(signature1: Tuple[int, ...], signature2: Tuple[int, ...]) -> float:
+    """
+    Estimate the Jaccard similarity of two documents from their signatures.
+    
+    Args:
+        signature1: MinHash signature of the first document
+        signature2: MinHash signature of the second document
+    
+    Returns:
+        Fraction of matching signature positions, between 0 and 1
+    """
+    matches = sum(1 for value1, value2 in zip(signature1, signature2) if value1 == value2)
+    return matches / len(signature1)
+
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Pick an LSH band layout whose detection threshold is close to the target.
+    
+    A pair with similarity s becomes a candidate with probability
+    1 - (1 - s^rows)^bands, whose steepest point is near (1/bands)^(1/rows).
+    
+    Args:
+        num_perm: Signature length
+        threshold: Target similarity threshold
+    
+    Returns:
+        Tuple of (bands, rows per band)
+    """
+    best = (num_perm, 1)
+    best_error = None
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best_error is None or error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class LSHIndex:
+    """Banded locality-sensitive hash index over MinHash signatures."""
+    
+    def __init__(self, num_perm: int, threshold: float):
+        """
+        Initialize the index.
+        
+        Args:
+            num_perm: Signature length
+            threshold: Similarity threshold the banding is tuned for
+        """
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self.buckets = defaultdict(list)
+    
+    def add(self, key: Hashable, signature: Tuple[int, ...]):
+        """
+        Insert a document signature into every band bucket.
+        
+        Args:
+            key: Identifier of the document
+            signature: MinHash signature of the document
+        """
+        for band in range(self.bands):
+            start = band * self.rows
+            self.buckets[(band, signature[start:start + self.rows])].append(key)
+    
+    def candidate_pairs(self) -> Set[Tuple[Hashable, Hashable]]:
+        """
+        Return pairs of documents that share at least one band bucket.
+        
+        Every pair within a bucket is a candidate; a pair sharing several
+        bands is reported once.
+        
+        Returns:
+            Set of (smaller key, larger key) candidate pairs
+        """
+        pairs = set()
+        for keys in self.buckets.values():
+            for key1, key2 in combinations(sorted(keys), 2):
+                pairs.add((key1, key2))
+        return pairs
+
+
+def group_near_duplicates(signatures: Dict[Hashable, Tuple[int, ...]],
+                          threshold: float) -> List[Tuple[List[Hashable], float]]:
+    """
+    Group documents whose estimated similarity reaches the threshold.
+    
+    Documents with identical signatures enter the LSH index once, so a
+    large cluster of exact copies costs one index entry instead of a
+    quadratic number of candidate pairs. Candidates come from the index
+    and are confirmed against the signatures. Groups are not merged
+    transitively: in key order, each document not yet grouped becomes a
+    representative and takes in its copies and the ungrouped candidates
+    that reach the threshold against it, so a chain A~B~C never puts C
+    with A unless C is similar to A itself.
+    
+    Args:
+        signatures: MinHash signature per document key
+        threshold: Minimum estimated Jaccard similarity
+    
+    Returns:
+        List of (sorted member keys, lowest similarity of a member to the
+        first member, the representative) for every group with more than
+        one document
+    """
+    if not signatures:
+        return []
+    
+    # Keys sharing a signature, under the smallest of them
+    copies = {}
+    for key in sorted(signatures):
+        copies.setdefault(signatures[key], []).append(key)
+    copies = {keys[0]: keys for keys in copies.values()}
+    
+    num_perm = len(next(iter(signatures.values())))
+    index = LSHIndex(num_perm, threshold)
+    for key in sorted(copies):
+        index.add(key, signatures[key])
+    
+    neighbours = defaultdict(list)
+    for key1, key2 in index.candidate_pairs():
+        neighbours[key1].append(key2)
+        neighbours[key2].append(key1)
+    
+    grouped = set()
+    groups = []
+    for representative in sorted(copies):
+        if representative in grouped:
+            continue
+        members = [(key, 1.0) for key in copies[representative][1:]]
+        for key in sorted(neighbours[representative]):
+            if key in grouped:
+                continue
+            similarity = estimate_similarity(signatures[representative], signatures[key])
+            if similarity >= threshold:
+                members.extend((copy, similarity) for copy in copies[key])
+                grouped.add(key)
+        if not members:
+            continue
+        grouped.add(representative)
+        # An ungrouped smaller key reaching the threshold would have taken this one in
+        keys = [representative] + sorted(key for key, _ in members)
+        groups.append((keys, min(similarity for _, similarity in members)))
+    groups.sort()
+    return groups
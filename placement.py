@@ -0,0 +1,134 @@
+"""
+SanitixPDF - File placement
+Moves files into the final folder without rewriting their data when the
+filesystem allows it: rename, hardlink or reflink, with a full copy only
+as the last resort.
+"""
+
+import os
+import sys
+import uuid
+import errno
+import shutil
+from pathlib import Path
+
+
+# Placement strategies, cheapest first
+PLACEMENT_MODES = ('rename', 'hardlink', 'reflink', 'copy')
+
+# Errors meaning a strategy is not possible here, so the next one is tried:
+# another filesystem, no hard links or clones, or too many links to a file
+UNSUPPORTED_ERRNOS = frozenset(
+    getattr(errno, name) for name in ('EXDEV', 'EPERM', 'ENOTSUP', 'EOPNOTSUPP', 'ENOTTY',
+                                      'EINVAL', 'EMLINK', 'ENOSYS')
+    if hasattr(errno, name)
+)
+
+# ioctl request that clones a file's extents (linux/fs.h)
+FICLONE = 0x40049409
+
+
+def _temp_path(destination: Path) -> Path:
+    """Return a hidden temporary name next to the destination."""
+    return destination.parent / f".{destination.name}.{uuid.uuid4().hex}.tmp"
+
+
+def _reflink(source: Path, target: Path):
+    """Clone source into target so both share the same data blocks."""
+    if not sys.platform.startswith('linux'):
+        raise OSError(errno.ENOTSUP, "reflink is only supported on Linux")
+    import fcntl
+    
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source, target)
+
+
+def _exists_error(destination: Path) -> FileExistsError:
+    """Return the error raised instead of replacing an existing destination."""
+    return FileExistsError(errno.EEXIST, "Destination already exists", str(destination))
+
+
+def _publish(temp: Path, destination: Path):
+    """Give a finished temporary file its final name, never replacing an existing file."""
+    try:
+        # A hard link fails atomically if the name is taken
+        os.link(temp, destination)
+    except FileExistsError:
+        raise
+    except OSError:
+        if os.path.lexists(destination):
+            raise _exists_error(destination)
+        os.rename(temp, destination)
+        return
+    os.unlink(temp)
+
+
+def _place(source: Path, destination: Path, mode: str):
+    """Place one file with a single strategy, raising OSError if it is unsupported."""
+    if mode == 'rename':
+        # os.rename replaces an existing file on POSIX systems
+        if os.path.lexists(destination):
+            raise _exists_error(destination)
+        os.rename(source, destination)
+        return
+    if mode == 'hardlink':
+        os.link(source, destination)
+        os.unlink(source)
+        return
+    
+    temp = _temp_path(destination)
+    try:
+        if mode == 'reflink':
+            _reflink(source, temp)
+        else:
+            shutil.copy2(source, temp)
+        _publish(temp, destination)
+    except BaseException:
+        try:
+            temp.unlink()
+        except OSError:
+            pass
+        raise
+    os.unlink(source)
+
+
+def place_file(source: Path, destination: Path, mode: str = 'rename', fallback: bool = True) -> str:
+    """
+    Move a file to its destination with the cheapest strategy that works.
+    
+    The destination never appears partially written: reflink and copy build
+    the file under a temporary name in the destination folder and link or
+    rename it into place before the source is removed. An existing
+    destination is never replaced. Only errors meaning a strategy is not
+    possible here, such as a destination on another filesystem, move on to
+    the next strategy; any other error is raised straight away.
+    
+    Args:
+        source: File to move
+        destination: Final path of the file
+        mode: Preferred strategy, one of PLACEMENT_MODES
+        fallback: Try the more expensive strategies if the preferred one fails
+    
+    Returns:
+        Name of the strategy that placed the file
+    
+    Raises:
+        FileExistsError: If the destination already exists
+        OSError: If no strategy could place the file, or placing failed
+            for another reason than an unsupported strategy
+    """
+    if mode not in PLACEMENT_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(PLACEMENT_MODES)}")
+    
+    strategies = PLACEMENT_MODES[PLACEMENT_MODES.index(mode):] if fallback else (mode,)
+    error = None
+    for strategy in strategies:
+        try:
+            _place(Path(source), Path(destination), strategy)
+            return strategy
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            error = e
+    raise error
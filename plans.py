@@ -0,0 +1,184 @@
+"""
+SanitixPDF - Deduplication plans
+A plan is a JSON Lines file: a header describing the run that built it,
+then one line per action (keep, delete or move) with paths relative to the
+source folder, so it can be reviewed, moved to another host and applied
+there. Applying records a checkpoint next to the plan, which lets an
+interrupted run resume after the last checkpointed action.
+"""
+
+import os
+import gzip
+import json
+import socket
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterator, Tuple
+
+
+# Format version written to the plan header
+PLAN_VERSION = 1
+
+# Actions a plan can contain, in the order they are applied
+PLAN_ACTIONS = ('keep', 'delete', 'move')
+
+
+def _open(path: Path, mode: str, compressed: bool):
+    """Open a plan file as text, gzip-compressed or not."""
+    if compressed:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _dumps(record: Dict) -> str:
+    """Serialize a record compactly."""
+    return json.dumps(record, separators=(',', ':'), ensure_ascii=False)
+
+
+class PlanWriter:
+    """
+    Writes a plan one action at a time.
+    
+    The plan is written under a temporary name and only renamed into place
+    by close(), so a plan file that exists is always complete.
+    """
+    
+    def __init__(self, path, **header):
+        """
+        Start a plan.
+        
+        Args:
+            path: Plan file to write; a .gz suffix compresses it
+            header: Settings of the run, stored in the header line
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._temp = self.path.with_name(f".{self.path.name}.tmp")
+        self._file = _open(self._temp, 'w', compressed=self.path.suffix == '.gz')
+        self.count = 0
+        header = dict(header, type='plan', version=PLAN_VERSION, host=socket.gethostname(),
+                      created_at=datetime.now().isoformat())
+        self._file.write(_dumps(header) + '\n')
+    
+    def add(self, action: str, path: str, **fields):
+        """
+        Append an action.
+        
+        Args:
+            action: One of PLAN_ACTIONS
+            path: File the action applies to, relative to the source folder
+            fields: Further attributes of the action (size, digest, keep, name)
+        """
+        if action not in PLAN_ACTIONS:
+            raise ValueError(f"action must be one of: {', '.join(PLAN_ACTIONS)}")
+        self.count += 1
+        record = {'seq': self.count, 'action': action, 'path': path}
+        record.update((key, value) for key, value in fields.items() if value is not None)
+        self._file.write(_dumps(record) + '\n')
+    
+    def close(self):
+        """Finish the plan and move it into place."""
+        self._file.close()
+        os.replace(self._temp, self.path)
+    
+    def abort(self):
+        """Discard a partly written plan."""
+        self._file.close()
+        self._temp.unlink(missing_ok=True)
+    
+    def __enter__(self):
+        """Return the writer for use in a with block."""
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        """Finish the plan, or discard it if the block raised."""
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_plan(path) -> Tuple[Dict, str, Iterator[Dict]]:
+    """
+    Open a plan for streaming.
+    
+    Args:
+        path: Plan file
+    
+    Returns:
+        Tuple of (header, identifier of the plan, iterator over its actions)
+    
+    Raises:
+        ValueError: If the file is not a plan of a supported version
+    """
+    path = Path(path)
+    plan_file = _open(path, 'r', compressed=path.suffix == '.gz')
+    first = plan_file.readline()
+    try:
+        header = json.loads(first)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get('type') != 'plan':
+        plan_file.close()
+        raise ValueError(f"{path} is not a deduplication plan")
+    if header.get('version') != PLAN_VERSION:
+        plan_file.close()
+        raise ValueError(f"Unsupported plan version: {header.get('version')}")
+    
+    def actions() -> Iterator[Dict]:
+        with plan_file:
+            for line in plan_file:
+                if line.strip():
+                    yield json.loads(line)
+    
+    return header, hashlib.sha1(first.encode('utf-8')).hexdigest(), actions()
+
+
+class Checkpoint:
+    """Progress of applying one plan, stored next to the plan file."""
+    
+    def __init__(self, plan_path, plan_id: str):
+        """
+        Load the checkpoint of a plan, if it has one.
+        
+        A checkpoint left by a different plan written to the same path is
+        ignored.
+        
+        Args:
+            plan_path: Plan file
+            plan_id: Identifier returned by read_plan
+        """
+        plan_path = Path(plan_path)
+        self.path = plan_path.with_name(plan_path.name + '.checkpoint')
+        self.plan_id = plan_id
+        self.seq = 0
+        self.stats = {}
+        self.complete = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if state.get('plan') == plan_id:
+            self.seq = state['seq']
+            self.stats = state.get('stats', {})
+            self.complete = state.get('complete', False)
+    
+    def save(self, seq: int, stats: Dict, complete: bool = False):
+        """
+        Durably record that every action up to seq was applied.
+        
+        Args:
+            seq: Sequence number of the last applied action
+            stats: Counters of the apply so far
+            complete: Whether the whole plan was applied
+        """
+        self.seq, self.stats, self.complete = seq, dict(stats), complete
+        temp = self.path.with_name(self.path.name + '.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'plan': self.plan_id, 'seq': seq, 'stats': self.stats, 'complete': complete,
+                       'updated_at': datetime.now().isoformat()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
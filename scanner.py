@@ -0,0 +1,140 @@
+"""
+SanitixPDF - Folder scanner
+Walks a folder once with os.scandir and records every PDF in a manifest
+that the rest of the pipeline reuses instead of listing the folder again.
+"""
+
+import os
+import fnmatch
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional
+
+
+# How symbolic links are treated during a scan:
+#   follow - include linked files and descend into linked directories
+#   files  - include linked files but do not descend into linked directories
+#   skip   - ignore every symbolic link
+SYMLINK_POLICIES = ('follow', 'files', 'skip')
+
+DEFAULT_INCLUDE = ('*.pdf',)
+
+
+class ManifestEntry(NamedTuple):
+    """A PDF found by a scan, with the stat fields the pipeline needs."""
+    path: Path
+    size: int
+    mtime_ns: int
+    inode: int
+    alias: Optional[str] = None  # Listed name of a stored blob
+    
+    @property
+    def name(self) -> str:
+        """Name the file is listed under."""
+        return self.alias or self.path.name
+
+
+def _matches(relative_path: str, name: str, patterns: Iterable[str]) -> bool:
+    """Check a file against glob patterns, ignoring case."""
+    relative_path = relative_path.lower()
+    name = name.lower()
+    for pattern in patterns:
+        pattern = pattern.lower()
+        if fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(relative_path, pattern):
+            return True
+    return False
+
+
+def is_selected(path, folder, include: Iterable[str] = None,
+                exclude: Iterable[str] = None) -> bool:
+    """
+    Check whether a scan of a folder would pick up one file.
+    
+    Applies the same patterns as scan_pdfs, including exclude patterns
+    matching any folder on the way to the file.
+    
+    Args:
+        path: File inside the folder
+        folder: Folder the patterns are relative to
+        include: Glob patterns a file must match (default: *.pdf)
+        exclude: Glob patterns that drop a file or subfolder
+    
+    Returns:
+        True if the file is selected
+    """
+    parts = Path(path).relative_to(folder).parts
+    if exclude:
+        for depth in range(1, len(parts) + 1):
+            if _matches('/'.join(parts[:depth]), parts[depth - 1], exclude):
+                return False
+    return _matches('/'.join(parts), parts[-1], tuple(include or DEFAULT_INCLUDE))
+
+
+def scan_pdfs(folder, recursive: bool = False, include: Iterable[str] = None,
+              exclude: Iterable[str] = None, symlinks: str = 'files',
+              skip_dirs: Iterable = ()) -> List[ManifestEntry]:
+    """
+    List the PDFs in a folder in a single pass.
+    
+    Patterns are matched case-insensitively against both the file name and
+    the path relative to the scanned folder, so '*.pdf' also finds '.PDF'
+    and '.Pdf' files.
+    
+    Args:
+        folder: Folder to scan
+        recursive: Descend into subfolders
+        include: Glob patterns a file must match (default: *.pdf)
+        exclude: Glob patterns that drop a file or subfolder
+        symlinks: Symbolic link policy, one of SYMLINK_POLICIES
+        skip_dirs: Folders never descended into, such as the final folder
+    
+    Returns:
+        Manifest entries sorted by path
+    """
+    if symlinks not in SYMLINK_POLICIES:
+        raise ValueError(f"symlinks must be one of: {', '.join(SYMLINK_POLICIES)}")
+    
+    include = tuple(include or DEFAULT_INCLUDE)
+    exclude = tuple(exclude or ())
+    root = Path(folder)
+    skipped = {os.path.abspath(path) for path in skip_dirs}
+    visited = set()
+    manifest = []
+    
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            directory_stat = directory.stat()
+        except OSError:
+            continue
+        if (directory_stat.st_dev, directory_stat.st_ino) in visited:
+            continue
+        visited.add((directory_stat.st_dev, directory_stat.st_ino))
+        
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                is_link = entry.is_symlink()
+                if is_link and symlinks == 'skip':
+                    continue
+                
+                path = Path(entry.path)
+                relative_path = path.relative_to(root).as_posix()
+                if exclude and _matches(relative_path, entry.name, exclude):
+                    continue
+                
+                try:
+                    if entry.is_dir():
+                        if (recursive and not (is_link and symlinks == 'files')
+                                and os.path.abspath(path) not in skipped):
+                            pending.append(path)
+                        continue
+                    if not entry.is_file() or not _matches(relative_path, entry.name, include):
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                
+                manifest.append(ManifestEntry(path, stat.st_size, stat.st_mtime_ns, stat.st_ino))
+    
+    manifest.sort()
+    return manifest
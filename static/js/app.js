@@ -1,6 +1,7 @@
 // Global state
 let uploadInterval = null;
 let statusInterval = null;
+let currentJobId = null;
 
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', function() {
@@ -39,47 +40,129 @@ function initializeUpload() {
     });
 }
 
+// Bytes sent per request; a failed request only costs one chunk
+const UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024;
+const UPLOAD_MAX_RETRIES = 5;
+
 async function handleFiles(files) {
-    const uploadedFilesDiv = document.getElementById('uploadedFiles');
     const progressDiv = document.getElementById('uploadProgress');
     
+    files = files.filter(f => f.name.toLowerCase().endsWith('.pdf'));
+    if (files.length === 0) {
+        return;
+    }
+    
     progressDiv.classList.remove('hidden');
     progressDiv.innerHTML = '<p>Uploading files...</p>';
     
-    for (let i = 0; i < files.length; i++) {
-        const file = files[i];
-        const formData = new FormData();
-        formData.append('file', file);
+    try {
+        // One session for the whole batch; its files are sent as one stream
+        const response = await fetch('/api/uploads', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ files: files.map(f => ({ name: f.name, size: f.size })) })
+        });
+        const session = await response.json();
+        if (!response.ok) {
+            throw new Error(session.error);
+        }
+        
+        await sendUploadStream(session.session_id, files, session.offset, progressDiv);
+        
+        const finalizeResponse = await fetch(`/api/uploads/${session.session_id}/finalize`, {
+            method: 'POST'
+        });
+        const data = await finalizeResponse.json();
+        if (!finalizeResponse.ok) {
+            throw new Error(data.error);
+        }
         
+        data.results.forEach(result => showUploadResult(files[result.index], result));
+    } catch (error) {
+        showNotification(`Error uploading files: ${error.message}`, 'error');
+    }
+    
+    progressDiv.classList.add('hidden');
+    loadStats();
+}
+
+// Return the bytes [start, end) of the files laid end to end
+function uploadStreamSlice(files, start, end) {
+    const parts = [];
+    let fileStart = 0;
+    for (const file of files) {
+        const fileEnd = fileStart + file.size;
+        if (fileEnd > start && fileStart < end) {
+            parts.push(file.slice(Math.max(start - fileStart, 0), Math.min(end, fileEnd) - fileStart));
+        }
+        fileStart = fileEnd;
+    }
+    return new Blob(parts);
+}
+
+async function sendUploadStream(sessionId, files, offset, progressDiv) {
+    const total = files.reduce((sum, f) => sum + f.size, 0);
+    let retries = 0;
+    
+    while (offset < total) {
+        const end = Math.min(offset + UPLOAD_CHUNK_SIZE, total);
         try {
-            const response = await fetch('/api/upload', {
-                method: 'POST',
-                body: formData
+            const response = await fetch(`/api/uploads/${sessionId}`, {
+                method: 'PUT',
+                headers: { 'Content-Range': `bytes ${offset}-${end - 1}/${total}` },
+                body: uploadStreamSlice(files, offset, end)
             });
-            
             const data = await response.json();
-            
-            if (response.ok) {
-                const fileItem = document.createElement('div');
-                fileItem.className = 'uploaded-file-item';
-                fileItem.innerHTML = `
-                    <div>
-                        <i class="fas fa-check-circle"></i>
-                        <span>${data.filename}</span>
-                    </div>
-                    <span>${formatFileSize(file.size)}</span>
-                `;
-                uploadedFilesDiv.appendChild(fileItem);
-            } else {
-                showNotification(`Error uploading ${file.name}: ${data.error}`, 'error');
+            if (!response.ok && response.status !== 409) {
+                throw new Error(data.error);
             }
+            // On 409 the server says where to resume
+            offset = data.offset;
+            retries = 0;
         } catch (error) {
-            showNotification(`Error uploading ${file.name}: ${error.message}`, 'error');
+            if (++retries > UPLOAD_MAX_RETRIES) {
+                throw error;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+            try {
+                const status = await (await fetch(`/api/uploads/${sessionId}`)).json();
+                offset = status.offset;
+            } catch (statusError) {
+                // Still offline; retry the same chunk
+            }
         }
+        progressDiv.innerHTML = `<p>Uploading files... ${Math.round(offset / total * 100)}%</p>`;
     }
+}
+
+function showUploadResult(file, result) {
+    const uploadedFilesDiv = document.getElementById('uploadedFiles');
     
-    progressDiv.classList.add('hidden');
-    loadStats();
+    if (result.error) {
+        showNotification(`Error uploading ${file.name}: ${result.error}`, 'error');
+        return;
+    }
+    
+    const fileItem = document.createElement('div');
+    fileItem.className = 'uploaded-file-item';
+    if (result.duplicate_of) {
+        fileItem.innerHTML = `
+            <div>
+                <i class="fas fa-clone"></i>
+                <span>${file.name} (duplicate of ${result.duplicate_of}, skipped)</span>
+            </div>
+            <span>${formatFileSize(file.size)}</span>
+        `;
+    } else {
+        fileItem.innerHTML = `
+            <div>
+                <i class="fas fa-check-circle"></i>
+                <span>${result.filename}</span>
+            </div>
+            <span>${formatFileSize(file.size)}</span>
+        `;
+    }
+    uploadedFilesDiv.appendChild(fileItem);
 }
 
 // Processing
@@ -92,16 +175,27 @@ async function startProcessing() {
     statusDiv.classList.remove('hidden');
     
     try {
-        const response = await fetch('/api/process', {
+        const response = await fetch('/api/jobs', {
             method: 'POST'
         });
         
         const data = await response.json();
         
-        if (response.ok) {
-            // Start polling for status
-            statusInterval = setInterval(checkProcessingStatus, 1000);
-            checkProcessingStatus();
+        if (response.ok && data.skipped) {
+            // Every upload was a duplicate, so there is nothing to process
+            showNotification(data.message, 'info');
+            statusDiv.classList.add('hidden');
+            processBtn.disabled = false;
+            processBtn.innerHTML = '<i class="fas fa-play"></i> Start Processing';
+        } else if (response.ok) {
+            // Follow the job, which may wait behind other jobs
+            currentJobId = data.job_id;
+            if (window.EventSource) {
+                watchJobEvents(currentJobId);
+            } else {
+                statusInterval = setInterval(checkProcessingStatus, 1000);
+                checkProcessingStatus();
+            }
         } else {
             showNotification(data.error || 'Failed to start processing', 'error');
             processBtn.disabled = false;
@@ -114,40 +208,88 @@ async function startProcessing() {
     }
 }
 
+function watchJobEvents(jobId) {
+    const source = new EventSource(`/api/jobs/${jobId}/events`);
+    
+    source.addEventListener('progress', function(event) {
+        showJobStatus(JSON.parse(event.data));
+    });
+    
+    source.addEventListener('done', function(event) {
+        source.close();
+        showJobStatus(JSON.parse(event.data));
+    });
+    
+    source.onerror = function() {
+        // Fall back to polling if the stream cannot be kept open
+        source.close();
+        statusInterval = setInterval(checkProcessingStatus, 1000);
+        checkProcessingStatus();
+    };
+}
+
 async function checkProcessingStatus() {
     try {
-        const response = await fetch('/api/status');
-        const status = await response.json();
-        
-        const progressBar = document.getElementById('progressBar');
-        const statusText = document.getElementById('statusText');
-        const processBtn = document.getElementById('processBtn');
+        const response = await fetch(`/api/jobs/${currentJobId}`);
+        const job = await response.json();
         
-        progressBar.style.width = status.progress + '%';
-        progressBar.textContent = status.progress + '%';
-        statusText.textContent = status.current_status || 'Processing...';
-        
-        if (status.stats) {
-            updateStatistics(status.stats);
-        }
-        
-        if (!status.is_processing) {
+        if (showJobStatus(job)) {
             clearInterval(statusInterval);
-            processBtn.disabled = false;
-            processBtn.innerHTML = '<i class="fas fa-play"></i> Start Processing';
-            
-            if (status.error) {
-                showNotification(`Error: ${status.error}`, 'error');
-            } else {
-                showNotification('Processing completed successfully!', 'success');
-                loadStats();
-            }
         }
     } catch (error) {
         console.error('Error checking status:', error);
     }
 }
 
+function formatDuration(seconds) {
+    if (seconds < 60) return `${seconds}s`;
+    if (seconds < 3600) return `${Math.floor(seconds / 60)}m ${seconds % 60}s`;
+    return `${Math.floor(seconds / 3600)}h ${Math.floor((seconds % 3600) / 60)}m`;
+}
+
+// Show a job snapshot; returns true once the job has finished
+function showJobStatus(job) {
+    const progressBar = document.getElementById('progressBar');
+    const statusText = document.getElementById('statusText');
+    const processBtn = document.getElementById('processBtn');
+    
+    progressBar.style.width = job.progress + '%';
+    progressBar.textContent = job.progress + '%';
+    if (job.state === 'queued' && job.position) {
+        statusText.textContent = `Queued (position ${job.position})`;
+    } else {
+        let text = job.current_status || 'Processing...';
+        if (job.state === 'running' && job.detail && job.detail.mb_per_s > 0) {
+            text += ` - ${job.detail.mb_per_s} MB/s`;
+            if (job.detail.eta_seconds !== null) {
+                text += `, about ${formatDuration(job.detail.eta_seconds)} left`;
+            }
+        }
+        statusText.textContent = text;
+    }
+    
+    if (job.stats) {
+        updateStatistics(job.stats);
+    }
+    
+    if (job.state === 'queued' || job.state === 'running') {
+        return false;
+    }
+    
+    processBtn.disabled = false;
+    processBtn.innerHTML = '<i class="fas fa-play"></i> Start Processing';
+    
+    if (job.state === 'failed') {
+        showNotification(`Error: ${job.error}`, 'error');
+    } else if (job.state === 'cancelled') {
+        showNotification('Processing was cancelled', 'info');
+    } else {
+        showNotification('Processing completed successfully!', 'success');
+        loadStats();
+    }
+    return true;
+}
+
 // Statistics
 async function loadStats() {
     try {
@@ -158,9 +300,9 @@ async function loadStats() {
         document.getElementById('sourceCount').textContent = data.source.count;
         document.getElementById('finalCount').textContent = data.final.count;
         
-        // Update file lists
-        updateFileList('sourceFileList', data.source.files, false);
-        updateFileList('finalFileList', data.final.files, true);
+        // Update file lists (first page of each folder)
+        updateFileList('sourceFileList', data.source, 'source');
+        updateFileList('finalFileList', data.final, 'final');
         
         // Update total PDFs stat
         document.getElementById('totalPdfs').textContent = data.source.count;
@@ -169,15 +311,8 @@ async function loadStats() {
     }
 }
 
-function updateFileList(listId, files, isFinal) {
-    const listDiv = document.getElementById(listId);
-    
-    if (files.length === 0) {
-        listDiv.innerHTML = '<p class="empty-message">No PDFs in this folder</p>';
-        return;
-    }
-    
-    listDiv.innerHTML = files.map(file => `
+function renderFileItems(files, isFinal) {
+    return files.map(file => `
         <div class="file-item">
             <div class="file-item-info">
                 <i class="fas fa-file-pdf file-item-icon"></i>
@@ -197,6 +332,37 @@ function updateFileList(listId, files, isFinal) {
     `).join('');
 }
 
+function renderMoreButton(listId, folder, cursor) {
+    if (!cursor) return '';
+    return `<button class="btn-more" onclick="loadMoreFiles('${listId}', '${folder}', '${cursor}', this)">Show more</button>`;
+}
+
+function updateFileList(listId, listing, folder) {
+    const listDiv = document.getElementById(listId);
+    
+    if (listing.files.length === 0) {
+        listDiv.innerHTML = '<p class="empty-message">No PDFs in this folder</p>';
+        return;
+    }
+    
+    listDiv.innerHTML = renderFileItems(listing.files, folder === 'final') +
+        renderMoreButton(listId, folder, listing.next_cursor);
+}
+
+async function loadMoreFiles(listId, folder, cursor, button) {
+    try {
+        const response = await fetch(`/api/stats?folder=${folder}&cursor=${encodeURIComponent(cursor)}`);
+        const data = await response.json();
+        const listing = data[folder];
+        
+        button.insertAdjacentHTML('beforebegin', renderFileItems(listing.files, folder === 'final'));
+        button.insertAdjacentHTML('afterend', renderMoreButton(listId, folder, listing.next_cursor));
+        button.remove();
+    } catch (error) {
+        console.error('Error loading files:', error);
+    }
+}
+
 function updateStatistics(stats) {
     document.getElementById('totalPdfs').textContent = stats.total_pdfs || 0;
     document.getElementById('uniquePdfs').textContent = stats.unique_pdfs || 0;
@@ -256,6 +422,10 @@ function downloadFile(filename) {
     window.open(`/api/download/${encodeURIComponent(filename)}`, '_blank');
 }
 
+function exportFinal() {
+    window.location.href = '/api/export?format=zip';
+}
+
 // Utility functions
 function formatFileSize(bytes) {
     if (bytes === 0) return '0 Bytes';
@@ -0,0 +1,134 @@
+"""
+Shared fixtures for the SanitixPDF test suite.
+"""
+
+import io
+import sys
+import time
+import shutil
+from pathlib import Path
+from typing import List
+
+import pytest
+
+# The application modules live at the top level of the repository
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def build_pdf(pages: List[str], producer: str = None) -> bytes:
+    """
+    Build a minimal PDF with one line of Helvetica text per page.
+    
+    Args:
+        pages: Text of each page
+        producer: Optional /Producer entry of the document information
+    
+    Returns:
+        Bytes of the PDF
+    """
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))}] "
+        f"/Count {len(pages)} >>".encode('ascii'),
+    ]
+    font = 3 + 2 * len(pages)
+    for number, text in enumerate(pages):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * number} 0 R "
+                       f"/Resources << /Font << /F1 {font} 0 R >> >> >>".encode('ascii'))
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    info = ''
+    if producer:
+        objects.append(f"<< /Producer ({producer}) >>".encode('latin-1'))
+        info = f" /Info {len(objects)} 0 R"
+    
+    output = io.BytesIO()
+    output.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n".encode('ascii') + body + b'\nendobj\n')
+    xref = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii'))
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode('ascii'))
+    output.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R{info} >>\n"
+                 f"startxref\n{xref}\n%%EOF\n".encode('ascii'))
+    return output.getvalue()
+
+
+@pytest.fixture
+def make_pdf():
+    """Return the PDF builder."""
+    return build_pdf
+
+
+@pytest.fixture
+def folders(tmp_path):
+    """Create empty source, final and logs folders."""
+    paths = {name: tmp_path / name for name in ('source', 'final', 'logs')}
+    for path in paths.values():
+        path.mkdir()
+    return paths
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """
+    Import the web app once, with every folder under a temporary directory.
+    
+    The source folder is scanned recursively, as with SCAN_RECURSIVE=true.
+    The settings go through a SANITIXPDF_SETTINGS file, so the Config
+    classes are left as they are.
+    """
+    base = tmp_path_factory.mktemp('app')
+    settings = {
+        'UPLOAD_FOLDER': str(base / 'source'),
+        'FINAL_FOLDER': str(base / 'final'),
+        'LOGS_FOLDER': str(base / 'logs'),
+        'HASH_INDEX_PATH': str(base / 'logs' / 'hash_index.db'),
+        'JOBS_DB_PATH': str(base / 'logs' / 'jobs.db'),
+        'SCAN_RECURSIVE': True
+    }
+    settings_file = base / 'settings.py'
+    settings_file.write_text(''.join(f"{key} = {value!r}\n" for key, value in settings.items()))
+    
+    patch = pytest.MonkeyPatch()
+    patch.setenv('SANITIXPDF_SETTINGS', str(settings_file))
+    try:
+        import app
+    finally:
+        patch.undo()
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    """Return a test client of the web app with empty source and final folders."""
+    for folder in (app_module.app.config['UPLOAD_FOLDER'], app_module.app.config['FINAL_FOLDER']):
+        for path in Path(folder).iterdir():
+            if path.name == '.staging':
+                continue
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+    app_module.reset_workspace_digests()
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def wait_for_job(client):
+    """Return a function that polls a job until it reaches a final state."""
+    from jobs import FINAL_STATES
+    
+    def wait(job_id: str, timeout: float = 30.0) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            job = client.get(f"/api/jobs/{job_id}").get_json()
+            if job['state'] in FINAL_STATES or time.monotonic() > deadline:
+                return job
+            time.sleep(0.05)
+    
+    return wait
@@ -0,0 +1,66 @@
+"""
+Tests for the web app's folder listings and job submission.
+"""
+
+import io
+from pathlib import Path
+
+
+def test_jobs_and_stats_see_pdfs_in_subfolders(app_module, client, make_pdf, wait_for_job):
+    nested = Path(app_module.app.config['UPLOAD_FOLDER']) / 'batch'
+    nested.mkdir()
+    (nested / 'a.pdf').write_bytes(make_pdf(['alpha']))
+    (nested / 'b.pdf').write_bytes(make_pdf(['alpha']))
+    
+    stats = client.get('/api/stats').get_json()
+    assert stats['source']['count'] == 2
+    
+    response = client.post('/api/jobs', json={})
+    assert response.status_code == 202
+    job = wait_for_job(response.get_json()['job_id'])
+    assert job['state'] == 'completed'
+    assert job['stats']['duplicates_removed'] == 1
+
+
+def upload(client, name, data):
+    return client.post('/api/upload', data={'file': (io.BytesIO(data), name)},
+                       content_type='multipart/form-data')
+
+
+def test_upload_is_hashed_while_spooled_and_duplicates_are_discarded(app_module, client, make_pdf):
+    source = Path(app_module.app.config['UPLOAD_FOLDER'])
+    data = make_pdf(['alpha'])
+    
+    first = upload(client, 'a.pdf', data).get_json()
+    second = upload(client, 'copy.pdf', data).get_json()
+    rejected = upload(client, 'notes.txt', b'not a pdf')
+    
+    assert first['filename'] == 'a.pdf'
+    assert (source / 'a.pdf').read_bytes() == data
+    assert second['filename'] is None
+    assert second['duplicate_of'] == 'a.pdf'
+    assert rejected.status_code == 400
+    assert sorted(path.name for path in source.iterdir() if path.is_file()) == ['a.pdf']
+
+
+def test_workspace_digests_are_built_without_holding_the_workspace_lock(app_module, client, make_pdf,
+                                                                         monkeypatch):
+    load = app_module.load_workspace_digests
+    
+    def load_unlocked():
+        assert app_module.workspace_lock.acquire(blocking=False)
+        app_module.workspace_lock.release()
+        return load()
+    
+    monkeypatch.setattr(app_module, 'load_workspace_digests', load_unlocked)
+    assert upload(client, 'a.pdf', make_pdf(['alpha'])).get_json()['filename'] == 'a.pdf'
+
+
+def test_delete_removes_a_file_from_the_final_folder(app_module, client, make_pdf):
+    final = Path(app_module.app.config['FINAL_FOLDER'])
+    (final / 'a.pdf').write_bytes(make_pdf(['alpha']))
+    
+    assert client.delete('/api/files/a.pdf').status_code == 200
+    assert not (final / 'a.pdf').exists()
+    assert client.delete('/api/files/a.pdf').status_code == 404
+    assert client.delete('/api/files/..%2Fapp.py').status_code == 404
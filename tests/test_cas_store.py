@@ -0,0 +1,94 @@
+"""
+Tests for the content-addressable final folder.
+"""
+
+from cas_store import CasStore
+from duplicate_pdf_detector import DuplicatePDFDetector
+
+
+def run_batch(folders, files):
+    for name, data in files.items():
+        (folders['source'] / name).write_bytes(data)
+    detector = DuplicatePDFDetector(str(folders['source']), str(folders['final']),
+                                    log_folder=str(folders['logs']), storage='cas')
+    detector.process()
+    detector.store.close()
+    return detector.stats
+
+
+def test_put_of_stored_content_deletes_the_source_without_a_new_name(tmp_path, make_pdf):
+    store = CasStore(tmp_path / 'final')
+    data = make_pdf(['alpha'])
+    for name in ('a.pdf', 'b.pdf'):
+        (tmp_path / name).write_bytes(data)
+    
+    assert store.put(tmp_path / 'a.pdf', 'a.pdf')[0] == 'a.pdf'
+    assert store.put(tmp_path / 'b.pdf', 'b.pdf') == ('a.pdf', None)
+    
+    assert not (tmp_path / 'b.pdf').exists()
+    assert not (tmp_path / 'final' / 'b.pdf').exists()
+    assert [name for name, _ in store.entries()] == ['a.pdf']
+    store.close()
+
+
+def test_content_stored_by_an_earlier_batch_is_a_duplicate(folders, make_pdf):
+    run_batch(folders, {'a.pdf': make_pdf(['alpha']), 'b.pdf': make_pdf(['beta'])})
+    
+    stats = run_batch(folders, {'c.pdf': make_pdf(['alpha']), 'd.pdf': make_pdf(['delta'])})
+    
+    assert stats['duplicates_found'] == 1
+    assert stats['duplicates_removed'] == 1
+    assert stats['unique_pdfs'] == 1
+    assert not (folders['source'] / 'c.pdf').exists()
+    store = CasStore(folders['final'])
+    assert [name for name, _ in store.entries()] == ['a.pdf', 'b.pdf', 'd.pdf']
+    store.close()
+
+
+def test_names_live_in_the_catalog_and_blobs_go_with_their_last_name(tmp_path, make_pdf):
+    final = tmp_path / 'final'
+    store = CasStore(final)
+    for name, text in (('a.pdf', 'alpha'), ('b.pdf', 'beta')):
+        (tmp_path / name).write_bytes(make_pdf([text]))
+    (tmp_path / 'a2.pdf').write_bytes(make_pdf(['gamma']))
+    
+    store.put(tmp_path / 'a.pdf', 'a.pdf')
+    store.put(tmp_path / 'b.pdf', 'b.pdf')
+    assert store.put(tmp_path / 'a2.pdf', 'a.pdf')[0] == 'a_1.pdf'
+    
+    assert [path.name for path in final.iterdir()] == ['.cas']
+    manifest = store.manifest()
+    assert [entry.name for entry in manifest] == ['a.pdf', 'a_1.pdf', 'b.pdf']
+    assert manifest[0].path == store.resolve('a.pdf')
+    assert manifest[0].path.read_bytes() == make_pdf(['alpha'])
+    
+    blob = store.resolve('b.pdf')
+    assert store.remove('b.pdf')
+    assert not store.remove('b.pdf')
+    assert not blob.exists()
+    assert store.resolve('b.pdf') is None
+    assert store.connection.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 2
+    
+    (tmp_path / 'b.pdf').write_bytes(make_pdf(['delta']))
+    assert store.put(tmp_path / 'b.pdf', 'b.pdf')[0] == 'b.pdf'
+    store.close()
+
+
+def test_a_blob_is_kept_while_another_name_refers_to_it(tmp_path, make_pdf):
+    store = CasStore(tmp_path / 'final')
+    data = make_pdf(['alpha'])
+    (tmp_path / 'a.pdf').write_bytes(data)
+    name, _ = store.put(tmp_path / 'a.pdf', 'a.pdf')
+    digest = store.entries()[0][1]
+    
+    # Content whose blob went missing is stored again under a second name
+    store.resolve(name).unlink()
+    (tmp_path / 'b.pdf').write_bytes(data)
+    assert store.put(tmp_path / 'b.pdf', 'b.pdf', digest)[0] == 'b.pdf'
+    assert store.connection.execute("SELECT refs FROM blobs").fetchone()[0] == 2
+    
+    assert store.remove('a.pdf')
+    assert store.resolve('b.pdf').read_bytes() == data
+    assert store.remove('b.pdf')
+    assert not store.object_path(digest).exists()
+    store.close()
@@ -0,0 +1,72 @@
+"""
+Tests for pluggable digests and the fast prefilter.
+"""
+
+import pytest
+
+import duplicate_pdf_detector
+from digests import Fast64, digest_algorithm, digest_size, tag_digest
+from duplicate_pdf_detector import DuplicatePDFDetector
+
+
+def detector_for(folders, **options):
+    return DuplicatePDFDetector(str(folders['source']), str(folders['final']),
+                                log_folder=str(folders['logs']), **options)
+
+
+def test_fast64_is_incremental_and_tagged():
+    whole = Fast64(b'head and tail')
+    pieces = Fast64(b'head ')
+    pieces.update(b'and tail')
+    
+    assert whole.hexdigest() == pieces.hexdigest()
+    assert len(whole.hexdigest()) == 16 == 2 * digest_size('fast64')
+    assert digest_algorithm(tag_digest('fast64', whole.hexdigest())) == 'fast64'
+    assert digest_algorithm('0123abcd') is None
+
+
+def test_a_prefilter_collision_never_merges_different_files(folders, monkeypatch):
+    files = {'a.pdf': b'%PDF first', 'b.pdf': b'%PDF other', 'c.pdf': b'%PDF first'}
+    for name, data in files.items():
+        (folders['source'] / name).write_bytes(data)
+    # Every file gets the same prefilter digest, as in a fast64 collision
+    monkeypatch.setattr(duplicate_pdf_detector, 'hash_file_sample',
+                        lambda pdf_path, size, sample_size, algorithm: tag_digest(algorithm, '00' * 8))
+    
+    detector = detector_for(folders, prefilter_algorithm='fast64')
+    duplicates = detector.find_duplicates()
+    
+    assert detector.stats['fully_hashed'] == 3
+    assert [sorted(path.name for path in paths) for paths in duplicates.values()] == [['a.pdf', 'c.pdf']]
+    assert all(digest_algorithm(key) == 'sha256' for key in duplicates)
+
+
+def test_fast64_cannot_decide_duplicates(folders):
+    with pytest.raises(ValueError):
+        detector_for(folders, digest_algorithm='fast64')
+
+
+def test_cached_digests_of_another_algorithm_are_recomputed(folders, monkeypatch):
+    for name in ('a.pdf', 'b.pdf'):
+        (folders['source'] / name).write_bytes(b'%PDF same content')
+    hashed = []
+    original = duplicate_pdf_detector.hash_file
+    monkeypatch.setattr(duplicate_pdf_detector, 'hash_file',
+                        lambda pdf_path, *args: hashed.append(args[-1]) or original(pdf_path, *args))
+    index_path = str(folders['logs'] / 'index.db')
+    
+    def run(algorithm):
+        hashed.clear()
+        detector = detector_for(folders, index_path=index_path, digest_algorithm=algorithm)
+        duplicates = detector.find_duplicates()
+        detector.index.close()
+        return list(duplicates), list(hashed)
+    
+    keys, used = run('sha256')
+    assert used == ['sha256', 'sha256']
+    assert run('sha256') == (keys, [])
+    
+    keys, used = run('blake2b')
+    assert used == ['blake2b', 'blake2b']
+    assert [digest_algorithm(key) for key in keys] == ['blake2b']
+    assert run('blake2b') == (keys, [])
@@ -0,0 +1,87 @@
+"""
+Tests for streamed exports of the final folder.
+"""
+
+import io
+import tarfile
+from pathlib import Path
+
+from export import TarLayout
+from scanner import scan_pdfs
+
+
+def fill_final(app_module, make_pdf, count=3):
+    final = Path(app_module.app.config['FINAL_FOLDER'])
+    for number in range(count):
+        (final / f"doc{number}.pdf").write_bytes(make_pdf([f"page {number}"] * (number + 1)))
+    return final
+
+
+def test_every_range_of_the_tar_layout_matches_the_whole_archive(tmp_path, make_pdf):
+    for number in range(3):
+        (tmp_path / f"doc{number}.pdf").write_bytes(make_pdf([f"page {number}"]))
+    layout = TarLayout(scan_pdfs(tmp_path), tmp_path)
+    whole = b''.join(layout.iter_range(0, None, 100))
+    
+    assert len(whole) == layout.size
+    with tarfile.open(fileobj=io.BytesIO(whole)) as archive:
+        assert sorted(archive.getnames()) == ['doc0.pdf', 'doc1.pdf', 'doc2.pdf']
+        assert archive.extractfile('doc1.pdf').read() == (tmp_path / 'doc1.pdf').read_bytes()
+    for start in range(0, layout.size, 97):
+        for end in (start, start + 511, start + 1500, layout.size - 1):
+            end = min(end, layout.size - 1)
+            assert b''.join(layout.iter_range(start, end, 64)) == whole[start:end + 1]
+
+
+def test_interrupted_tar_download_resumes_with_a_range_request(app_module, client, make_pdf):
+    fill_final(app_module, make_pdf)
+    full = client.get('/api/export?format=tar')
+    assert full.status_code == 200
+    assert int(full.headers['Content-Length']) == len(full.data)
+    
+    cut = len(full.data) // 3
+    rest = client.get('/api/export?format=tar', headers={
+        'Range': f"bytes={cut}-", 'If-Range': full.headers['ETag']
+    })
+    
+    assert rest.status_code == 206
+    assert rest.headers['Content-Range'] == f"bytes {cut}-{len(full.data) - 1}/{len(full.data)}"
+    assert full.data[:cut] + rest.data == full.data
+
+
+def test_tar_range_is_ignored_when_the_archive_changed(app_module, client, make_pdf):
+    final = fill_final(app_module, make_pdf)
+    etag = client.get('/api/export?format=tar').headers['ETag']
+    (final / 'new.pdf').write_bytes(make_pdf(['new']))
+    
+    response = client.get('/api/export?format=tar', headers={'Range': 'bytes=100-', 'If-Range': etag})
+    
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_tar_range_is_ignored_for_a_date_or_weak_if_range(app_module, client, make_pdf):
+    fill_final(app_module, make_pdf)
+    full = client.get('/api/export?format=tar')
+    
+    for validator in ('Sat, 01 Jan 2000 00:00:00 GMT', 'Fri, 01 Jan 2100 00:00:00 GMT',
+                      'W/' + full.headers['ETag']):
+        response = client.get('/api/export?format=tar', headers={'Range': 'bytes=100-', 'If-Range': validator})
+        
+        assert response.status_code == 200
+        assert response.data == full.data
+
+
+def test_unsatisfiable_tar_range_is_refused_and_multiple_ranges_are_ignored(app_module, client, make_pdf):
+    fill_final(app_module, make_pdf)
+    full = client.get('/api/export?format=tar')
+    size = len(full.data)
+    
+    past_end = client.get('/api/export?format=tar', headers={'Range': f"bytes={size}-"})
+    several = client.get('/api/export?format=tar', headers={'Range': 'bytes=0-9,20-29'})
+    
+    assert past_end.status_code == 416
+    assert past_end.headers['Content-Range'] == f"bytes */{size}"
+    assert several.status_code == 200
+    assert 'Content-Range' not in several.headers
+    assert several.data == full.data
@@ -0,0 +1,63 @@
+"""
+Tests for compact record grouping.
+"""
+
+import random
+
+import pytest
+
+from duplicate_pdf_detector import DuplicatePDFDetector
+from grouping import RecordGrouper
+
+
+def collect(grouper):
+    return [(key, ids) for key, ids in grouper.groups()]
+
+
+def test_spilled_runs_merge_into_the_same_groups_as_in_memory():
+    generator = random.Random(7)
+    records = [(generator.randrange(500).to_bytes(4, 'big'), file_id) for file_id in range(5000)]
+    generator.shuffle(records)
+    
+    with RecordGrouper(4) as in_memory, RecordGrouper(4, memory_budget=2000) as spilling:
+        for key, file_id in records:
+            in_memory.add(key, file_id)
+            spilling.add(key, file_id)
+        
+        assert in_memory.spilled_runs == 0
+        assert spilling.spilled_runs > 10
+        assert collect(spilling) == collect(in_memory)
+
+
+def test_groups_come_out_in_key_order_with_ids_ascending():
+    with RecordGrouper(2, memory_budget=1) as grouper:
+        for key, file_id in [(b'bb', 3), (b'aa', 2), (b'bb', 1), (b'aa', 0)]:
+            grouper.add(key, file_id)
+        
+        assert collect(grouper) == [(b'aa', [0, 2]), (b'bb', [1, 3])]
+
+
+def test_keys_of_the_wrong_size_are_rejected():
+    with RecordGrouper(4) as grouper:
+        with pytest.raises(ValueError):
+            grouper.add(b'abc', 0)
+
+
+@pytest.mark.parametrize('hash_mode', ['content', 'text'])
+def test_detector_finds_the_same_groups_when_grouping_spills(folders, make_pdf, hash_mode):
+    for number in range(12):
+        (folders['source'] / f"{number:02d}.pdf").write_bytes(make_pdf([f"text {number % 5}"]))
+    
+    def groups(memory_budget):
+        detector = DuplicatePDFDetector(str(folders['source']), str(folders['final']),
+                                        log_folder=str(folders['logs']), hash_mode=hash_mode,
+                                        memory_budget=memory_budget)
+        found = sorted(sorted(path.name for path in paths) for paths in detector.find_duplicates().values())
+        return found, detector.stats['spilled_runs']
+    
+    in_memory, _ = groups(256 * 1024 * 1024)
+    spilled, runs = groups(1)
+    
+    assert runs > 0
+    assert spilled == in_memory
+    assert len(in_memory) == 5
@@ -0,0 +1,93 @@
+"""
+Tests for the persistent hash index.
+"""
+
+import os
+import sys
+
+import duplicate_pdf_detector
+from duplicate_pdf_detector import DuplicatePDFDetector
+from hash_index import HashIndex
+
+
+def spy(monkeypatch, name):
+    """Record the name of every file a module-level hash function reads."""
+    calls = []
+    original = getattr(duplicate_pdf_detector, name)
+    
+    def recording(pdf_path, *args):
+        calls.append(pdf_path.name)
+        return original(pdf_path, *args)
+    
+    monkeypatch.setattr(duplicate_pdf_detector, name, recording)
+    return calls
+
+
+def write_copies(folder, names, data):
+    for name in names:
+        (folder / name).write_bytes(data)
+
+
+def test_unchanged_files_are_not_hashed_again(folders, monkeypatch):
+    write_copies(folders['source'], ['a.pdf', 'b.pdf', 'c.pdf'], b'%PDF same content')
+    sampled = spy(monkeypatch, 'hash_file_sample')
+    hashed = spy(monkeypatch, 'hash_file')
+    index_path = str(folders['logs'] / 'index.db')
+    
+    def run():
+        detector = DuplicatePDFDetector(str(folders['source']), str(folders['final']),
+                                        log_folder=str(folders['logs']), index_path=index_path)
+        groups = detector.find_duplicates()
+        detector.index.close()
+        return detector, groups
+    
+    first, groups = run()
+    assert sorted(hashed) == ['a.pdf', 'b.pdf', 'c.pdf']
+    assert first.stats['index_hits'] == 0
+    
+    sampled.clear()
+    hashed.clear()
+    second, cached_groups = run()
+    assert sampled == hashed == []
+    assert second.stats['index_hits'] == 6  # sample and full digest of three files
+    assert cached_groups == groups
+    
+    # A modified file is hashed again, even with the same size
+    path = folders['source'] / 'b.pdf'
+    path.write_bytes(b'%PDF sane content')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    sampled.clear()
+    hashed.clear()
+    third, groups = run()
+    assert sampled == ['b.pdf']
+    assert hashed == []
+    assert [sorted(path.name for path in paths) for paths in groups.values()] == [['a.pdf', 'c.pdf']]
+    assert third.stats['index_hits'] == 4
+    
+    # Entries of files that vanished are pruned
+    (folders['source'] / 'c.pdf').unlink()
+    run()
+    index = HashIndex(index_path, str(folders['source']))
+    paths = [path for (path,) in index.connection.execute("SELECT path FROM files")]
+    assert sorted(os.path.basename(path) for path in paths) == ['a.pdf', 'b.pdf']
+    index.close()
+
+
+def test_rebuild_index_option_hashes_every_file_again(folders, monkeypatch, tmp_path):
+    write_copies(folders['source'], ['a.pdf', 'b.pdf'], b'%PDF same content')
+    hashed = spy(monkeypatch, 'hash_file')
+    arguments = ['duplicate_pdf_detector.py', '--source', str(folders['source']),
+                 '--final', str(folders['final']), '--logs', str(folders['logs']),
+                 '--plan', str(tmp_path / 'plan.jsonl')]
+    
+    def run(*extra):
+        monkeypatch.setattr(sys, 'argv', arguments + list(extra))
+        hashed.clear()
+        duplicate_pdf_detector.main()
+        return sorted(hashed)
+    
+    assert run() == ['a.pdf', 'b.pdf']
+    assert run() == []
+    assert run('--rebuild-index') == ['a.pdf', 'b.pdf']
+    assert run() == []
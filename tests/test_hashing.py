@@ -0,0 +1,68 @@
+"""
+Tests for file hashing.
+"""
+
+import hashlib
+
+import pytest
+
+import duplicate_pdf_detector
+from duplicate_pdf_detector import DuplicatePDFDetector, hash_file
+
+
+@pytest.mark.parametrize('algorithm', ['sha256', 'blake2b'])
+def test_chunked_and_mapped_digests_equal_a_one_shot_digest(tmp_path, algorithm):
+    data = bytes(range(256)) * 100 + b'tail'
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(data)
+    expected = f"{algorithm}:{hashlib.new(algorithm, data).hexdigest()}"
+    
+    for chunk_size in (1, 7, 4096, len(data), 10 * len(data)):
+        assert hash_file(path, chunk_size, use_mmap=False, algorithm=algorithm) == expected
+        assert hash_file(path, chunk_size, use_mmap=True, algorithm=algorithm) == expected
+
+
+def test_empty_files_hash_with_and_without_mmap(tmp_path):
+    path = tmp_path / 'empty.pdf'
+    path.write_bytes(b'')
+    expected = f"sha256:{hashlib.sha256(b'').hexdigest()}"
+    
+    assert hash_file(path, 1024, use_mmap=False) == expected
+    assert hash_file(path, 1024, use_mmap=True) == expected
+
+
+@pytest.mark.parametrize('hash_mode, pool', [('content', 'ThreadPoolExecutor'),
+                                             ('text', 'ProcessPoolExecutor')])
+def test_worker_pools_find_the_same_groups_as_one_worker(folders, make_pdf, monkeypatch, hash_mode, pool):
+    for number in range(12):
+        data = make_pdf([f"document {number % 5}"], producer='Same tool')
+        (folders['source'] / f"doc{number:02d}.pdf").write_bytes(data)
+    # Same text as doc00.pdf in a different file
+    (folders['source'] / 'resaved.pdf').write_bytes(make_pdf(['document 0'], producer='Same tool') + b'\n')
+    
+    created = []
+    executor = getattr(duplicate_pdf_detector, pool)
+    
+    class RecordingExecutor(executor):
+        def __init__(self, *args, **kwargs):
+            created.append(kwargs.get('max_workers'))
+            super().__init__(*args, **kwargs)
+    
+    monkeypatch.setattr(duplicate_pdf_detector, pool, RecordingExecutor)
+    
+    def groups(workers):
+        detector = DuplicatePDFDetector(str(folders['source']), str(folders['final']),
+                                        log_folder=str(folders['logs']), workers=workers,
+                                        hash_mode=hash_mode)
+        duplicates = detector.find_duplicates()
+        return {key: sorted(path.name for path in paths) for key, paths in duplicates.items()}
+    
+    sequential = groups(1)
+    assert created == []
+    parallel = groups(4)
+    
+    assert created and set(created) == {4}
+    assert parallel == sequential
+    assert len(sequential) == 5
+    first_group = next(names for names in sequential.values() if 'doc00.pdf' in names)
+    assert ('resaved.pdf' in first_group) == (hash_mode == 'text')
@@ -0,0 +1,72 @@
+"""
+Tests for the Server-Sent Events stream of a job's progress.
+"""
+
+import json
+import threading
+from pathlib import Path
+
+
+def read_events(response):
+    """Yield (event, data) pairs of a text/event-stream response as they arrive."""
+    buffer = ''
+    for chunk in response.response:
+        buffer += chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        while '\n\n' in buffer:
+            block, buffer = buffer.split('\n\n', 1)
+            fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+            if fields:
+                yield fields.get('event', 'message'), json.loads(fields['data'])
+
+
+def test_events_report_every_file_and_end_with_done(app_module, client, make_pdf, monkeypatch):
+    source = Path(app_module.app.config['UPLOAD_FOLDER'])
+    for number in range(4):
+        (source / f"doc{number}.pdf").write_bytes(make_pdf([f"page {number}"]))
+    (source / 'copy.pdf').write_bytes(make_pdf(['page 0']))
+    monkeypatch.setitem(app_module.app.config, 'SSE_INTERVAL', 0)
+    
+    # Each report waits until the stream has sent it, so no report is merged into the next
+    reported = []
+    sent = threading.Semaphore(0)
+    handler = app_module.progress_handler
+    
+    def lockstep_handler(job):
+        on_progress = handler(job)
+        
+        def report(progress):
+            on_progress(progress)
+            reported.append((progress.stage, progress.files_done, progress.files_total))
+            sent.acquire(timeout=5)
+        
+        return report
+    
+    monkeypatch.setattr(app_module, 'progress_handler', lockstep_handler)
+    job_id = client.post('/api/jobs', json={}).get_json()['job_id']
+    response = client.get(f"/api/jobs/{job_id}/events", buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    
+    events = []
+    last = None
+    for event, snapshot in read_events(response):
+        events.append((event, snapshot))
+        detail = snapshot.get('detail')
+        if event == 'progress' and detail:
+            key = (detail['stage'], detail['files_done'], detail['files_total'])
+            if key != last:
+                last = key
+                sent.release()
+    
+    names = [event for event, _ in events]
+    assert names[-1] == 'done'
+    assert set(names[:-1]) == {'progress'}
+    assert events[-1][1]['state'] == 'completed'
+    assert events[-1][1]['stats']['duplicates_removed'] == 1
+    
+    streamed = [(snapshot['detail']['stage'], snapshot['detail']['files_done'], snapshot['detail']['files_total'])
+                for event, snapshot in events if event == 'progress' and snapshot.get('detail')]
+    assert [key for index, key in enumerate(streamed) if index == 0 or key != streamed[index - 1]] == reported
+    assert [key for key in reported if key[0] == 'move'] == [('move', n, 4) for n in range(1, 5)]
+    
+    progress = [snapshot['progress'] for _, snapshot in events]
+    assert progress == sorted(progress)
@@ -0,0 +1,103 @@
+"""
+Tests for the processing job queue and its store.
+"""
+
+import queue
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from jobs import Job, JobQueue, JobStore
+
+
+def wait_until_idle(job_queue, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job_queue.counts() != {'queued': 0, 'running': 0} and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def blocked_queue(tmp_path):
+    """Return a one-worker queue of two slots whose jobs run until released."""
+    release = threading.Event()
+    started = threading.Event()
+    
+    def target(job):
+        started.set()
+        release.wait(5)
+        job.check_cancelled()
+        return {'done': True}
+    
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    job_queue = JobQueue(target, store, workers=1, max_queued=2)
+    job_queue.started = started
+    job_queue.release = release
+    yield job_queue
+    release.set()
+    wait_until_idle(job_queue)
+    store.close()
+
+
+def test_queued_and_running_jobs_can_be_cancelled(blocked_queue):
+    running = blocked_queue.submit()
+    assert blocked_queue.started.wait(5)
+    waiting = blocked_queue.submit()
+    
+    assert blocked_queue.get(waiting.id)['position'] == 1
+    assert blocked_queue.cancel(waiting.id)['state'] == 'cancelled'
+    assert blocked_queue.cancel(running.id)['state'] == 'running'
+    
+    blocked_queue.release.set()
+    wait_until_idle(blocked_queue)
+    assert blocked_queue.get(running.id)['state'] == 'cancelled'
+    assert blocked_queue.store.load(waiting.id)['state'] == 'cancelled'
+
+
+def test_submit_refuses_jobs_once_the_queue_is_full(blocked_queue):
+    blocked_queue.submit()
+    assert blocked_queue.started.wait(5)
+    blocked_queue.submit()
+    blocked_queue.submit()
+    
+    with pytest.raises(queue.Full):
+        blocked_queue.submit()
+
+
+def test_full_queue_is_answered_with_503(app_module, client, make_pdf, blocked_queue, monkeypatch):
+    monkeypatch.setattr(app_module, 'job_queue', blocked_queue)
+    (Path(app_module.app.config['UPLOAD_FOLDER']) / 'a.pdf').write_bytes(make_pdf(['alpha']))
+    
+    accepted = client.post('/api/jobs', json={})
+    assert blocked_queue.started.wait(5)
+    statuses = [client.post('/api/jobs', json={}).status_code for _ in range(3)]
+    
+    assert accepted.status_code == 202
+    assert statuses == [202, 202, 503]
+    assert client.post('/api/process').get_json()['error'] == 'Too many jobs are waiting, try again later'
+
+
+def test_finished_jobs_survive_a_restart_and_unfinished_ones_fail(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    store = JobStore(path)
+    job_queue = JobQueue(lambda job: {'total_pdfs': 3}, store)
+    done = job_queue.submit({'mode': 'text'})
+    wait_until_idle(job_queue)
+    finished = job_queue.get(done.id)
+    left = Job('left-running')
+    left.state = 'running'
+    store.save(left)
+    store.close()
+    
+    reopened = JobStore(path)
+    restored = reopened.load(done.id)
+    interrupted = reopened.load('left-running')
+    reopened.close()
+    
+    assert restored['state'] == 'completed'
+    assert restored['options'] == {'mode': 'text'}
+    assert restored['stats'] == {'total_pdfs': 3}
+    assert restored['finished_at'] == finished['finished_at']
+    assert interrupted['state'] == 'failed'
+    assert interrupted['error'] == 'Interrupted by a server restart'
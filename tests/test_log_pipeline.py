@@ -0,0 +1,42 @@
+"""
+Tests for the queued logging pipeline.
+"""
+
+import sys
+import subprocess
+import textwrap
+from pathlib import Path
+
+# Logging is configured once per process, so each scenario runs in a fresh interpreter
+SCRIPT = textwrap.dedent("""
+    import sys
+    import logging
+    from concurrent.futures import ProcessPoolExecutor
+    sys.path.insert(0, {root!r})
+    from log_pipeline import configure_logging, shutdown_logging, worker_logging
+    
+    def warn(number):
+        logging.getLogger('worker').warning(f"worker warning {{number}}")
+        return number
+    
+    if __name__ == '__main__':
+        configure_logging({logs!r}, console=False)
+        initializer, initargs = worker_logging()
+        with ProcessPoolExecutor(max_workers=3, initializer=initializer, initargs=initargs) as executor:
+            list(executor.map(warn, range(6)))
+        logging.getLogger('parent').warning("parent warning")
+        shutdown_logging()
+""")
+
+
+def test_worker_process_records_reach_the_log_file(tmp_path):
+    root = str(Path(__file__).resolve().parent.parent)
+    script = tmp_path / 'pool.py'
+    script.write_text(SCRIPT.format(root=root, logs=str(tmp_path / 'logs')))
+    
+    subprocess.run([sys.executable, str(script)], check=True, timeout=60)
+    
+    log = next((tmp_path / 'logs').glob('*.log')).read_text()
+    for number in range(6):
+        assert f"worker warning {number}" in log
+    assert "parent warning" in log
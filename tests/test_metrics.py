@@ -0,0 +1,113 @@
+"""
+Tests for the Prometheus exposition of /metrics.
+"""
+
+import re
+from pathlib import Path
+
+SAMPLE = re.compile(r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(?P<labels>[^}]*)\})? (?P<value>\S+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_exposition(text):
+    """
+    Parse the text exposition format.
+    
+    Returns:
+        Tuple of (metric family name -> type, list of (name, labels, value))
+    """
+    types = {}
+    samples = []
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            types[name] = kind
+        elif line.startswith('#') or not line:
+            continue
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"Unparseable line: {line!r}"
+            labels = dict(LABEL.findall(match.group('labels') or ''))
+            samples.append((match.group('name'), labels, float(match.group('value'))))
+    return types, samples
+
+
+def family(name, types):
+    """Return the metric family a sample name belongs to."""
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and types.get(name[:-len(suffix)]) == 'histogram':
+            return name[:-len(suffix)]
+    return name
+
+
+def scrape(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    return parse_exposition(response.get_data(as_text=True))
+
+
+def total(samples, name, **labels):
+    """Return the sum of the samples of a name whose labels include the given ones."""
+    return sum(value for sample, sample_labels, value in samples
+               if sample == name and labels.items() <= sample_labels.items())
+
+
+def test_exposition_parses_and_histograms_are_complete(app_module, client, make_pdf, wait_for_job):
+    source = Path(app_module.app.config['UPLOAD_FOLDER'])
+    (source / 'a.pdf').write_bytes(make_pdf(['alpha']))
+    (source / 'b.pdf').write_bytes(make_pdf(['alpha']))
+    assert wait_for_job(client.post('/api/jobs', json={}).get_json()['job_id'])['state'] == 'completed'
+    
+    types, samples = scrape(client)
+    
+    assert types['sanitix_errors_total'] == 'counter'
+    assert types['sanitix_jobs_active'] == 'gauge'
+    assert types['sanitix_placement_seconds'] == 'histogram'
+    for name, _, _ in samples:
+        assert family(name, types) in types, f"{name} has no # TYPE line"
+    
+    checked = 0
+    for name, kind in types.items():
+        if kind != 'histogram':
+            continue
+        series = {}
+        for sample, labels, value in samples:
+            if family(sample, types) == name:
+                key = tuple(sorted((k, v) for k, v in labels.items() if k != 'le'))
+                series.setdefault(key, []).append((sample, labels, value))
+        for key, lines in series.items():
+            buckets = [value for sample, _, value in lines if sample == f"{name}_bucket"]
+            bounds = [labels['le'] for sample, labels, _ in lines if sample == f"{name}_bucket"]
+            count = [value for sample, _, value in lines if sample == f"{name}_count"]
+            assert [sample for sample, _, _ in lines if sample == f"{name}_sum"] == [f"{name}_sum"]
+            assert bounds[-1] == '+Inf'
+            assert buckets == sorted(buckets)
+            assert count == [buckets[-1]]
+            checked += 1
+    assert checked
+
+
+def test_counters_go_up_after_a_job(app_module, client, make_pdf, wait_for_job, monkeypatch):
+    source = Path(app_module.app.config['UPLOAD_FOLDER'])
+    _, before = scrape(client)
+    
+    (source / 'a.pdf').write_bytes(make_pdf(['alpha']))
+    (source / 'b.pdf').write_bytes(make_pdf(['alpha']))
+    (source / 'c.pdf').write_bytes(make_pdf(['gamma']))
+    assert wait_for_job(client.post('/api/jobs', json={}).get_json()['job_id'])['state'] == 'completed'
+    _, after = scrape(client)
+    
+    assert total(after, 'sanitix_placement_seconds_count') == total(before, 'sanitix_placement_seconds_count') + 2
+    assert total(after, 'sanitix_hash_seconds_per_mb_count') > total(before, 'sanitix_hash_seconds_per_mb_count')
+    
+    def broken(**kwargs):
+        raise RuntimeError('disk on fire')
+    
+    monkeypatch.setattr(app_module, 'DuplicatePDFDetector', broken)
+    (source / 'd.pdf').write_bytes(make_pdf(['delta']))
+    assert wait_for_job(client.post('/api/jobs', json={}).get_json()['job_id'])['state'] == 'failed'
+    _, failed = scrape(client)
+    
+    errors = dict(stage='job', type='RuntimeError')
+    assert total(failed, 'sanitix_errors_total', **errors) == total(after, 'sanitix_errors_total', **errors) + 1
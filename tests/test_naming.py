@@ -0,0 +1,42 @@
+"""
+Tests for allocating unique destination names.
+"""
+
+from naming import NameAllocator
+
+
+def test_conflicts_continue_after_the_highest_existing_counter(tmp_path):
+    for name in ('stem.pdf', 'stem_3.pdf', 'other.pdf'):
+        (tmp_path / name).write_bytes(b'')
+    names = NameAllocator(tmp_path, case_sensitive=True)
+    
+    assert names.allocate('stem.pdf') == tmp_path / 'stem_4.pdf'
+    assert names.allocate('stem.pdf') == tmp_path / 'stem_5.pdf'
+    assert names.allocate('stem_3.pdf') == tmp_path / 'stem_3_1.pdf'
+    assert names.allocate('new.pdf') == tmp_path / 'new.pdf'
+    assert names.allocate('new.pdf') == tmp_path / 'new_1.pdf'
+
+
+def test_a_released_name_can_be_allocated_again(tmp_path):
+    names = NameAllocator(tmp_path, existing=lambda: ['a.pdf'], case_sensitive=True)
+    assert names.allocate('b.pdf') == tmp_path / 'b.pdf'
+    
+    names.release('a.pdf')
+    
+    assert names.allocate('a.pdf') == tmp_path / 'a.pdf'
+    assert names.allocate('a.pdf') == tmp_path / 'a_1.pdf'
+
+
+def test_names_differing_only_in_case_conflict_on_case_insensitive_filesystems(tmp_path):
+    existing = ['A.pdf', 'STEM.PDF', 'STEM_3.PDF']
+    insensitive = NameAllocator(tmp_path, existing=lambda: existing, case_sensitive=False)
+    sensitive = NameAllocator(tmp_path, existing=lambda: existing, case_sensitive=True)
+    
+    assert insensitive.allocate('a.pdf') == tmp_path / 'a_1.pdf'
+    assert insensitive.allocate('stem.pdf') == tmp_path / 'stem_4.pdf'
+    assert insensitive.allocate('Stem.Pdf') == tmp_path / 'Stem_5.Pdf'
+    insensitive.release('A.PDF')
+    assert insensitive.allocate('a.pdf') == tmp_path / 'a.pdf'
+    
+    assert sensitive.allocate('a.pdf') == tmp_path / 'a.pdf'
+    assert sensitive.allocate('stem.pdf') == tmp_path / 'stem.pdf'
@@ -0,0 +1,69 @@
+"""
+Tests for MinHash/LSH near-duplicate grouping.
+"""
+
+import random
+
+import near_duplicates
+from near_duplicates import LSHIndex, estimate_similarity, group_near_duplicates, minhash_signature
+
+
+def test_candidate_pairs_include_every_pair_in_a_bucket():
+    index = LSHIndex(num_perm=8, threshold=0.5)
+    for key in ('a', 'b', 'c'):
+        index.add(key, tuple(range(8)))
+    
+    assert index.candidate_pairs() == {('a', 'b'), ('a', 'c'), ('b', 'c')}
+
+
+def test_groups_do_not_chain_below_the_threshold():
+    # A~B and B~C at 0.8, but A and C only share 0.6 of their signature
+    a = tuple(range(100))
+    b = a[:80] + tuple(range(1000, 1020))
+    c = a[:60] + tuple(range(2000, 2020)) + b[80:]
+    
+    groups = group_near_duplicates({'a': a, 'b': b, 'c': c}, threshold=0.75)
+    
+    assert groups == [(['a', 'b'], 0.8)]
+
+
+def test_every_member_reaches_the_threshold_against_the_representative():
+    base = tuple(range(100))
+    signatures = {f"doc{step}": base[:100 - 5 * step] + tuple(range(1000, 1000 + 5 * step))
+                  for step in range(6)}
+    
+    groups = group_near_duplicates(signatures, threshold=0.8)
+    
+    assert groups
+    for keys, score in groups:
+        assert score >= 0.8
+        assert keys == sorted(keys)
+
+
+def test_signature_similarity_tracks_jaccard_similarity():
+    generator = random.Random(7)
+    for size in (5, 40, 2000):
+        common = {generator.getrandbits(64) for _ in range(size)}
+        a = common | {generator.getrandbits(64) for _ in range(size // 3 + 1)}
+        b = common | {generator.getrandbits(64) for _ in range(size // 3 + 1)}
+        jaccard = len(a & b) / len(a | b)
+        
+        similarity = estimate_similarity(minhash_signature(a, 256), minhash_signature(b, 256))
+        
+        assert abs(similarity - jaccard) < 0.15
+        assert minhash_signature(a, 256) == minhash_signature(set(a), 256)
+
+
+def test_identical_signatures_enter_the_index_once(monkeypatch):
+    added = []
+    add = LSHIndex.add
+    monkeypatch.setattr(near_duplicates.LSHIndex, 'add',
+                        lambda self, key, signature: added.append(key) or add(self, key, signature))
+    copy = tuple(range(64))
+    signatures = {f"copy{number:04d}": copy for number in range(1000)}
+    signatures['near'] = copy[:60] + (100, 101, 102, 103)
+    
+    groups = group_near_duplicates(signatures, threshold=0.9)
+    
+    assert sorted(added) == ['copy0000', 'near']
+    assert groups == [(sorted(signatures), 60 / 64)]
@@ -0,0 +1,88 @@
+"""
+Tests for moving files into place with fallback strategies.
+"""
+
+import os
+import errno
+
+import pytest
+
+import placement
+from placement import PLACEMENT_MODES, place_file
+
+
+def unsupported(code):
+    def fail(*args, **kwargs):
+        raise OSError(code, os.strerror(code))
+    return fail
+
+
+def test_unsupported_strategies_fall_back_in_order_down_to_copy(tmp_path, monkeypatch):
+    source = tmp_path / 'a.pdf'
+    source.write_bytes(b'%PDF data')
+    destination = tmp_path / 'out' / 'b.pdf'
+    destination.parent.mkdir()
+    rename = os.rename
+    tried = []
+    
+    def record(name, code):
+        def fail(*args, **kwargs):
+            tried.append(name)
+            raise OSError(code, os.strerror(code))
+        return fail
+    
+    def rename_within_destination(src, dst):
+        if os.path.samefile(os.path.dirname(src), destination.parent):
+            return rename(src, dst)
+        return record('rename', errno.EXDEV)()
+    
+    monkeypatch.setattr(placement.os, 'rename', rename_within_destination)
+    monkeypatch.setattr(placement.os, 'link', record('hardlink', errno.EMLINK))
+    monkeypatch.setattr(placement, '_reflink', record('reflink', errno.ENOTSUP))
+    
+    assert place_file(source, destination) == 'copy'
+    assert tried[:3] == ['rename', 'hardlink', 'reflink']
+    assert destination.read_bytes() == b'%PDF data'
+    assert not source.exists()
+    assert list(destination.parent.iterdir()) == [destination]
+
+
+@pytest.mark.parametrize('mode', PLACEMENT_MODES)
+def test_an_existing_destination_is_never_replaced(tmp_path, mode):
+    source = tmp_path / 'a.pdf'
+    source.write_bytes(b'%PDF new')
+    destination = tmp_path / 'b.pdf'
+    destination.write_bytes(b'%PDF old')
+    
+    with pytest.raises(FileExistsError):
+        place_file(source, destination, mode)
+    
+    assert destination.read_bytes() == b'%PDF old'
+    assert source.read_bytes() == b'%PDF new'
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['a.pdf', 'b.pdf']
+
+
+def test_other_errors_are_raised_without_trying_other_strategies(tmp_path, monkeypatch):
+    source = tmp_path / 'a.pdf'
+    source.write_bytes(b'%PDF data')
+    monkeypatch.setattr(placement.os, 'rename', unsupported(errno.ENOSPC))
+    monkeypatch.setattr(placement.os, 'link', lambda *args: pytest.fail("hardlink was tried"))
+    
+    with pytest.raises(OSError) as raised:
+        place_file(source, tmp_path / 'b.pdf')
+    assert raised.value.errno == errno.ENOSPC
+    assert source.exists()
+
+
+def test_without_fallback_only_the_requested_strategy_is_tried(tmp_path, monkeypatch):
+    source = tmp_path / 'a.pdf'
+    source.write_bytes(b'%PDF data')
+    monkeypatch.setattr(placement.os, 'link', unsupported(errno.EXDEV))
+    
+    with pytest.raises(OSError) as raised:
+        place_file(source, tmp_path / 'b.pdf', 'hardlink', fallback=False)
+    assert raised.value.errno == errno.EXDEV
+    assert not (tmp_path / 'b.pdf').exists()
+    
+    assert place_file(source, tmp_path / 'b.pdf', 'copy', fallback=False) == 'copy'
+    assert (tmp_path / 'b.pdf').read_bytes() == b'%PDF data'
@@ -0,0 +1,84 @@
+"""
+Tests for planning and resumable, checkpointed apply.
+"""
+
+import json
+
+import pytest
+
+from duplicate_pdf_detector import DuplicatePDFDetector
+from plans import Checkpoint, read_plan
+
+
+class Interrupted(Exception):
+    """Raised by the progress callback to stop an apply part way."""
+
+
+def make_detector(folders, progress_callback=None):
+    return DuplicatePDFDetector(str(folders['source']), str(folders['final']),
+                                log_folder=str(folders['logs']), progress_callback=progress_callback)
+
+
+def interrupt_after(actions):
+    def callback(progress):
+        if progress.stage == 'apply' and progress.files_done == actions:
+            raise Interrupted()
+    return callback
+
+
+@pytest.fixture
+def plan_path(folders, make_pdf):
+    for name, text in [('a', 'alpha'), ('b', 'alpha'), ('c', 'gamma'), ('d', 'gamma'), ('e', 'epsilon')]:
+        (folders['source'] / f"{name}.pdf").write_bytes(make_pdf([text]))
+    path = folders['logs'] / 'plan.jsonl'
+    make_detector(folders).write_plan(path)
+    return path
+
+
+def assert_applied(folders):
+    assert sorted(path.name for path in folders['source'].iterdir()) == []
+    assert sorted(path.name for path in folders['final'].iterdir()) == ['a.pdf', 'c.pdf', 'e.pdf']
+
+
+def test_apply_resumes_after_the_checkpoint_of_an_interrupted_run(folders, plan_path):
+    with pytest.raises(Interrupted):
+        make_detector(folders, interrupt_after(4)).apply_plan(plan_path, checkpoint_interval=100)
+    header, plan_id, _ = read_plan(plan_path)
+    checkpoint = Checkpoint(plan_path, plan_id)
+    assert checkpoint.seq == 4
+    assert not checkpoint.complete
+    
+    results = make_detector(folders).apply_plan(plan_path)
+    
+    assert results['deleted'] == 2
+    assert results['moved'] == 3
+    assert sum(results.values()) == header['actions']
+    assert Checkpoint(plan_path, plan_id).complete
+    assert_applied(folders)
+
+
+def test_actions_applied_after_the_last_checkpoint_are_replayed_harmlessly(folders, plan_path):
+    with pytest.raises(Interrupted):
+        make_detector(folders, interrupt_after(6)).apply_plan(plan_path, checkpoint_interval=100)
+    
+    # A crash before the checkpoint was written leaves it behind the files
+    checkpoint_path = plan_path.with_name(plan_path.name + '.checkpoint')
+    state = json.loads(checkpoint_path.read_text())
+    state.update(seq=1, stats={'kept': 1})
+    checkpoint_path.write_text(json.dumps(state))
+    
+    results = make_detector(folders).apply_plan(plan_path)
+    
+    assert results['failed'] == 0
+    assert results['missing'] > 0
+    assert_applied(folders)
+
+
+def test_checkpoint_of_another_plan_is_ignored(folders, plan_path):
+    checkpoint_path = plan_path.with_name(plan_path.name + '.checkpoint')
+    checkpoint_path.write_text(json.dumps({'plan': 'other', 'seq': 99, 'stats': {}, 'complete': True}))
+    
+    results = make_detector(folders).apply_plan(plan_path)
+    
+    assert results['deleted'] == 2
+    assert_applied(folders)
@@ -0,0 +1,72 @@
+"""
+Tests for the folder scanner.
+"""
+
+import os
+
+import pytest
+
+from scanner import is_selected, scan_pdfs
+
+
+def names(manifest, root):
+    return [entry.path.relative_to(root).as_posix() for entry in manifest]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'source'
+    for relative in ('a.pdf', 'B.PDF', 'c.Pdf', 'notes.txt', 'sub/d.pdf', 'sub/deeper/e.pdf',
+                     'drafts/f.pdf', 'sub/draft_g.pdf'):
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'%PDF-1.4 ' + relative.encode())
+    return root
+
+
+def test_flat_and_recursive_scans_find_pdfs_in_any_case(tree):
+    assert names(scan_pdfs(tree), tree) == ['B.PDF', 'a.pdf', 'c.Pdf']
+    assert names(scan_pdfs(tree, recursive=True), tree) == [
+        'B.PDF', 'a.pdf', 'c.Pdf', 'drafts/f.pdf', 'sub/d.pdf', 'sub/deeper/e.pdf', 'sub/draft_g.pdf'
+    ]
+    entry = scan_pdfs(tree)[1]
+    stat = entry.path.stat()
+    assert (entry.size, entry.mtime_ns, entry.inode) == (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def test_include_and_exclude_globs_match_names_and_relative_paths(tree):
+    assert names(scan_pdfs(tree, recursive=True, include=['*.txt']), tree) == ['notes.txt']
+    assert names(scan_pdfs(tree, recursive=True, include=['sub/*']), tree) == [
+        'sub/d.pdf', 'sub/deeper/e.pdf', 'sub/draft_g.pdf'
+    ]
+    assert names(scan_pdfs(tree, recursive=True, exclude=['draft*', 'DEEPER']), tree) == [
+        'B.PDF', 'a.pdf', 'c.Pdf', 'sub/d.pdf'
+    ]
+    assert names(scan_pdfs(tree, recursive=True, skip_dirs=[tree / 'sub']), tree) == [
+        'B.PDF', 'a.pdf', 'c.Pdf', 'drafts/f.pdf'
+    ]
+    
+    assert is_selected(tree / 'sub' / 'd.pdf', tree, exclude=['draft*'])
+    assert not is_selected(tree / 'drafts' / 'f.pdf', tree, exclude=['draft*'])
+    assert not is_selected(tree / 'notes.txt', tree)
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason='needs symbolic links')
+def test_symlink_policies(tree, tmp_path):
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    (outside / 'linked.pdf').write_bytes(b'%PDF-1.4 outside')
+    (tree / 'file_link.pdf').symlink_to(outside / 'linked.pdf')
+    (tree / 'dir_link').symlink_to(outside, target_is_directory=True)
+    # A link back up the tree must not make the scan loop
+    (tree / 'sub' / 'loop').symlink_to(tree, target_is_directory=True)
+    
+    def linked(policy):
+        found = names(scan_pdfs(tree, recursive=True, symlinks=policy), tree)
+        return [name for name in found if 'link' in name or 'loop' in name]
+    
+    assert linked('follow') == ['dir_link/linked.pdf', 'file_link.pdf']
+    assert linked('files') == ['file_link.pdf']
+    assert linked('skip') == []
+    with pytest.raises(ValueError):
+        scan_pdfs(tree, symlinks='sometimes')
@@ -0,0 +1,54 @@
+"""
+Tests for the size, sample and full hash stages of content grouping.
+"""
+
+import duplicate_pdf_detector
+from duplicate_pdf_detector import DuplicatePDFDetector
+
+
+def spy(monkeypatch, name):
+    """Record the path of every file a module-level hash function is called on."""
+    calls = []
+    original = getattr(duplicate_pdf_detector, name)
+    
+    def recording(pdf_path, *args):
+        calls.append(pdf_path.name)
+        return original(pdf_path, *args)
+    
+    monkeypatch.setattr(duplicate_pdf_detector, name, recording)
+    return calls
+
+
+def test_each_stage_only_reads_the_files_the_previous_one_could_not_tell_apart(folders, monkeypatch):
+    head, tail = b'H' * 64, b'T' * 64
+    files = {
+        # Unique sizes: never read
+        'small.pdf': b'x' * 100,
+        'large.pdf': b'x' * 5000,
+        # Same size, different head: told apart by the sample
+        'other.pdf': b'O' * 64 + b'-' * 872 + tail,
+        # Same size, head and tail, different middle: told apart by the full hash
+        'middle1.pdf': head + b'1' * 872 + tail,
+        'middle2.pdf': head + b'2' * 872 + tail,
+        # Exact copies
+        'copy1.pdf': b'C' * 64 + b'-' * 872 + tail,
+        'copy2.pdf': b'C' * 64 + b'-' * 872 + tail,
+    }
+    for name, data in files.items():
+        (folders['source'] / name).write_bytes(data)
+    sampled = spy(monkeypatch, 'hash_file_sample')
+    hashed = spy(monkeypatch, 'hash_file')
+    
+    detector = DuplicatePDFDetector(str(folders['source']), str(folders['final']),
+                                    log_folder=str(folders['logs']))
+    detector.SAMPLE_SIZE = 64
+    duplicates = detector.find_duplicates()
+    
+    assert sorted(sampled) == ['copy1.pdf', 'copy2.pdf', 'middle1.pdf', 'middle2.pdf', 'other.pdf']
+    assert sorted(hashed) == ['copy1.pdf', 'copy2.pdf', 'middle1.pdf', 'middle2.pdf']
+    assert detector.stats['size_unique'] == 2
+    assert detector.stats['sample_unique'] == 1
+    assert detector.stats['fully_hashed'] == 4
+    assert detector.stats['unique_pdfs'] == 5
+    assert detector.stats['duplicates_found'] == 1
+    assert [sorted(path.name for path in paths) for paths in duplicates.values()] == [['copy1.pdf', 'copy2.pdf']]
@@ -0,0 +1,56 @@
+"""
+Tests for the structural hash mode.
+"""
+
+import io
+
+import PyPDF2
+from PyPDF2 import PdfWriter
+
+from duplicate_pdf_detector import (DuplicatePDFDetector, hash_file, structural_hash_file,
+                                    structures_identical)
+
+
+def resave(data: bytes) -> bytes:
+    """Save a PDF again with renumbered objects, compressed page content and new metadata."""
+    writer = PdfWriter()
+    writer.append_pages_from_reader(PyPDF2.PdfReader(io.BytesIO(data)))
+    for page in writer.pages:
+        page.compress_content_streams()
+    writer.add_metadata({'/Producer': 'Another tool', '/CreationDate': 'D:20240101120000',
+                         '/ModDate': 'D:20240102120000'})
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def test_a_resaved_copy_matches_structurally_but_not_by_content(tmp_path, make_pdf):
+    original = tmp_path / 'original.pdf'
+    copy = tmp_path / 'copy.pdf'
+    other = tmp_path / 'other.pdf'
+    original.write_bytes(make_pdf(['alpha', 'beta'], producer='First tool'))
+    copy.write_bytes(resave(original.read_bytes()))
+    other.write_bytes(make_pdf(['alpha', 'gamma'], producer='First tool'))
+    assert b'/FlateDecode' in copy.read_bytes()
+    
+    assert hash_file(original) != hash_file(copy)
+    assert structural_hash_file(original) == structural_hash_file(copy)
+    assert structures_identical(original, copy)
+    
+    assert structural_hash_file(original) != structural_hash_file(other)
+    assert not structures_identical(original, other)
+
+
+def test_structural_mode_removes_resaved_copies(folders, make_pdf):
+    data = make_pdf(['alpha', 'beta'])
+    (folders['source'] / 'a.pdf').write_bytes(data)
+    (folders['source'] / 'b.pdf').write_bytes(resave(data))
+    (folders['source'] / 'c.pdf').write_bytes(make_pdf(['gamma']))
+    
+    detector = DuplicatePDFDetector(str(folders['source']), str(folders['final']),
+                                    log_folder=str(folders['logs']), hash_mode='structural',
+                                    verify=True)
+    detector.process()
+    
+    assert detector.stats['duplicates_removed'] == 1
+    assert sorted(path.name for path in folders['final'].iterdir()) == ['a.pdf', 'c.pdf']
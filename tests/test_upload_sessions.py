@@ -0,0 +1,60 @@
+"""
+Tests for resumable upload sessions.
+"""
+
+import io
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from upload_sessions import OffsetMismatch, UploadSessionStore
+
+
+def test_session_resumes_from_the_offset_reported_by_a_mismatch(app_module, client, make_pdf, monkeypatch):
+    first, second = make_pdf(['alpha']), make_pdf(['beta'])
+    stream = first + second
+    session = client.post('/api/uploads', json={'files': [
+        {'name': 'a.pdf', 'size': len(first)}, {'name': 'b.pdf', 'size': len(second)}
+    ]}).get_json()
+    url = f"/api/uploads/{session['session_id']}"
+    
+    assert client.put(f"{url}?offset=0", data=stream[:100]).status_code == 200
+    mismatch = client.put(f"{url}?offset=150", data=stream[150:])
+    assert mismatch.status_code == 409
+    offset = mismatch.get_json()['offset']
+    assert offset == 100
+    
+    # Retransmitting received bytes is harmless
+    assert client.put(f"{url}?offset=50", data=stream[50:100]).get_json()['offset'] == 100
+    done = client.put(url, data=stream[offset:], headers={
+        'Content-Range': f"bytes {offset}-{len(stream) - 1}/{len(stream)}"
+    }).get_json()
+    assert done['complete']
+    
+    # Finalizing reuses the digests computed while the bytes arrived
+    def no_rehash(*args, **kwargs):
+        raise AssertionError("staged file hashed again")
+    monkeypatch.setattr(app_module, 'hash_file', no_rehash)
+    results = client.post(f"{url}/finalize").get_json()['results']
+    
+    assert [result['filename'] for result in results] == ['a.pdf', 'b.pdf']
+    source = Path(app_module.app.config['UPLOAD_FOLDER'])
+    assert (source / 'a.pdf').read_bytes() == first
+    assert (source / 'b.pdf').read_bytes() == second
+
+
+def test_running_digest_is_dropped_for_files_staged_by_an_earlier_process(tmp_path):
+    data = bytes(range(256)) * 40
+    store = UploadSessionStore(tmp_path)
+    session_id = store.create([('a.pdf', len(data)), ('b.pdf', len(data))])['session_id']
+    store.write(session_id, 0, io.BytesIO(data[:1000]))
+    
+    restarted = UploadSessionStore(tmp_path)
+    with pytest.raises(OffsetMismatch) as mismatch:
+        restarted.write(session_id, 2000, io.BytesIO(data))
+    assert mismatch.value.offset == 1000
+    restarted.write(session_id, 1000, io.BytesIO(data[1000:] + data))
+    
+    assert restarted.digest(session_id, 0) is None
+    assert restarted.digest(session_id, 1) == f"sha256:{hashlib.sha256(data).hexdigest()}"
@@ -0,0 +1,29 @@
+"""
+Tests for verification of duplicate groups.
+"""
+
+from duplicate_pdf_detector import DuplicatePDFDetector
+from hash_index import HashIndex
+from scanner import scan_pdfs
+
+
+def test_text_verification_rereads_files_instead_of_trusting_cached_digests(folders, make_pdf):
+    (folders['source'] / 'a.pdf').write_bytes(make_pdf(['alpha']))
+    (folders['source'] / 'b.pdf').write_bytes(make_pdf(['gamma']))
+    index_path = str(folders['logs'] / 'index.db')
+    options = dict(log_folder=str(folders['logs']), hash_mode='text', index_path=index_path)
+    DuplicatePDFDetector(str(folders['source']), str(folders['final']), **options).find_duplicates()
+    
+    # A stale index entry claims b.pdf has the same text as a.pdf, page digests included
+    entries = {entry.path.name: entry for entry in scan_pdfs(folders['source'])}
+    index = HashIndex(index_path, str(folders['source']))
+    digests = index.lookup(entries['a.pdf'], ('text_hash', 'page_hashes'))
+    index.update([(entries['b.pdf'], digests)], ('text_hash', 'page_hashes'))
+    index.close()
+    
+    unverified = DuplicatePDFDetector(str(folders['source']), str(folders['final']), **options)
+    assert len(unverified.find_duplicates()) == 1
+    
+    detector = DuplicatePDFDetector(str(folders['source']), str(folders['final']), verify=True, **options)
+    assert detector.find_duplicates() == {}
+    assert detector.stats['verification_failures'] == 1
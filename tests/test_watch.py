@@ -0,0 +1,117 @@
+"""
+Tests for watch mode: ingesting single arrivals and the polling watcher.
+"""
+
+import os
+import time
+import threading
+
+import pytest
+
+import watcher
+from duplicate_pdf_detector import DuplicatePDFDetector
+from naming import NameAllocator
+from watcher import PollingWatcher, create_watcher
+
+
+def detector_for(folders, **options):
+    return DuplicatePDFDetector(str(folders['source']), str(folders['final']),
+                                log_folder=str(folders['logs']), **options)
+
+
+@pytest.mark.parametrize('hash_mode', ['content', 'text'])
+def test_ingest_places_new_files_and_deletes_duplicates_of_resident_ones(folders, make_pdf, hash_mode):
+    (folders['final'] / 'kept.pdf').write_bytes(make_pdf(['alpha']))
+    detector = detector_for(folders, hash_mode=hash_mode)
+    resident = detector._resident_digests()
+    names = NameAllocator(folders['final'])
+    assert len(resident) == 1
+    
+    new = folders['source'] / 'new.pdf'
+    new.write_bytes(make_pdf(['beta']))
+    detector._ingest(new, resident, names)
+    
+    assert not new.exists()
+    assert (folders['final'] / 'new.pdf').read_bytes() == make_pdf(['beta'])
+    assert len(resident) == 2
+    
+    copy = folders['source'] / 'copy.pdf'
+    copy.write_bytes(make_pdf(['alpha']))
+    again = folders['source'] / 'new.pdf'
+    again.write_bytes(make_pdf(['beta']))
+    detector._ingest(copy, resident, names)
+    detector._ingest(again, resident, names)
+    
+    assert not copy.exists() and not again.exists()
+    assert sorted(path.name for path in folders['final'].iterdir()) == ['kept.pdf', 'new.pdf']
+    assert detector.stats['total_pdfs'] == 3
+    assert detector.stats['unique_pdfs'] == 1
+    assert detector.stats['duplicates_removed'] == 2
+
+
+def test_polling_watcher_reports_a_file_once_it_stops_changing(tmp_path):
+    poller = PollingWatcher(tmp_path, interval=0.01)
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'%PDF first')
+    
+    assert poller.poll(1) == ([], False)
+    assert poller.poll(1) == ([path], False)
+    assert poller.poll(1) == ([], False)
+    
+    path.write_bytes(b'%PDF second, longer')
+    assert poller.poll(1) == ([], False)
+    assert poller.poll(1) == ([path], False)
+    
+    path.unlink()
+    assert poller.poll(1) == ([], False)
+    path.write_bytes(b'%PDF second, longer')
+    assert poller.poll(1) == ([], False)
+    assert poller.poll(1) == ([path], False)
+
+
+def test_polling_watcher_waits_no_longer_than_the_timeout(tmp_path):
+    poller = PollingWatcher(tmp_path, interval=10)
+    poller.poll(0)
+    
+    started = time.monotonic()
+    assert poller.poll(0.05) == ([], False)
+    assert time.monotonic() - started < 1
+
+
+def test_polling_is_used_when_inotify_is_unavailable(tmp_path, monkeypatch):
+    forced = create_watcher(tmp_path, polling=True)
+    assert isinstance(forced, PollingWatcher)
+    
+    monkeypatch.setattr(watcher, '_load_libc', lambda: None)
+    fallback = create_watcher(tmp_path, recursive=True)
+    assert isinstance(fallback, PollingWatcher)
+    assert fallback.scan_options['recursive'] is True
+
+
+def test_watch_with_polling_deduplicates_arrivals(folders, make_pdf):
+    (folders['source'] / 'backlog.pdf').write_bytes(make_pdf(['alpha']))
+    detector = detector_for(folders)
+    stop = threading.Event()
+    thread = threading.Thread(target=detector.watch,
+                              kwargs={'poll_interval': 0.02, 'polling': True, 'stop_event': stop})
+    thread.start()
+    try:
+        deadline = time.monotonic() + 10
+        while not (folders['final'] / 'backlog.pdf').exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        # Written under another name and renamed, as a complete file arrives
+        for name, text in (('copy.pdf', 'alpha'), ('fresh.pdf', 'gamma')):
+            partial = folders['source'] / f"{name}.part"
+            partial.write_bytes(make_pdf([text]))
+            os.rename(partial, folders['source'] / name)
+        while detector.stats['total_pdfs'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stop.set()
+        thread.join(10)
+    
+    assert not thread.is_alive()
+    assert sorted(path.name for path in folders['final'].iterdir()) == ['backlog.pdf', 'fresh.pdf']
+    assert list(folders['source'].iterdir()) == []
+    assert detector.stats['duplicates_removed'] == 1
@@ -0,0 +1,364 @@
+"""
+SanitixPDF - Resumable upload sessions
+A session announces one or more files up front and then receives their
+bytes as a single stream: the files concatenated in order. Chunks of that
+stream are written straight to per-file staging files, so an interrupted
+transfer resumes from the last byte received, and many small files can
+arrive in one request. Each file is hashed as its bytes arrive, so
+finalizing does not read it again.
+"""
+
+import json
+import time
+import uuid
+import shutil
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from digests import new_hasher, tag_digest
+
+
+class OffsetMismatch(ValueError):
+    """Raised when a chunk does not start where the session left off."""
+    
+    def __init__(self, offset: int):
+        """
+        Initialize the error.
+        
+        Args:
+            offset: Number of bytes the session has actually received
+        """
+        super().__init__(f"Expected a chunk starting at byte {offset}")
+        self.offset = offset
+
+
+class UploadSessionStore:
+    """
+    Upload sessions kept on disk next to the upload folder.
+    
+    Each session is a folder holding session.json (the announced files)
+    and one staging file per file. Received offsets are read back from the
+    staging file sizes, so sessions survive a server restart. Running
+    digests live in memory only; a file partly staged by an earlier process
+    has none and is hashed when it is finalized.
+    """
+    
+    def __init__(self, staging_folder, ttl: float = 24 * 3600, algorithm: str = 'sha256'):
+        """
+        Initialize the store.
+        
+        Args:
+            staging_folder: Folder sessions are kept in; it must be on the
+                same filesystem as the upload folder so files can be renamed
+            ttl: Seconds after its last change that an abandoned session is removed
+            algorithm: Digest algorithm of the running digests, one of DIGEST_ALGORITHMS
+        """
+        self.staging_folder = Path(staging_folder)
+        self.ttl = ttl
+        self.algorithm = algorithm
+        self._lock = threading.Lock()
+        self._session_locks = {}
+        # (session ID, file index) -> [hasher, bytes hashed]
+        self._hashers = {}
+    
+    def _folder(self, session_id: str) -> Path:
+        """Return the folder of a session."""
+        return self.staging_folder / session_id
+    
+    def _session_lock(self, session_id: str) -> threading.Lock:
+        """Return the lock serializing writes to one session."""
+        with self._lock:
+            return self._session_locks.setdefault(session_id, threading.Lock())
+    
+    def _load(self, session_id: str) -> Optional[Dict]:
+        """Read a session's metadata, or None if the session does not exist."""
+        try:
+            uuid.UUID(hex=session_id)
+        except ValueError:
+            return None
+        try:
+            with open(self._folder(session_id) / 'session.json', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+    
+    def _save(self, session_id: str, session: Dict):
+        """Write a session's metadata atomically."""
+        path = self._folder(session_id) / 'session.json'
+        temp = path.with_suffix('.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(session, f)
+        temp.replace(path)
+    
+    def _running_hash(self, session_id: str, index: int, received: int) -> Optional[list]:
+        """
+        Return the running digest of a file, if it covers every byte staged so far.
+        
+        Caller holds the session lock.
+        """
+        key = (session_id, index)
+        running = self._hashers.get(key)
+        if running is not None and running[1] == received:
+            return running
+        if received == 0:
+            running = self._hashers[key] = [new_hasher(self.algorithm), 0]
+            return running
+        self._hashers.pop(key, None)
+        return None
+    
+    def _forget(self, session_id: str):
+        """Drop the running digests of a session."""
+        with self._lock:
+            for key in [key for key in self._hashers if key[0] == session_id]:
+                del self._hashers[key]
+    
+    def staging_path(self, session_id: str, index: int) -> Path:
+        """Return the staging file of one file of a session."""
+        return self._folder(session_id) / f"{index}.part"
+    
+    def _received(self, session_id: str, session: Dict) -> List[int]:
+        """Return the number of bytes received for every file of a session."""
+        received = []
+        for index, file in enumerate(session['files']):
+            if index in session['finalized']:
+                received.append(file['size'])
+                continue
+            try:
+                received.append(self.staging_path(session_id, index).stat().st_size)
+            except FileNotFoundError:
+                received.append(0)
+        return received
+    
+    def create(self, files: List[Tuple[str, int]]) -> Dict:
+        """
+        Start a session for a batch of files.
+        
+        Args:
+            files: (file name, size in bytes) of every file, in stream order
+        
+        Returns:
+            Status of the new session
+        """
+        self.cleanup()
+        
+        session_id = uuid.uuid4().hex
+        self._folder(session_id).mkdir(parents=True)
+        session = {
+            'created_at': datetime.now().isoformat(),
+            'files': [{'name': name, 'size': size} for name, size in files],
+            'finalized': []
+        }
+        for index in range(len(files)):
+            self.staging_path(session_id, index).touch()
+        self._save(session_id, session)
+        return self.status(session_id)
+    
+    def status(self, session_id: str) -> Optional[Dict]:
+        """
+        Describe a session and how much of each file has arrived.
+        
+        Args:
+            session_id: Identifier of the session
+        
+        Returns:
+            Session status, or None if the session does not exist
+        """
+        session = self._load(session_id)
+        if session is None:
+            return None
+        
+        received = self._received(session_id, session)
+        files = []
+        for index, (file, count) in enumerate(zip(session['files'], received)):
+            if index in session['finalized']:
+                state = 'finalized'
+            elif count == file['size']:
+                state = 'complete'
+            else:
+                state = 'pending'
+            files.append({
+                'index': index,
+                'name': file['name'],
+                'size': file['size'],
+                'received': count,
+                'state': state
+            })
+        
+        return {
+            'session_id': session_id,
+            'created_at': session['created_at'],
+            'offset': sum(received),
+            'total': sum(file['size'] for file in session['files']),
+            'files': files
+        }
+    
+    def write(self, session_id: str, offset: int, stream: BinaryIO,
+              chunk_size: int = 1024 * 1024) -> int:
+        """
+        Append a chunk of the session stream to the staging files.
+        
+        A chunk that lies entirely within bytes already received is a
+        retransmission and is discarded, which makes retries idempotent.
+        
+        Args:
+            session_id: Identifier of the session
+            offset: Position of the chunk in the session stream
+            stream: Body of the chunk
+            chunk_size: Read buffer size in bytes
+        
+        Returns:
+            Number of bytes of the stream received after the chunk
+        
+        Raises:
+            KeyError: If the session does not exist
+            OffsetMismatch: If the chunk starts past the received offset, or
+                overlaps it without lying entirely within it
+            ValueError: If the chunk extends past the announced files
+        """
+        with self._session_lock(session_id):
+            session = self._load(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            
+            sizes = [file['size'] for file in session['files']]
+            received = self._received(session_id, session)
+            position = sum(received)
+            
+            if offset > position:
+                raise OffsetMismatch(position)
+            if offset < position:
+                # Only a complete retransmission of received bytes is accepted
+                length = 0
+                while True:
+                    block = stream.read(chunk_size)
+                    if not block:
+                        break
+                    length += len(block)
+                    if offset + length > position:
+                        raise OffsetMismatch(position)
+                return position
+            
+            index = next((i for i, count in enumerate(received) if count < sizes[i]), len(sizes))
+            output = None
+            running = None
+            try:
+                while True:
+                    block = stream.read(chunk_size)
+                    if not block:
+                        break
+                    view = memoryview(block)
+                    while view:
+                        if index >= len(sizes):
+                            raise ValueError("Chunk extends past the end of the announced files")
+                        if output is None:
+                            output = open(self.staging_path(session_id, index), 'ab')
+                            running = self._running_hash(session_id, index, received[index])
+                        take = min(len(view), sizes[index] - received[index])
+                        output.write(view[:take])
+                        if running is not None:
+                            running[0].update(view[:take])
+                            running[1] += take
+                        received[index] += take
+                        position += take
+                        view = view[take:]
+                        if received[index] == sizes[index]:
+                            output.close()
+                            output = None
+                            index += 1
+                            # Skip empty files, which are complete from the start
+                            while index < len(sizes) and sizes[index] == 0:
+                                index += 1
+            finally:
+                if output is not None:
+                    output.close()
+            return position
+    
+    def digest(self, session_id: str, index: int) -> Optional[str]:
+        """
+        Return the digest of a completely received file, computed while it arrived.
+        
+        Args:
+            session_id: Identifier of the session
+            index: Position of the file in the session
+        
+        Returns:
+            Tagged content digest, or None if the file was not hashed in full
+            by this process and has to be hashed from its staging file
+        """
+        with self._session_lock(session_id):
+            try:
+                size = self.staging_path(session_id, index).stat().st_size
+            except FileNotFoundError:
+                return None
+            running = self._running_hash(session_id, index, size) if size else None
+            if running is None:
+                return None
+            return tag_digest(self.algorithm, running[0].hexdigest())
+    
+    def finalized(self, session_id: str, index: int):
+        """
+        Record that a complete file has left the staging area.
+        
+        The session is removed once every file is finalized.
+        
+        Args:
+            session_id: Identifier of the session
+            index: Position of the file in the session
+        """
+        with self._session_lock(session_id):
+            session = self._load(session_id)
+            if session is None:
+                return
+            if index not in session['finalized']:
+                session['finalized'].append(index)
+            self._hashers.pop((session_id, index), None)
+            done = len(session['finalized']) == len(session['files'])
+            if done:
+                shutil.rmtree(self._folder(session_id), ignore_errors=True)
+            else:
+                self._save(session_id, session)
+        if done:
+            with self._lock:
+                self._session_locks.pop(session_id, None)
+    
+    def delete(self, session_id: str) -> bool:
+        """
+        Abort a session and discard everything it received.
+        
+        Returns:
+            True if the session existed
+        """
+        if self._load(session_id) is None:
+            return False
+        with self._session_lock(session_id):
+            shutil.rmtree(self._folder(session_id), ignore_errors=True)
+        self._forget(session_id)
+        with self._lock:
+            self._session_locks.pop(session_id, None)
+        return True
+    
+    def cleanup(self) -> int:
+        """
+        Remove sessions that have not changed for longer than the TTL.
+        
+        Returns:
+            Number of sessions removed
+        """
+        if not self.staging_folder.exists():
+            return 0
+        
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for folder in self.staging_folder.iterdir():
+            if not folder.is_dir():
+                continue
+            try:
+                last_change = max(path.stat().st_mtime for path in folder.iterdir())
+            except (OSError, ValueError):
+                last_change = 0
+            if last_change < cutoff:
+                shutil.rmtree(folder, ignore_errors=True)
+                self._forget(folder.name)
+                removed += 1
+        return removed
@@ -69,6 +69,22 @@ def check_files():
     required_files = [
         'app.py',
         'duplicate_pdf_detector.py',
+        'hash_index.py',
+        'near_duplicates.py',
+        'scanner.py',
+        'digests.py',
+        'placement.py',
+        'naming.py',
+        'jobs.py',
+        'folder_summary.py',
+        'upload_sessions.py',
+        'export.py',
+        'metrics.py',
+        'log_pipeline.py',
+        'plans.py',
+        'watcher.py',
+        'grouping.py',
+        'cas_store.py',
         'config.py',
         'requirements.txt',
         'templates/index.html',
@@ -0,0 +1,263 @@
+"""
+SanitixPDF - Folder watcher
+Reports files that have finished arriving in a folder. On Linux the kernel's
+inotify interface announces each file as its writer closes it or as it is
+renamed into the folder; elsewhere the folder is rescanned periodically and
+a file is reported once its size and modification time stop changing.
+"""
+
+import os
+import sys
+import time
+import errno
+import struct
+import select
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+from scanner import scan_pdfs
+
+
+# inotify event flags, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _load_libc():
+    """Return libc if it provides inotify, else None."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    """
+    Watches a folder with inotify.
+    
+    A file is ready once it was closed after writing, or renamed into the
+    folder, and then saw no further writes for the debounce period.
+    """
+    
+    def __init__(self, folder, recursive: bool = False, skip_dirs: Iterable = (),
+                 debounce: float = 0.05):
+        """
+        Start watching.
+        
+        Args:
+            folder: Folder to watch
+            recursive: Also watch subfolders, including ones created later
+            skip_dirs: Folders never watched, such as the final folder
+            debounce: Seconds a closed file must stay unmodified
+        
+        Raises:
+            OSError: If inotify is unavailable or the folder cannot be watched
+        """
+        self.libc = _load_libc()
+        if self.libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.folder = Path(folder)
+        self.recursive = recursive
+        self.skipped = {os.path.abspath(path) for path in skip_dirs}
+        self.debounce = debounce
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self._watches = {}
+        self._pending = {}
+        self._rescan = False
+        try:
+            self._add_watch(self.folder)
+        except OSError:
+            os.close(self.fd)
+            raise
+    
+    def _add_watch(self, directory: Path):
+        """Watch a directory, and its subdirectories when recursive."""
+        if os.path.abspath(directory) in self.skipped:
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), str(directory))
+        self._watches[wd] = directory
+        if self.recursive:
+            for entry in os.scandir(directory):
+                if entry.is_dir(follow_symlinks=False):
+                    self._add_watch(Path(entry.path))
+    
+    def _read_events(self, timeout: float):
+        """Wait up to timeout seconds for events and record them."""
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        
+        now = time.monotonic()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; the caller has to rescan
+                self._rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._add_watch(path)
+                    except OSError:
+                        pass
+                    # Files may have landed before the watch existed
+                    self._rescan = True
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self._pending[path] = now + self.debounce
+            elif mask & IN_MODIFY and path in self._pending:
+                self._pending[path] = now + self.debounce
+    
+    def poll(self, timeout: float) -> Tuple[List[Path], bool]:
+        """
+        Wait for files to become ready.
+        
+        Args:
+            timeout: Maximum number of seconds to wait
+        
+        Returns:
+            Tuple of (ready files, whether events were lost so the folder
+            must be rescanned)
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            wait = deadline - now
+            if self._pending:
+                wait = min(wait, min(self._pending.values()) - now)
+            self._read_events(wait)
+            
+            now = time.monotonic()
+            ready = [path for path, due in self._pending.items() if due <= now]
+            for path in ready:
+                del self._pending[path]
+            rescan, self._rescan = self._rescan, False
+            if ready or rescan or now >= deadline:
+                return sorted(ready), rescan
+    
+    def close(self):
+        """Stop watching."""
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Watches a folder by rescanning it.
+    
+    A file is ready once two consecutive scans found the same size and
+    modification time, and it is reported again if it changes later.
+    """
+    
+    def __init__(self, folder, interval: float = 1.0, **scan_options):
+        """
+        Start watching.
+        
+        Args:
+            folder: Folder to watch
+            interval: Seconds between scans
+            scan_options: Keyword arguments passed on to scan_pdfs
+        """
+        self.folder = folder
+        self.interval = interval
+        self.scan_options = scan_options
+        self._seen = {}
+        self._reported = {}
+        self._next_scan = 0.0
+    
+    def poll(self, timeout: float) -> Tuple[List[Path], bool]:
+        """
+        Wait for files to become ready.
+        
+        Args:
+            timeout: Maximum number of seconds to wait
+        
+        Returns:
+            Tuple of (ready files, False)
+        """
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(timeout, 0))
+            return [], False
+        time.sleep(max(wait, 0))
+        self._next_scan = time.monotonic() + self.interval
+        
+        try:
+            entries = scan_pdfs(self.folder, **self.scan_options)
+        except FileNotFoundError:
+            entries = []
+        current: Dict[Path, Tuple[int, int]] = {entry.path: (entry.size, entry.mtime_ns) for entry in entries}
+        ready = [path for path, signature in current.items()
+                 if self._seen.get(path) == signature and self._reported.get(path) != signature]
+        for path in ready:
+            self._reported[path] = current[path]
+        self._seen = current
+        self._reported = {path: signature for path, signature in self._reported.items() if path in current}
+        return ready, False
+    
+    def close(self):
+        """Stop watching."""
+
+
+def create_watcher(folder, recursive: bool = False, skip_dirs: Iterable = (),
+                   debounce: float = 0.05, interval: float = 1.0, polling: bool = False,
+                   **scan_options):
+    """
+    Watch a folder with inotify, or by polling when inotify is unavailable.
+    
+    Args:
+        folder: Folder to watch
+        recursive: Also watch subfolders
+        skip_dirs: Folders never watched
+        debounce: Seconds a closed file must stay unmodified (inotify)
+        interval: Seconds between scans (polling)
+        polling: Poll even if inotify is available
+        scan_options: Further keyword arguments passed on to scan_pdfs
+    
+    Returns:
+        An InotifyWatcher or PollingWatcher
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(folder, recursive, skip_dirs, debounce)
+        except OSError:
+            pass
+    return PollingWatcher(folder, interval, recursive=recursive, skip_dirs=skip_dirs, **scan_options)